@@ -0,0 +1,6 @@
+"""
+Briques partagées par les scripts de collecte du Portfolio Tracker.
+
+Les scripts du dossier ``Scripts`` importent ce paquet directement : il suffit
+de les lancer depuis ce dossier (ou avec ce dossier dans le ``PYTHONPATH``).
+"""
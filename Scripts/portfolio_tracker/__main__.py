@@ -0,0 +1,202 @@
+"""
+Point d'entrée en ligne de commande, à lancer depuis le dossier ``Scripts`` :
+
+    python -m portfolio_tracker run                  # tous les collecteurs (bilan JSON dans .data/runs)
+    python -m portfolio_tracker run binance mexc     # une sélection
+    python -m portfolio_tracker backfill --start 2024-01-01
+    python -m portfolio_tracker valuation            # valorisation seule
+    python -m portfolio_tracker pnl                  # PnL FIFO et coût moyen
+    python -m portfolio_tracker intraday             # relevés toutes les 5 minutes
+    python -m portfolio_tracker stream               # soldes Binance et MEXC en continu (WebSocket)
+    python -m portfolio_tracker report allocation    # répartition par symbole
+    python -m portfolio_tracker report risk          # volatilité, drawdowns et risque du portefeuille
+    python -m portfolio_tracker mexc                 # un collecteur seul, chemin léger sans pandas
+    python -m portfolio_tracker --profile-imports    # coût de démarrage de chaque collecteur
+    python -m portfolio_tracker migrate              # index uniques des tables historiques (dédoublonnage)
+
+Les sous-commandes ``prices``, ``binance``, ``mexc``, ``evm`` et ``starknet``
+ne chargent que les modules de leur collecteur (voir ``light``).
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import date
+
+from dotenv import load_dotenv
+
+from . import collectors
+
+# Collecteurs lançables seuls par une sous-commande, par leur chemin léger
+LIGHT_COLLECTORS = ["prices", "binance", "mexc", "evm", "starknet"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="portfolio_tracker")
+    parser.add_argument("--profile-imports", action="store_true",
+                        help="mesurer le coût de démarrage de chaque collecteur (ou de celui de la sous-commande)")
+    subparsers = parser.add_subparsers(dest="command")
+    run_parser = subparsers.add_parser("run", help="lancer les collecteurs en parallèle")
+    run_parser.add_argument("collectors", nargs="*",
+                            help=f"collecteurs à lancer parmi {', '.join(collectors.COLLECTORS)} (tous par défaut)")
+    run_parser.add_argument("--workers", type=int, help="nombre de collecteurs simultanés")
+    run_parser.add_argument("--no-valuation", action="store_true",
+                            help="ne pas valoriser le portefeuille ni calculer le PnL après la collecte")
+    run_parser.add_argument("--metrics-port", type=int,
+                            help="exposer les mesures au format Prometheus sur ce port (metrics_port)")
+
+    subparsers.add_parser("valuation", help="valoriser les positions des dates nouvelles")
+
+    pnl_parser = subparsers.add_parser("pnl", help="calculer le PnL des nouveaux trades (pnl_daily)")
+    pnl_parser.add_argument("--restart", action="store_true", help="recalculer depuis le premier trade")
+
+    backfill_parser = subparsers.add_parser("backfill", help="combler les trous de l'historique des prix")
+    backfill_parser.add_argument("--start", type=date.fromisoformat, required=True, help="premier jour (AAAA-MM-JJ)")
+    backfill_parser.add_argument("--end", type=date.fromisoformat, help="dernier jour (la veille par défaut)")
+    backfill_parser.add_argument("--ids", nargs="+", help="ids CoinGecko (liste du collecteur de prix par défaut)")
+    backfill_parser.add_argument("--restart", action="store_true", help="ignorer le point de reprise existant")
+
+    intraday_parser = subparsers.add_parser("intraday", help="relever soldes et prix à intervalle régulier")
+    intraday_parser.add_argument("sources", nargs="*", help="sources parmi binance, mexc, prices (toutes par défaut)")
+    intraday_parser.add_argument("--interval", type=float, help="secondes entre deux relevés (intraday_interval)")
+    intraday_parser.add_argument("--once", action="store_true", help="un seul relevé de chaque source")
+    intraday_parser.add_argument("--retention", action="store_true",
+                                 help="replier et supprimer les partitions expirées, puis quitter")
+    intraday_parser.add_argument("--metrics-port", type=int,
+                                 help="exposer les mesures au format Prometheus sur ce port (metrics_port)")
+
+    stream_parser = subparsers.add_parser("stream", help="suivre les soldes en continu par les flux WebSocket")
+    stream_parser.add_argument("platforms", nargs="*", help="plateformes parmi binance, mexc (toutes par défaut)")
+    stream_parser.add_argument("--flush-interval", type=float,
+                               help="secondes entre deux écritures des positions modifiées (stream_flush_interval)")
+
+    migrate_parser = subparsers.add_parser("migrate", help="dédoublonner les tables historiques et créer leur index unique")
+    migrate_parser.add_argument("tables", nargs="*", help="tables à migrer (toutes les tables connues par défaut)")
+
+    report_parser = subparsers.add_parser("report", help="lectures analytiques du portefeuille")
+    report_parser.add_argument("report", choices=["history", "allocation", "risk"],
+                               help="history : valeur par jour ; allocation : répartition par symbole ; "
+                                    "risk : volatilité, drawdowns et risque du portefeuille")
+    report_parser.add_argument("--start", type=date.fromisoformat, help="premier jour de l'historique")
+    report_parser.add_argument("--end", type=date.fromisoformat, help="dernier jour de l'historique")
+    report_parser.add_argument("--date", type=date.fromisoformat, help="jour de la répartition (dernier par défaut)")
+
+    for name in LIGHT_COLLECTORS:
+        light_parser = subparsers.add_parser(name, help=f"lancer le collecteur {name} seul (chemin léger)")
+        light_parser.add_argument("--full", action="store_true",
+                                  help="passer par le collecteur complet (pandas, destination portfolio_sink)")
+
+    args = parser.parse_args(argv)
+
+    # Charger les variables d'environnement depuis un fichier .env
+    load_dotenv()
+
+    if args.profile_imports:
+        from .light import print_profile, profile_imports
+        print_profile(profile_imports([args.command] if args.command in LIGHT_COLLECTORS else None))
+        return 0
+    if args.command is None:
+        parser.error("une commande est requise")
+
+    if args.command in LIGHT_COLLECTORS:
+        from .light import run, unsupported
+        reason = unsupported(args.command)
+        if args.full or reason:
+            if reason:
+                print(f"{args.command}: collecteur complet ({reason})")
+            rows = collectors.load(args.command).run()
+        else:
+            rows = run(args.command)
+        print(f"{args.command}: {rows} ligne(s) écrite(s)")
+        return 0
+
+    metrics_port = getattr(args, "metrics_port", None) or os.getenv("metrics_port")
+    if metrics_port and args.command in ("run", "intraday"):
+        from .metrics import serve
+        serve(int(metrics_port))
+
+    if args.command == "backfill":
+        from .backfill import run_backfill
+        from .collectors.prices import Liste
+        run_backfill(args.start, args.end, ids=args.ids or Liste, restart=args.restart)
+        return 0
+
+    if args.command == "intraday":
+        from .intraday import SOURCES, run_intraday, run_retention
+        unknown = set(args.sources) - set(SOURCES)
+        if unknown:
+            parser.error(f"source(s) inconnue(s) : {', '.join(sorted(unknown))}")
+        if args.retention:
+            run_retention()
+        else:
+            run_intraday(args.sources, args.interval, once=args.once)
+        return 0
+
+    if args.command == "stream":
+        from .streams import STREAMS, run_streams
+        unknown = set(args.platforms) - set(STREAMS)
+        if unknown:
+            parser.error(f"plateforme(s) inconnue(s) : {', '.join(sorted(unknown))}")
+        return run_streams(args.platforms, flush_interval=args.flush_interval)
+
+    if args.command == "report":
+        from .reports import portfolio_history, symbol_allocation
+        if args.report == "history":
+            print(portfolio_history(start=args.start, end=args.end).to_string())
+        elif args.report == "risk":
+            from .analytics import Analytics, current_weights
+            analytics = Analytics.load(start=args.start, end=args.end)
+            holdings = current_weights()
+            print(analytics.summary().dropna(how='all').sort_values('volatilite', ascending=False).to_string())
+            if holdings:
+                print(analytics.portfolio(holdings).to_string(index=False))
+                print(analytics.risk_contributions(holdings).to_string())
+        else:
+            print(symbol_allocation(day=args.date))
+        return 0
+
+    if args.command == "migrate":
+        from sqlalchemy import inspect
+
+        from .db import get_engine, migrate_unique_key
+        from .schema import NATURAL_KEYS
+        unknown = set(args.tables) - set(NATURAL_KEYS)
+        if unknown:
+            parser.error(f"table(s) inconnue(s) : {', '.join(sorted(unknown))}")
+        engine = get_engine()
+        for table in args.tables or NATURAL_KEYS:
+            if not inspect(engine).has_table(table):
+                continue
+            counts = migrate_unique_key(engine, table, NATURAL_KEYS[table])
+            if counts is None:
+                print(f"{table}: index unique déjà présent")
+            else:
+                print(f"{table}: index unique créé, {counts[0]} → {counts[1]} lignes")
+        return 0
+
+    if args.command == "pnl":
+        from .pnl import run_pnl
+        run_pnl(restart=args.restart)
+        return 0
+
+    if args.command == "valuation":
+        from .valuation import run_valuation
+        run_valuation()
+        return 0
+
+    unknown = set(args.collectors) - set(collectors.COLLECTORS)
+    if unknown:
+        parser.error(f"collecteur(s) inconnu(s) : {', '.join(sorted(unknown))}")
+
+    from .metrics import write_report
+    from .orchestrator import print_summary, run_all
+    start = time.perf_counter()
+    results = run_all(args.collectors, max_workers=args.workers, valuation=not args.no_valuation)
+    elapsed = time.perf_counter() - start
+    print_summary(results, elapsed)
+    print(f"Bilan détaillé : {write_report(results, elapsed)}")
+    return 0 if all(result['status'] in ("OK", "IGNORÉ") for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,390 @@
+"""
+Indicateurs de risque et de performance sur l'historique de ``crypto_price``.
+
+L'historique est chargé une seule fois dans une matrice NumPy dense date ×
+actif (``PriceMatrix``) : les symboles sont codés en entiers (``pd.Categorical``)
+et les prix stockés en float32, dont les 7 chiffres significatifs suffisent à
+des rendements journaliers. Les sommes (variances, covariances) sont
+accumulées en float64.
+
+``Analytics`` calcule sur la matrice entière, en opérations vectorisées :
+
+- rendements logarithmiques et volatilité glissante (sur
+  ``analytics_volatility_window`` jours, 30 par défaut, annualisée sur
+  ``analytics_annualisation`` jours, 365 par défaut) ;
+- matrices de covariance et de corrélation, sur les jours où les deux actifs
+  ont un prix (produits matriciels des rendements et de leurs masques) ;
+- drawdowns et drawdown maximal ;
+- indicateurs d'un ou plusieurs portefeuilles (une ligne de poids par
+  portefeuille), dont celui des positions courantes (``current_weights``).
+
+L'état de chaque indicateur (sommes glissantes, moments croisés, plus hauts
+historiques) est tenu à jour : ``append`` ajoute un jour en O(actifs²) au lieu
+de tout recalculer, et ``update`` ajoute les jours écrits depuis le chargement.
+Un jour déjà chargé puis réécrit n'est repris que par un nouveau chargement.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from .sinks import get_sink
+
+TABLE = "crypto_price"
+
+DEFAULT_ANNUALISATION = 365
+DEFAULT_VOLATILITY_WINDOW = 30
+DEFAULT_MIN_PERIODS = 20
+
+# --------------------------------------------------------------------------------
+
+# MATRICE DATE × ACTIF
+
+
+class PriceMatrix:
+    """
+    Prix en matrice dense ``values[jour, actif]`` (NaN si pas de prix), avec des
+    lignes réservées d'avance pour que l'ajout d'un jour ne recopie rien.
+    """
+
+    def __init__(self, dates, symbols, values, capacity=None):
+        n = len(dates)
+        capacity = max(capacity or 0, n + 1)
+        self.symbols = pd.Index(symbols)
+        self.codes = {symbol: code for code, symbol in enumerate(self.symbols)}
+        self._dates = np.empty(capacity, dtype='datetime64[D]')
+        self._dates[:n] = dates
+        self._values = np.full((capacity, len(self.symbols)), np.nan, dtype=values.dtype)
+        self._values[:n] = values
+        self.n = n
+
+    @classmethod
+    def from_frame(cls, df, field='prix', dtype=np.float32):
+        """Matrice à partir de lignes ``date, symbol, <field>`` (la dernière ligne d'un doublon l'emporte)."""
+        df = df.dropna(subset=[field])
+        day_codes, dates = pd.factorize(pd.to_datetime(df['date']).to_numpy().astype('datetime64[D]'), sort=True)
+        symbols = pd.Categorical(df['symbol'])
+        values = np.full((len(dates), len(symbols.categories)), np.nan, dtype=dtype)
+        values[day_codes, symbols.codes] = df[field].to_numpy(dtype=dtype)
+        return cls(dates, symbols.categories, values)
+
+    @classmethod
+    def load(cls, sink=None, start=None, end=None, symbols=None, field='prix', dtype=np.float32):
+        """Lit ``crypto_price`` une seule fois, limitée aux colonnes, jours et symboles demandés."""
+        sink = sink or get_sink()
+        filters = {'symbol': list(symbols)} if symbols is not None else None
+        return cls.from_frame(sink.read(TABLE, ['date', 'symbol', field], start=start, end=end, filters=filters),
+                              field, dtype)
+
+    @property
+    def dates(self):
+        return self._dates[:self.n]
+
+    @property
+    def values(self):
+        return self._values[:self.n]
+
+    def add_symbols(self, symbols):
+        """Ajoute des colonnes (vides) pour les symboles inconnus ; renvoie leur nombre."""
+        new = [symbol for symbol in dict.fromkeys(symbols) if symbol not in self.codes]
+        if new:
+            self._values = np.hstack([self._values, np.full((len(self._values), len(new)), np.nan,
+                                                            dtype=self._values.dtype)])
+            self.symbols = self.symbols.append(pd.Index(new))
+            self.codes.update({symbol: len(self.codes) + i for i, symbol in enumerate(new)})
+        return len(new)
+
+    def append(self, day, prices):
+        """Ajoute le jour ``day`` (postérieur au dernier) avec ``prices`` : {symbole: prix} ou Series."""
+        day = np.datetime64(pd.Timestamp(day).date(), 'D')
+        if self.n and day <= self._dates[self.n - 1]:
+            raise ValueError(f"{day} n'est pas postérieur au dernier jour chargé ({self._dates[self.n - 1]})")
+        prices = pd.Series(prices, dtype=float).dropna()
+        self.add_symbols(prices.index)
+        if self.n == len(self._values):
+            # Capacité doublée : l'ajout reste en O(actifs) amorti
+            self._values = np.vstack([self._values, np.full_like(self._values, np.nan)])
+            self._dates = np.concatenate([self._dates, np.empty(len(self._dates), dtype='datetime64[D]')])
+        self._dates[self.n] = day
+        self._values[self.n] = np.nan
+        self._values[self.n, [self.codes[symbol] for symbol in prices.index]] = prices.to_numpy()
+        self.n += 1
+
+    def to_frame(self, array=None):
+        """DataFrame date × symbole d'une matrice alignée sur les jours (les prix par défaut)."""
+        array = self.values if array is None else array
+        return pd.DataFrame(array, index=pd.DatetimeIndex(self.dates[-len(array):], name='date'),
+                            columns=self.symbols[:array.shape[1]])
+
+# --------------------------------------------------------------------------------
+
+# CALCULS VECTORISÉS
+
+
+def log_returns(values):
+    """Rendements logarithmiques jour à jour (NaN si l'un des deux prix manque ou est nul)."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = np.diff(np.log(values), axis=0)
+    returns[np.isinf(returns)] = np.nan
+    return returns
+
+
+def window_sums(array, window):
+    """Sommes glissantes sur ``window`` lignes (une ligne par fenêtre complète), en float64."""
+    cumulative = np.cumsum(array, axis=0, dtype=np.float64)
+    cumulative[window:] -= cumulative[:-window]
+    return cumulative[window - 1:]
+
+
+def rolling_volatility(returns, window, min_periods=None, annualisation=DEFAULT_ANNUALISATION):
+    """Écart-type glissant des rendements sur ``window`` jours, annualisé, par sommes cumulées."""
+    min_periods = min_periods or window
+    mask = ~np.isnan(returns)
+    x = np.where(mask, returns, 0.0).astype(np.float64)
+    count, s1, s2 = window_sums(mask, window), window_sums(x, window), window_sums(x * x, window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        variance = (s2 - s1 * s1 / count) / (count - 1)
+    volatility = np.sqrt(np.maximum(variance, 0.0) * annualisation)
+    volatility[count < max(min_periods, 2)] = np.nan
+    # Les ``window - 1`` premiers jours n'ont pas de fenêtre complète
+    head = np.full((min(window - 1, len(returns)), returns.shape[1]), np.nan)
+    return np.vstack([head, volatility]).astype(returns.dtype)
+
+
+def cross_moments(returns):
+    """
+    Moments croisés sur les jours où les deux actifs ont un rendement :
+    effectif ``n``, sommes ``sx`` (de l'actif en ligne), ``sxx`` et ``sxy``.
+    """
+    mask = np.isfinite(returns).astype(np.float64)
+    x = np.where(mask > 0, returns, 0.0).astype(np.float64)
+    return {"n": mask.T @ mask, "sx": x.T @ mask, "sxx": (x * x).T @ mask, "sxy": x.T @ x}
+
+
+def add_moments(moments, row, sign=1.0):
+    """Ajoute (ou retire, ``sign=-1``) un jour de rendements aux moments croisés : mise à jour de rang 1."""
+    mask = np.isfinite(row).astype(np.float64)
+    x = np.where(mask > 0, row, 0.0).astype(np.float64)
+    moments["n"] += sign * np.outer(mask, mask)
+    moments["sx"] += sign * np.outer(x, mask)
+    moments["sxx"] += sign * np.outer(x * x, mask)
+    moments["sxy"] += sign * np.outer(x, x)
+
+
+def covariance_from_moments(moments, min_periods=DEFAULT_MIN_PERIODS):
+    n, sx = moments["n"], moments["sx"]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cov = (moments["sxy"] - sx * sx.T / n) / (n - 1)
+    cov[n < max(min_periods, 2)] = np.nan
+    return cov
+
+
+def correlation_from_moments(moments, min_periods=DEFAULT_MIN_PERIODS):
+    n, sx, sxx = moments["n"], moments["sx"], moments["sxx"]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Variances de chaque actif sur les seuls jours communs à la paire
+        var_row = sxx - sx * sx / n
+        corr = (moments["sxy"] - sx * sx.T / n) / np.sqrt(var_row * var_row.T)
+    corr[n < max(min_periods, 2)] = np.nan
+    return np.clip(corr, -1.0, 1.0)
+
+
+def drawdowns(values):
+    """Baisse depuis le plus haut historique de chaque actif (0 au plus haut, -0.4 pour -40 %)."""
+    peaks = np.fmax.accumulate(values, axis=0)
+    with np.errstate(invalid='ignore'):
+        return values / peaks - 1.0
+
+# --------------------------------------------------------------------------------
+
+# INDICATEURS TENUS À JOUR
+
+
+class Analytics:
+    """
+    Indicateurs d'une ``PriceMatrix``, mis à jour jour par jour.
+
+    ``corr_window`` limite covariance et corrélation aux derniers jours (tout
+    l'historique par défaut).
+    """
+
+    def __init__(self, matrix, volatility_window=None, corr_window=None, min_periods=None, annualisation=None):
+        self.matrix = matrix
+        self.volatility_window = volatility_window or int(os.getenv("analytics_volatility_window",
+                                                                    DEFAULT_VOLATILITY_WINDOW))
+        self.corr_window = corr_window
+        self.min_periods = min_periods or DEFAULT_MIN_PERIODS
+        self.annualisation = annualisation or float(os.getenv("analytics_annualisation", DEFAULT_ANNUALISATION))
+        self.rebuild()
+
+    @classmethod
+    def load(cls, sink=None, start=None, end=None, symbols=None, **kwargs):
+        return cls(PriceMatrix.load(sink, start, end, symbols), **kwargs)
+
+    def rebuild(self):
+        """Recalcule tout l'état à partir de la matrice."""
+        values = self.matrix.values
+        self.returns = log_returns(values)
+        window = self.recent(self.returns, self.volatility_window)
+        mask = np.isfinite(window)
+        x = np.where(mask, window, 0.0).astype(np.float64)
+        self.vol_sums = [mask.sum(axis=0).astype(np.float64), x.sum(axis=0), (x * x).sum(axis=0)]
+        self.moments = cross_moments(self.recent(self.returns, self.corr_window))
+        self.peaks = np.fmax.reduce(values, axis=0) if len(values) else np.full(values.shape[1], np.nan)
+        self.max_drawdowns = np.fmin.reduce(drawdowns(values), axis=0) if len(values) else self.peaks.copy()
+
+    @staticmethod
+    def recent(array, window):
+        return array if window is None else array[-window:]
+
+    def grow(self, count):
+        """Élargit l'état aux ``count`` nouveaux actifs de la matrice (sans historique)."""
+        self.returns = np.hstack([self.returns, np.full((len(self.returns), count), np.nan, dtype=self.returns.dtype)])
+        self.vol_sums = [np.concatenate([total, np.zeros(count)]) for total in self.vol_sums]
+        self.moments = {name: np.pad(moment, ((0, count), (0, count))) for name, moment in self.moments.items()}
+        self.peaks = np.concatenate([self.peaks, np.full(count, np.nan, dtype=self.peaks.dtype)])
+        self.max_drawdowns = np.concatenate([self.max_drawdowns,
+                                             np.full(count, np.nan, dtype=self.max_drawdowns.dtype)])
+
+    def append(self, day, prices):
+        """Ajoute un jour de prix et met à jour chaque indicateur sans repartir de zéro."""
+        before = len(self.matrix.symbols)
+        self.matrix.append(day, prices)
+        if len(self.matrix.symbols) > before:
+            self.grow(len(self.matrix.symbols) - before)
+        values = self.matrix.values
+        row = values[-1]
+        if len(values) > 1:
+            new = log_returns(values[-2:])
+            self.returns = np.vstack([self.returns, new])
+            self.shift_volatility(new[0])
+            add_moments(self.moments, new[0])
+            if self.corr_window is not None and len(self.returns) > self.corr_window:
+                add_moments(self.moments, self.returns[-self.corr_window - 1], sign=-1.0)
+        self.peaks = np.fmax(self.peaks, row)
+        with np.errstate(invalid='ignore'):
+            self.max_drawdowns = np.fmin(self.max_drawdowns, row / self.peaks - 1.0)
+
+    def shift_volatility(self, new):
+        """Fait glisser la fenêtre de volatilité d'un jour : ajout du nouveau rendement, retrait du plus ancien."""
+        count, s1, s2 = self.vol_sums
+        for row, sign in [(new, 1.0)] + ([(self.returns[-self.volatility_window - 1], -1.0)]
+                                         if len(self.returns) > self.volatility_window else []):
+            mask = np.isfinite(row)
+            x = np.where(mask, row, 0.0).astype(np.float64)
+            count += sign * mask
+            s1 += sign * x
+            s2 += sign * x * x
+
+    def update(self, sink=None):
+        """Ajoute les jours de ``crypto_price`` postérieurs au dernier chargé ; renvoie leur nombre."""
+        sink = sink or get_sink()
+        last = pd.Timestamp(self.matrix.dates[-1]).date() if self.matrix.n else None
+        df = sink.read(TABLE, ['date', 'symbol', 'prix'], start=last)
+        df = df.dropna(subset=['prix'])
+        if last is not None:
+            df = df[pd.to_datetime(df['date']).dt.date > last]
+        for day, group in df.groupby('date', sort=True):
+            self.append(day, group.drop_duplicates('symbol', keep='last').set_index('symbol')['prix'])
+        return df['date'].nunique()
+
+    # --------------------------------------------------------------------------------
+
+    # LECTURE DES INDICATEURS
+
+    def volatility(self):
+        """Volatilité annualisée de chaque actif sur la fenêtre courante."""
+        count, s1, s2 = self.vol_sums
+        with np.errstate(divide='ignore', invalid='ignore'):
+            variance = (s2 - s1 * s1 / count) / (count - 1)
+        volatility = np.sqrt(np.maximum(variance, 0.0) * self.annualisation)
+        volatility[count < 2] = np.nan
+        return pd.Series(volatility, index=self.matrix.symbols, name='volatilite')
+
+    def rolling_volatility(self, window=None):
+        """Historique de la volatilité glissante : DataFrame date × symbole."""
+        window = window or self.volatility_window
+        return self.matrix.to_frame(rolling_volatility(self.returns, window, annualisation=self.annualisation))
+
+    def covariance(self):
+        cov = covariance_from_moments(self.moments, self.min_periods)
+        return pd.DataFrame(cov, index=self.matrix.symbols, columns=self.matrix.symbols)
+
+    def correlation(self):
+        corr = correlation_from_moments(self.moments, self.min_periods)
+        return pd.DataFrame(corr, index=self.matrix.symbols, columns=self.matrix.symbols)
+
+    def drawdowns(self):
+        """Historique des drawdowns : DataFrame date × symbole."""
+        return self.matrix.to_frame(drawdowns(self.matrix.values))
+
+    def summary(self):
+        """Un indicateur par colonne et un actif par ligne."""
+        values = self.matrix.values
+        with np.errstate(invalid='ignore'):
+            current = values[-1] / self.peaks - 1.0 if len(values) else np.full(len(self.peaks), np.nan)
+        return pd.DataFrame({
+            'volatilite': self.volatility().to_numpy(),
+            'drawdown': current,
+            'drawdown_max': self.max_drawdowns,
+        }, index=self.matrix.symbols)
+
+    # --------------------------------------------------------------------------------
+
+    # PORTEFEUILLES
+
+    def weights(self, holdings):
+        """Poids alignés sur les colonnes de la matrice : une ligne par portefeuille ({symbole: valeur})."""
+        frame = pd.DataFrame([holdings] if isinstance(holdings, (dict, pd.Series)) else list(holdings))
+        frame = frame.reindex(columns=self.matrix.symbols).fillna(0.0).to_numpy(dtype=np.float64)
+        totals = frame.sum(axis=1, keepdims=True)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(totals > 0, frame / totals, 0.0)
+
+    def portfolio(self, holdings):
+        """
+        Indicateurs de chaque portefeuille (``holdings`` : {symbole: valeur} ou liste),
+        calculés en une passe pour tous les portefeuilles :
+
+        - ``volatilite`` : ex ante, par la matrice de covariance ;
+        - ``rendement_annuel``, ``volatilite_realisee``, ``sharpe`` (taux sans risque nul),
+          ``drawdown_max`` et ``var_95`` (VaR historique journalière) : sur l'historique
+          des rendements pondérés, un actif sans prix un jour donné comptant pour 0.
+        """
+        weights = self.weights(holdings)
+        cov = np.nan_to_num(covariance_from_moments(self.moments, self.min_periods))
+        volatility = np.sqrt(np.maximum(np.einsum('ki,ij,kj->k', weights, cov, weights), 0.0) * self.annualisation)
+
+        daily = np.nan_to_num(np.expm1(self.returns.astype(np.float64))) @ weights.T
+        value = np.cumprod(1.0 + daily, axis=0)
+        peaks = np.maximum.accumulate(value, axis=0)
+        mean, std = daily.mean(axis=0), daily.std(axis=0, ddof=1) if len(daily) > 1 else np.full(len(weights), np.nan)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            result = pd.DataFrame({
+                'volatilite': volatility,
+                'rendement_annuel': mean * self.annualisation,
+                'volatilite_realisee': std * np.sqrt(self.annualisation),
+                'sharpe': mean / std * np.sqrt(self.annualisation),
+                'drawdown_max': (value / peaks - 1.0).min(axis=0) if len(daily) else np.nan,
+                'var_95': -np.quantile(daily, 0.05, axis=0) if len(daily) else np.nan,
+            })
+        return result
+
+    def risk_contributions(self, holdings):
+        """Part de chaque actif dans la variance du portefeuille (somme égale à 1)."""
+        weights = self.weights(holdings)[0]
+        cov = np.nan_to_num(covariance_from_moments(self.moments, self.min_periods))
+        marginal = cov @ weights
+        with np.errstate(divide='ignore', invalid='ignore'):
+            contributions = weights * marginal / (weights @ marginal)
+        df = pd.DataFrame({'poids': weights, 'contribution_risque': contributions}, index=self.matrix.symbols)
+        return df[df['poids'] > 0].sort_values('contribution_risque', ascending=False)
+
+
+def current_weights(sink=None):
+    """Valeur de chaque symbole du portefeuille à la dernière date valorisée : {symbole: valeur}."""
+    from .queries import get_allocation
+    allocation = get_allocation(sink=sink)
+    if allocation is None:
+        return {}
+    return dict(zip(allocation['symbol'], allocation['valeur']))
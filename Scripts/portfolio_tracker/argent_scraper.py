@@ -0,0 +1,99 @@
+"""
+Lecture des portefeuilles Starknet sur le portfolio Argent avec Selenium.
+
+Solution de repli quand le RPC n'est pas utilisable : un seul Chrome est lancé
+pour toutes les adresses, les images et polices sont bloquées, et la page est
+lue dès que les conteneurs de jetons sont présents (attente explicite).
+"""
+import time
+
+import pandas as pd
+from selenium import webdriver
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+from webdriver_manager.chrome import ChromeDriverManager
+
+from .metrics import stage
+
+PORTFOLIO_URL = "https://portfolio.argent.xyz/overview/{address}"
+
+# Classes CSS du conteneur d'un jeton et de son montant sur la page Argent
+TOKEN_CLASS = "css-x01ui3"
+AMOUNT_CLASS = "css-1ac2ftb"
+
+# Ressources inutiles à la lecture des soldes
+BLOCKED_URLS = ["*.png", "*.jpg", "*.jpeg", "*.gif", "*.svg", "*.webp", "*.woff", "*.woff2", "*.ttf", "*.otf"]
+
+# Extraction de tous les jetons en un seul aller-retour avec le navigateur
+EXTRACT_SCRIPT = f"""
+return Array.from(document.getElementsByClassName('{TOKEN_CLASS}')).map(function (token) {{
+    var amount = token.getElementsByClassName('{AMOUNT_CLASS}')[0];
+    var paragraphs = token.getElementsByTagName('p');
+    return [amount ? amount.innerText : null, paragraphs.length > 1 ? paragraphs[1].innerText : null];
+}});
+"""
+
+
+class ArgentScraper:
+    """Navigateur partagé pour lire plusieurs adresses : ``with ArgentScraper() as scraper``."""
+
+    def __init__(self, timeout=15):
+        self.timeout = timeout
+        self.driver = None
+
+    def __enter__(self):
+        # Configurer le driver Selenium pour une exécution sans interface graphique, sans images
+        options = webdriver.ChromeOptions()
+        options.add_argument('--headless')
+        options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+        self.driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
+
+        # Bloquer les images et les polices au niveau réseau
+        self.driver.execute_cdp_cmd("Network.enable", {})
+        self.driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URLS})
+        return self
+
+    def __exit__(self, *exc):
+        # Fermer le driver Selenium
+        self.driver.quit()
+
+    def scrape(self, address):
+        """Renvoie le DataFrame ``symbol, montant, adresse`` d'une adresse."""
+        start = time.perf_counter()
+
+        with stage("page_load"):
+            # Charger la page cible pour le portefeuille
+            self.driver.get(PORTFOLIO_URL.format(address=address))
+
+            # Attendre l'apparition des conteneurs de jetons
+            try:
+                WebDriverWait(self.driver, self.timeout).until(
+                    EC.presence_of_all_elements_located((By.CLASS_NAME, TOKEN_CLASS))
+                )
+            except TimeoutException:
+                print(f"{address}: aucun jeton affiché après {self.timeout}s")
+
+        # Extraire le montant et le symbole de chaque jeton
+        tokens = [(amount, symbol) for amount, symbol in self.driver.execute_script(EXTRACT_SCRIPT)
+                  if amount is not None and symbol is not None]
+
+        # Créer un DataFrame à partir des données extraites
+        df = pd.DataFrame(tokens, columns=['montant', 'symbol'])
+
+        # Supprimer les séparateurs de milliers et convertir les montants en float
+        df['montant'] = df['montant'].str.replace(',', '').astype(float)
+
+        # Ajouter une colonne avec l'adresse du portefeuille
+        df['adresse'] = address
+
+        print(f"{address}: {len(df)} jetons en {time.perf_counter() - start:.1f}s")
+        return df.reindex(['symbol', 'montant', 'adresse'], axis=1)
+
+
+def scrape_all(addresses, timeout=15):
+    """Lit toutes les adresses avec un seul navigateur."""
+    with ArgentScraper(timeout) as scraper:
+        return [scraper.scrape(address) for address in addresses]
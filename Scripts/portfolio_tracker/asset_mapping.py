@@ -0,0 +1,215 @@
+"""
+Index canonique des actifs : (source, symbole brut ou contrat) → id CoinGecko.
+
+Chaque source nomme ses actifs à sa façon (LDBTC sur Binance, xSTRK ou une
+adresse de contrat sur Starknet, USDC.e sur EVM) et un ticker CoinGecko n'est
+pas unique. L'index résout tout cela par une simple recherche dans un
+dictionnaire :
+
+- chaque id suivi (``Liste``) reçoit un symbole canonique
+  unique, celui écrit dans ``crypto_price`` ;
+- les alias de ``asset_mapping.json`` et les variantes préfixées (LD + symbole
+  pour Binance) sont calculés une fois pour toutes à la construction ;
+- les tickers cotés par chaque échange (section ``tickers``) forment une table
+  à part, sans repli : un ticker d'échange n'est pas forcément celui de CoinGecko ;
+- l'index est enregistré dans le cache local et chargé une seule fois par processus.
+
+Un symbole inconnu de l'index retombe sur la règle historique de sa source
+(suppression du préfixe LD, des minuscules pour Starknet), évaluée une seule
+fois par symbole distinct.
+"""
+import json
+import threading
+import time
+from pathlib import Path
+
+from .config import cache_path
+
+MAPPING_FILE = Path(__file__).resolve().parent / "asset_mapping.json"
+INDEX_NAME = "asset_index.json"
+
+# Source de résolution selon la colonne 'plateforme' des tables de soldes (les autres sont des chaînes EVM)
+PLATFORM_SOURCES = {"Binance": "binance", "MEXC": "mexc", "starknet": "starknet"}
+
+ANY = "*"
+
+# --------------------------------------------------------------------------------
+
+# LISTE DES CRYPTOS DONT ON SOUHAITE RÉCUPÉRER LE PRIX (IDS COINGECKO SUIVIS)
+
+Liste = [
+    "cardano", "aixbt", "aixcb-by-virtuals", "ankr", "arbitrum", "binancecoin",
+    "bitcoin", "elrond-erd-2", "ethereum", "fetch-ai", "injective-protocol",
+    "io", "chainlink", "memes-ai", "mantle", "near", "ondo-finance", "optimism",
+    "reserve-rights-token", "solana", "starknet", "bittensor", "usd-coin",
+    "tether", "virtual-protocol", "wrapped-bitcoin", "weth", "woo-network",
+    "wrapped-steth", "pippin", "susd-optimism", "venice-token", "havven"
+]
+
+
+def source_for_platform(plateforme):
+    return PLATFORM_SOURCES.get(plateforme, "evm")
+
+
+def fallback_symbol(source, raw):
+    """Règles historiques de normalisation, pour les symboles absents de l'index."""
+    if source == "binance" and raw.startswith("LD"):
+        return raw[2:]
+    if source == "starknet" and not raw.startswith("0x"):
+        return "".join(char for char in raw if not char.islower())
+    return raw
+
+
+class AssetIndex:
+    """Tables de correspondance en mémoire ; toutes les recherches sont en O(1)."""
+
+    def __init__(self, ids, symbols, tracked=(), tickers=None):
+        self.ids = ids
+        self.symbols = symbols
+        self.tracked = list(tracked)
+        self.tickers = tickers or {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def build(cls, coin_symbols, mapping=None, tracked=None):
+        """
+        Construit l'index à partir des ids suivis et de leur symbole CoinGecko
+        (``coin_symbols`` : dictionnaire id → symbole, dans l'ordre de priorité).
+        ``tracked`` liste les ids demandés, y compris ceux inconnus de CoinGecko.
+        """
+        mapping = mapping or {}
+        ids, symbols = {}, {}
+        for coin_id, symbol in coin_symbols.items():
+            symbol = symbol.upper()
+            owner = ids.get((ANY, symbol))
+            if owner is not None:
+                # Ticker partagé : le premier id garde le symbole, les suivants sont qualifiés par leur id
+                print(f"Symbole {symbol} partagé par {owner} et {coin_id}, {coin_id} enregistré comme {symbol}:{coin_id}")
+                symbol = f"{symbol}:{coin_id}"
+            symbols[coin_id] = symbol
+            ids[(ANY, symbol)] = coin_id
+        for source, prefixes in mapping.get("prefixes", {}).items():
+            for prefix in prefixes:
+                for coin_id, symbol in symbols.items():
+                    ids[(source, prefix + symbol)] = coin_id
+        for source, aliases in mapping.get("aliases", {}).items():
+            for raw, coin_id in aliases.items():
+                if coin_id in symbols:
+                    ids[(source, raw.lower() if raw.startswith("0x") else raw)] = coin_id
+        tickers = {(exchange, ticker): coin_id for exchange, listed in mapping.get("tickers", {}).items()
+                   for ticker, coin_id in listed.items() if coin_id in symbols}
+        return cls(ids, symbols, tracked or coin_symbols, tickers)
+
+    # --------------------------------------------------------------------------------
+
+    # RÉSOLUTION
+
+    def resolve(self, source, raw):
+        """Id CoinGecko d'un actif, ou None s'il n'est pas suivi."""
+        if raw is None:
+            return None
+        key = raw.lower() if raw.startswith("0x") else raw
+        coin_id = self.ids.get((source, key)) or self.ids.get((ANY, key))
+        if coin_id is None and (source, key) not in self.ids:
+            coin_id = self.ids.get((ANY, fallback_symbol(source, key)))
+            # Mémoriser le résultat (même négatif) pour ne plus recalculer la règle
+            with self._lock:
+                self.ids[(source, key)] = coin_id
+        return coin_id
+
+    def canonical_symbol(self, source, raw):
+        """Symbole canonique (celui de ``crypto_price``) ; règle historique si l'actif n'est pas suivi."""
+        coin_id = self.resolve(source, raw)
+        if coin_id is not None:
+            return self.symbols[coin_id]
+        return None if raw is None else fallback_symbol(source, raw)
+
+    def resolve_series(self, source, raws):
+        """Version vectorisée de ``resolve`` : une recherche par valeur distincte."""
+        # Import à la demande : les chemins légers (``light``) n'utilisent que ``resolve``
+        import pandas as pd
+        raws = pd.Series(raws)
+        lookup = {raw: self.resolve(source, raw) for raw in raws.dropna().unique()}
+        return raws.map(lookup)
+
+    def canonical_series(self, source, raws):
+        import pandas as pd
+        raws = pd.Series(raws)
+        lookup = {raw: self.canonical_symbol(source, raw) for raw in raws.dropna().unique()}
+        return raws.map(lookup)
+
+    def ticker_series(self, exchange, tickers):
+        """Ids CoinGecko des tickers déclarés pour ``exchange`` ; None pour tous les autres."""
+        import pandas as pd
+        tickers = pd.Series(tickers)
+        return tickers.map({ticker: self.tickers.get((exchange, ticker)) for ticker in tickers.dropna().unique()})
+
+    # --------------------------------------------------------------------------------
+
+    # PERSISTANCE
+
+    def save(self, path):
+        data = {
+            "built_at": time.time(),
+            "tracked": self.tracked,
+            "symbols": self.symbols,
+            "ids": {f"{source}|{raw}": coin_id for (source, raw), coin_id in self.ids.items() if coin_id},
+            "tickers": {f"{exchange}|{ticker}": coin_id for (exchange, ticker), coin_id in self.tickers.items()},
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        ids = {tuple(key.split("|", 1)): coin_id for key, coin_id in data["ids"].items()}
+        tickers = {tuple(key.split("|", 1)): coin_id for key, coin_id in data.get("tickers", {}).items()}
+        return cls(ids, data["symbols"], data["tracked"], tickers)
+
+
+# --------------------------------------------------------------------------------
+
+# INDEX PARTAGÉ PAR LE PROCESSUS
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def build_index(tracked_ids, session=None, limiter=None):
+    """Construit l'index des ids suivis à partir du cache de la liste CoinGecko."""
+    import requests
+
+    from .coin_list import load_coin_symbols
+    df_symbol = load_coin_symbols(tracked_ids, session or requests.Session(), limiter)
+    known = dict(zip(df_symbol['id'], df_symbol['symbol']))
+    coin_symbols = {coin_id: known[coin_id] for coin_id in tracked_ids if coin_id in known}
+    with open(MAPPING_FILE, encoding="utf-8") as f:
+        mapping = json.load(f)
+    return AssetIndex.build(coin_symbols, mapping, tracked_ids)
+
+
+def get_index(tracked_ids=None, session=None, limiter=None):
+    """
+    Index chargé une seule fois par processus depuis le cache local.
+
+    Il est reconstruit si le fichier manque, si la liste des ids suivis a
+    changé ou si ``asset_mapping.json`` est plus récent que lui.
+    """
+    global _index
+    if tracked_ids is None:
+        tracked_ids = Liste
+    with _index_lock:
+        if _index is not None and set(_index.tracked) >= set(tracked_ids):
+            return _index
+        path = cache_path(INDEX_NAME)
+        index = None
+        if path.exists() and path.stat().st_mtime >= MAPPING_FILE.stat().st_mtime:
+            index = AssetIndex.load(path)
+            if not set(index.tracked) >= set(tracked_ids):
+                index = None
+        if index is None:
+            index = build_index(list(tracked_ids), session, limiter)
+            index.save(path)
+        _index = index
+        return _index
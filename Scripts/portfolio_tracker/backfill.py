@@ -0,0 +1,175 @@
+"""
+Rattrapage de l'historique de ``crypto_price``.
+
+1. Les couples (date, symbole) absents de la table sont détectés sur la période demandée.
+2. Les jours manquants de chaque crypto sont regroupés en fenêtres d'au plus
+   ``max_days`` jours, pour couvrir les trous avec le moins d'appels
+   ``market_chart/range`` possible.
+3. Les résultats sont écrits par paquets au fil de l'eau, et chaque fenêtre
+   enregistrée est notée dans un point de reprise local : un rattrapage
+   interrompu reprend là où il s'est arrêté.
+"""
+import os
+from datetime import date, datetime, time, timedelta, timezone
+
+import pandas as pd
+import requests
+
+from .checkpoint import Checkpoint
+from .asset_mapping import get_index
+from .coingecko import fetch_market_chart_range, get_limiter
+from .collectors.prices import Liste, create_df
+from .fetch import fetch_all
+from .schema import is_spot
+from .sinks import get_sink
+
+TABLE = "crypto_price"
+
+# Plage maximale couverte par un appel (l'offre Demo limite l'historique à 365 jours)
+DEFAULT_MAX_DAYS = 365
+
+# Nombre de lignes accumulées avant chaque écriture en base
+DEFAULT_FLUSH_ROWS = 5000
+
+CHECKPOINT_NAME = "backfill_checkpoint.json"
+
+# --------------------------------------------------------------------------------
+
+# DÉTECTION DES TROUS
+
+
+def existing_dates(sink, symbols, start, end):
+    """Dates dont ``crypto_price`` a déjà le prix d'ouverture, pour chaque symbole (un cours provisoire est à remplacer)."""
+    if not symbols:
+        return {}
+    df = sink.read(TABLE, ['symbol', 'date', 'source'], start=start, end=end, filters={'symbol': symbols})
+    df = df[~df['source'].map(is_spot)]
+    return df.groupby('symbol')['date'].agg(set).to_dict()
+
+
+def missing_ranges(existing, start, end):
+    """Plages contiguës ``(premier, dernier)`` de jours absents de ``existing`` entre start et end."""
+    ranges = []
+    day = start
+    while day <= end:
+        if day not in existing:
+            if ranges and ranges[-1][1] == day - timedelta(days=1):
+                ranges[-1] = (ranges[-1][0], day)
+            else:
+                ranges.append((day, day))
+        day += timedelta(days=1)
+    return ranges
+
+
+def plan_spans(ranges, max_days):
+    """
+    Regroupe les plages manquantes en fenêtres d'au plus ``max_days`` jours.
+
+    Deux plages proches sont couvertes par un seul appel, même si quelques jours
+    déjà connus les séparent : ces jours-là sont simplement ignorés à l'écriture.
+    """
+    spans = []
+    for first, last in ranges:
+        if spans and (last - spans[-1][0]).days < max_days:
+            spans[-1] = (spans[-1][0], last)
+            continue
+        while (last - first).days >= max_days:
+            spans.append((first, first + timedelta(days=max_days - 1)))
+            first += timedelta(days=max_days)
+        spans.append((first, last))
+    return spans
+
+
+def span_key(crypto, first, last):
+    return f"{crypto}|{first.isoformat()}|{last.isoformat()}"
+
+
+def parse_span_key(key):
+    crypto, first, last = key.split("|")
+    return crypto, date.fromisoformat(first), date.fromisoformat(last)
+
+# --------------------------------------------------------------------------------
+
+# TRANSFORMATION DES DONNÉES
+
+
+def to_daily(data, crypto, symbol, wanted):
+    """Premier point de chaque jour (prix d'ouverture), limité aux jours manquants."""
+    df = create_df(data, crypto)
+    df['date'] = df['date'].dt.date
+    df = df.sort_values('timestamp').drop_duplicates(subset=['date'], keep='first')
+    df = df[df['date'].isin(wanted)]
+    df['symbol'] = symbol
+    df = df.rename(columns={'price': 'prix'})
+    return df.reindex(['date', 'symbol', 'prix', 'market_cap', 'total_volume'], axis=1).assign(source='coingecko')
+
+# --------------------------------------------------------------------------------
+
+# RATTRAPAGE
+
+
+def run_backfill(start, end=None, ids=Liste, sink=None, restart=False, max_days=None, flush_rows=None):
+    """Comble les trous de ``crypto_price`` entre ``start`` et ``end`` (la veille par défaut)."""
+    end = end or date.today() - timedelta(days=1)
+    max_days = max_days or int(os.getenv("backfill_max_days", DEFAULT_MAX_DAYS))
+    flush_rows = flush_rows or int(os.getenv("backfill_flush_rows", DEFAULT_FLUSH_ROWS))
+    sink = sink or get_sink()
+    limiter = get_limiter()
+    session = requests.Session()
+
+    checkpoint = Checkpoint(CHECKPOINT_NAME)
+    if restart:
+        checkpoint.reset()
+
+    # Symbole canonique de chaque crypto, tel qu'enregistré dans crypto_price
+    index = get_index(ids, session, limiter)
+    symbols = {crypto: index.symbols[crypto] for crypto in ids if crypto in index.symbols}
+    for crypto in set(ids) - set(symbols):
+        print(f"{crypto}: id inconnu de CoinGecko, ignoré")
+
+    # Détecter les jours manquants et planifier les appels
+    existing = existing_dates(sink, set(symbols.values()), start, end)
+    wanted, jobs, nb_missing = {}, [], 0
+    for crypto, symbol in symbols.items():
+        ranges = missing_ranges(existing.get(symbol, set()), start, end)
+        wanted[crypto] = {first + timedelta(days=i) for first, last in ranges for i in range((last - first).days + 1)}
+        nb_missing += len(wanted[crypto])
+        jobs += [key for key in (span_key(crypto, first, last) for first, last in plan_spans(ranges, max_days))
+                 if key not in checkpoint]
+    print(f"{nb_missing} jours manquants, {len(jobs)} appel(s) à effectuer")
+
+    buffer, buffered_keys = [], []
+    written = 0
+
+    # Écrire les lignes accumulées puis noter les fenêtres correspondantes comme terminées
+    def flush():
+        nonlocal written
+        if buffer:
+            written += sink.write(pd.concat(buffer, ignore_index=True), TABLE)
+        checkpoint.add(buffered_keys)
+        checkpoint.save()
+        buffer.clear()
+        buffered_keys.clear()
+
+    def fetch_span(key):
+        crypto, first, last = parse_span_key(key)
+        start_ts = datetime.combine(first, time.min, timezone.utc).timestamp()
+        end_ts = datetime.combine(last, time.max, timezone.utc).timestamp()
+        data = fetch_market_chart_range(session, crypto, start_ts, end_ts, limiter)
+        return to_daily(data, crypto, symbols[crypto], wanted[crypto])
+
+    def on_result(key, df):
+        if not df.empty:
+            buffer.append(df)
+        buffered_keys.append(key)
+        if sum(len(frame) for frame in buffer) >= flush_rows:
+            flush()
+
+    nb_threads = int(os.getenv("coingecko_threads", 4))
+    _, failed = fetch_all(jobs, fetch_span, max_workers=nb_threads, on_result=on_result)
+    flush()
+
+    for key, error in failed.items():
+        print(f"{key}: ABANDON ({error}), sera retenté au prochain lancement")
+    print(f"{written} lignes écrites dans {TABLE}")
+    return written
@@ -0,0 +1,57 @@
+"""
+Filtrage des soldes bruts des comptes d'échange, avant la création du DataFrame.
+
+Les API Binance et MEXC renvoient une entrée par actif du compte, y compris
+les soldes nuls. Seuls le symbole et le montant disponible (``free``) sont
+extraits de chaque entrée ; ``locked`` n'est jamais lu. Sont ignorés :
+
+- les soldes inférieurs ou égaux à ``dust_min_amount`` (en unités, 0 par défaut) ;
+- si ``dust_min_usd`` est défini, les soldes dont la valeur au dernier prix
+  connu de ``crypto_price`` est inférieure à ce seuil (un actif sans prix est conservé).
+"""
+import os
+
+from .asset_mapping import get_index
+
+
+def latest_prices(sink, symbols):
+    """Dernier prix connu de chaque symbole dans ``crypto_price``."""
+    if not symbols:
+        return {}
+    df = sink.read("crypto_price", ['date', 'symbol', 'prix'], filters={'symbol': symbols})
+    df = df.dropna(subset=['prix']).sort_values('date').drop_duplicates(subset=['symbol'], keep='last')
+    return dict(zip(df['symbol'], df['prix']))
+
+
+def filter_balances(balances, source, sink=None, min_amount=None, min_usd=None, price_lookup=None):
+    """
+    Renvoie les couples ``(symbole, montant)`` à conserver parmi les entrées
+    ``{"asset", "free", "locked"}`` de l'API, et affiche le nombre d'entrées ignorées.
+
+    ``price_lookup`` (symboles → {symbole: prix}) remplace la lecture de
+    ``crypto_price`` dans ``sink`` (chemins légers, sans pandas).
+    """
+    if min_amount is None:
+        min_amount = float(os.getenv("dust_min_amount", 0))
+    if min_usd is None and os.getenv("dust_min_usd"):
+        min_usd = float(os.getenv("dust_min_usd"))
+
+    rows = [(balance["asset"], float(balance["free"])) for balance in balances]
+    kept = [(symbol, montant) for symbol, montant in rows if montant > min_amount]
+
+    # Seuil en dollars : valeur au dernier prix connu du symbole canonique
+    if min_usd and kept:
+        index = get_index()
+        canonical = {symbol: index.canonical_symbol(source, symbol) for symbol, _ in kept}
+        if price_lookup is None:
+            from .sinks import get_sink
+            prices = latest_prices(sink or get_sink(), set(canonical.values()))
+        else:
+            prices = price_lookup(set(canonical.values()))
+        kept = [
+            (symbol, montant) for symbol, montant in kept
+            if prices.get(canonical[symbol]) is None or montant * prices[canonical[symbol]] >= min_usd
+        ]
+
+    print(f"{source}: {len(kept)} solde(s) conservé(s), {len(rows) - len(kept)} ignoré(s) (nuls ou poussière)")
+    return kept
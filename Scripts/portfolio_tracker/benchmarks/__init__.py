@@ -0,0 +1,18 @@
+"""
+Mesures de performance, à lancer depuis le dossier ``Scripts`` :
+
+    python -m portfolio_tracker.benchmarks.analytics [actifs] [jours]
+    python -m portfolio_tracker.benchmarks.classification
+    python -m portfolio_tracker.benchmarks.collectors [--scale]
+"""
+import time
+
+
+def best_of(func, repeat=5):
+    """Meilleur temps (en secondes) sur ``repeat`` exécutions de ``func``, et son dernier résultat."""
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
@@ -0,0 +1,106 @@
+"""
+Indicateurs de risque de ``analytics`` sur un historique synthétique de
+``crypto_price`` (marche aléatoire géométrique, cotations tardives et jours
+manquants), comparés aux calculs pandas équivalents :
+
+    python -m portfolio_tracker.benchmarks.analytics [actifs] [jours]
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from . import best_of
+from ..analytics import (Analytics, PriceMatrix, correlation_from_moments, covariance_from_moments,
+                         cross_moments, log_returns)
+
+
+def make_prices(assets, days, seed=0):
+    """Lignes ``date, symbol, prix`` comme dans ``crypto_price``."""
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0.0005, rng.uniform(0.01, 0.08, assets), (days, assets))
+    prices = 10 ** rng.uniform(-3, 4, assets) * np.exp(np.cumsum(returns, axis=0))
+    # Actifs cotés en cours de période et 2 % de jours sans prix
+    listed = np.arange(days)[:, None] >= rng.integers(0, days // 2, assets) * (rng.random(assets) < 0.3)
+    prices[~listed | (rng.random((days, assets)) < 0.02)] = np.nan
+    dates = pd.date_range("2015-01-01", periods=days, freq="D")
+    df = pd.DataFrame(prices, index=dates, columns=[f"A{i:04d}" for i in range(assets)])
+    df = df.stack().rename("prix").rename_axis(["date", "symbol"]).reset_index()
+    return df.sample(frac=1.0, random_state=seed, ignore_index=True)
+
+
+def check(expected, result, name, atol=1e-4):
+    """Les deux calculs doivent s'accorder à la précision du stockage float32 près."""
+    expected, result = np.asarray(expected, dtype=np.float64), np.asarray(result, dtype=np.float64)
+    assert (np.isnan(expected) == np.isnan(result)).all(), f"{name} : NaN différents"
+    both = ~np.isnan(expected)
+    assert np.allclose(expected[both], result[both], rtol=1e-3, atol=atol), name
+
+
+def run(assets=1_000, days=3_650, window=30):
+    df = make_prices(assets, days)
+    print(f"{assets} actifs × {days} jours, {len(df)} lignes de prix")
+    print(f"{'étape':<24} {'pandas (s)':>11} {'analytics (s)':>14} {'gain':>7}")
+
+    def row(name, reference, vectorised, compare=None, repeat=3):
+        reference_time, expected = best_of(reference, repeat) if reference else (None, None)
+        vectorised_time, result = best_of(vectorised, repeat)
+        if compare:
+            compare(expected, result)
+        if reference_time is None:
+            print(f"{name:<24} {'':>11} {vectorised_time:>14.4f}")
+        else:
+            print(f"{name:<24} {reference_time:>11.4f} {vectorised_time:>14.4f} {reference_time / vectorised_time:>6.1f}x")
+        return expected, result
+
+    pivot, matrix = row("matrice date × actif",
+                        lambda: df.pivot_table(index='date', columns='symbol', values='prix', aggfunc='last'),
+                        lambda: PriceMatrix.from_frame(df),
+                        lambda expected, result: check(expected.to_numpy(), result.values, "matrice", atol=0))
+    analytics = Analytics(matrix, volatility_window=window)
+    returns = np.log(pivot).diff()
+
+    row("rendements", lambda: np.log(pivot).diff(), lambda: log_returns(matrix.values),
+        lambda expected, result: check(expected.to_numpy()[1:], result, "rendements"))
+    row("volatilité glissante", lambda: returns.rolling(window).std() * np.sqrt(365),
+        lambda: analytics.rolling_volatility(),
+        lambda expected, result: check(expected.to_numpy()[1:], result.to_numpy(), "volatilité"))
+    # Moments croisés recalculés à chaque mesure : l'état tenu par ``Analytics`` n'est pas réutilisé
+    row("corrélation", lambda: returns.corr(min_periods=20),
+        lambda: correlation_from_moments(cross_moments(analytics.returns)),
+        lambda expected, result: check(expected.to_numpy(), result, "corrélation"), repeat=1)
+    row("covariance", lambda: returns.cov(min_periods=20),
+        lambda: covariance_from_moments(cross_moments(analytics.returns)),
+        lambda expected, result: check(expected.to_numpy(), result, "covariance", atol=1e-7), repeat=1)
+    row("drawdowns", lambda: pivot / pivot.cummax() - 1, analytics.drawdowns,
+        lambda expected, result: check(expected.to_numpy(), result.to_numpy(), "drawdowns"))
+
+    rng = np.random.default_rng(1)
+    portfolios = [dict(zip(matrix.symbols[rng.choice(assets, 20, replace=False)], rng.uniform(100, 1_000, 20)))
+                  for _ in range(100)]
+    row("1 portefeuille", None, lambda: analytics.portfolio(portfolios[0]))
+    row("100 portefeuilles", None, lambda: analytics.portfolio(portfolios))
+
+    # Ajout d'un jour : mise à jour de l'état contre recalcul complet
+    last = matrix.dates[-1]
+    new_days = [(last + np.timedelta64(i, 'D'), dict(zip(matrix.symbols, matrix.values[-1] * np.exp(
+        rng.normal(0, 0.03, assets))))) for i in range(1, 11)]
+    start = time.perf_counter()
+    for day, prices in new_days:
+        analytics.append(day, prices)
+    incremental = (time.perf_counter() - start) / len(new_days)
+    rebuild, _ = best_of(analytics.rebuild, repeat=1)
+    summary = analytics.summary()
+    analytics.rebuild()
+    check(analytics.summary().to_numpy(), summary.to_numpy(), "ajout incrémental")
+    name = "ajout d'un jour"
+    print(f"{name:<24} {rebuild:>11.4f} {incremental:>14.4f} {rebuild / incremental:>6.1f}x"
+          "   (recalcul complet / mise à jour)")
+
+    print(f"matrice : {matrix.values.nbytes / 1e6:.0f} Mo en float32 "
+          f"(contre {matrix.values.size * 8 / 1e6:.0f} Mo en float64, {pivot.memory_usage().sum() / 1e6:.0f} Mo en DataFrame)")
+
+
+if __name__ == "__main__":
+    run(*[int(arg) for arg in sys.argv[1:3]])
@@ -0,0 +1,73 @@
+"""
+Comparaison de la classification vectorisée et de la normalisation des symboles
+par l'index (``canonical_series``) avec les anciennes versions ``apply`` ligne
+par ligne, sur des positions synthétiques :
+
+    python -m portfolio_tracker.benchmarks.classification [nombre de lignes ...]
+"""
+import sys
+
+import numpy as np
+import pandas as pd
+
+from . import best_of
+from ..asset_mapping import AssetIndex
+from ..classification import classify_positions, sign_loans
+
+SYMBOLS = ['ETH', 'STRK', 'xSTRK', 'nstSTRK', 'ezETH', 'wstETH', 'USDC', 'LDBTC', 'BTC', 'LDUSDT']
+
+# Index réduit : les symboles suivis sont résolus par l'index, les autres par la règle historique
+INDEX_SYMBOLS = {'bitcoin': 'btc', 'ethereum': 'eth', 'starknet': 'strk', 'usd-coin': 'usdc', 'tether': 'usdt'}
+
+
+# Anciennes implémentations, conservées comme référence
+def check_condition(row):
+    symbol = row['symbol']
+    montant = row['montant']
+    if symbol.endswith('STRK') and any(c.islower() for c in symbol[:-4]):
+        return 'staked'
+    elif symbol.endswith('ETH') and any(c.islower() for c in symbol[:-3]):
+        return 'deposit'
+    elif montant < 0:
+        return 'loan'
+    return 'wallet'
+
+
+def legacy_strip_lowercase(symbols):
+    return symbols.apply(lambda x: ''.join([char for char in x if not char.islower()]))
+
+
+def make_positions(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'symbol': rng.choice(SYMBOLS, n),
+        'montant': rng.normal(10, 20, n),
+        'type_position': rng.choice(['wallet', 'loan', 'deposit'], n),
+    })
+
+
+def run(sizes=(1_000, 10_000, 100_000)):
+    index = AssetIndex.build(INDEX_SYMBOLS, {"prefixes": {"binance": ["LD"]}})
+    print(f"{'lignes':>8} {'étape':<18} {'apply (s)':>10} {'vectorisé (s)':>14} {'gain':>7}")
+    for n in sizes:
+        df = make_positions(n)
+        cases = [
+            ("type_position", lambda: df.apply(check_condition, axis=1),
+             lambda: classify_positions(df['symbol'], df['montant'])),
+            ("symbole starknet", lambda: legacy_strip_lowercase(df['symbol']),
+             lambda: index.canonical_series('starknet', df['symbol'])),
+            ("symbole binance", lambda: df['symbol'].apply(lambda x: x[2:] if x.startswith('LD') else x),
+             lambda: index.canonical_series('binance', df['symbol'])),
+            ("signe des loans", lambda: df.apply(lambda row: -row['montant'] if row['type_position'] == 'loan' else row['montant'], axis=1),
+             lambda: sign_loans(df['montant'], df['type_position'])),
+        ]
+        for name, legacy, vectorised in cases:
+            legacy_time, expected = best_of(legacy, repeat=3)
+            vectorised_time, result = best_of(vectorised, repeat=3)
+            # Les deux versions doivent produire exactement le même résultat
+            assert expected.tolist() == result.tolist(), name
+            print(f"{n:>8} {name:<18} {legacy_time:>10.4f} {vectorised_time:>14.4f} {legacy_time / vectorised_time:>6.1f}x")
+
+
+if __name__ == "__main__":
+    run([int(size) for size in sys.argv[1:]] or (1_000, 10_000, 100_000))
@@ -0,0 +1,250 @@
+"""
+Débit de bout en bout de chaque collecteur (lecture des réponses, transformation
+et écriture) sur des réponses rejouées, sans réseau :
+
+    python -m portfolio_tracker.benchmarks.collectors                   # tailles réduites
+    python -m portfolio_tracker.benchmarks.collectors --scale           # 1k cryptos, 100 portefeuilles, 10 ans
+    python -m portfolio_tracker.benchmarks.collectors --save-baseline bench.json
+    python -m portfolio_tracker.benchmarks.collectors --baseline bench.json --tolerance 0.3
+
+Chaque cas écrit dans une destination neuve : SQLite (``SqlSink``) et/ou
+Parquet lu par DuckDB (``ParquetSink``). Avec ``--baseline``, le code de sortie
+vaut 1 si un cas est plus lent que la référence au-delà de la tolérance.
+
+Des réponses réelles peuvent être enregistrées avec ``--record DOSSIER`` (appels
+réels avec la configuration du ``.env``), puis rejouées avec ``--fixtures DOSSIER``.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from unittest import mock
+
+import requests
+from sqlalchemy import create_engine
+
+from . import fixtures
+from .replay import record, recorded_routes, replay
+from .. import asset_mapping
+from ..sinks import ParquetSink, SqlSink
+
+SINKS = {
+    "sqlite": lambda directory: SqlSink(create_engine(f"sqlite:///{os.path.join(directory, 'bench.db')}")),
+    "parquet": lambda directory: ParquetSink(os.path.join(directory, "parquet")),
+}
+
+# Tailles par défaut, et tailles des tests de montée en charge (--scale)
+SIZES = {"coins": 33, "chart_coins": 33, "days": 30, "wallets": 3, "balances": 2000}
+SCALE_SIZES = {"coins": 1000, "chart_coins": 50, "days": 3650, "wallets": 100, "balances": 2000}
+
+# Débits illimités et clés factices : seul le code local est mesuré
+BENCH_ENV = {
+    "coingecko_rate_per_minute": "1e9",
+    "zerion_rate_per_minute": "1e9",
+    "starknet_rpc_rate_per_minute": "1e9",
+    "coingecko_api_key": "bench",
+    "zerion_api_key": "bench",
+    "mexc_api_key": "bench",
+    "mexc_secret_key": "bench",
+    "binance_api_key": "bench",
+    "binance_api_secret": "bench",
+    "starknet_rpc_url": fixtures.STARKNET_RPC_URL,
+    "starknet_source": "rpc",
+}
+
+# --------------------------------------------------------------------------------
+
+# CAS MESURÉS
+
+
+def prices_markets(sizes):
+    from ..coingecko import get_limiter
+    from ..collectors import prices
+    ids = fixtures.coin_ids(sizes["coins"])
+
+    def run(sink):
+        session, limiter = requests.Session(), get_limiter()
+        # Tickers synthétiques déclarés comme ceux de asset_mapping.json
+        asset_mapping.get_index(ids, session, limiter).tickers.update(fixtures.listed_tickers(ids))
+        df = prices.ingest_markets(session, limiter, ids)
+        return sink.write(df, prices.TABLE)
+    return fixtures.ticker_routes(ids) + fixtures.coingecko_routes(ids), {}, run
+
+
+def prices_market_chart(sizes):
+    from ..coingecko import get_limiter
+    from ..collectors import prices
+    ids = fixtures.coin_ids(sizes["chart_coins"])
+
+    def run(sink):
+        df = prices.ingest_market_chart(requests.Session(), get_limiter(), sizes["days"], ids)
+        return sink.write(df, prices.TABLE)
+    return fixtures.coingecko_routes(ids), {}, run
+
+
+def evm(sizes):
+    from ..collectors import evm_wallet
+    addresses = [fixtures.wallet_address(i) for i in range(sizes["wallets"])]
+    return fixtures.zerion_routes() + fixtures.coingecko_routes([]), {"evm_adresses": ",".join(addresses)}, evm_wallet.run
+
+
+def starknet(sizes):
+    from ..collectors import starknet_wallet
+    addresses = [fixtures.wallet_address(i, width=64) for i in range(sizes["wallets"])]
+    routes = fixtures.starknet_routes(addresses) + fixtures.coingecko_routes([])
+    return routes, {"starknet_adresses": ",".join(addresses)}, starknet_wallet.run
+
+
+def mexc(sizes):
+    from ..collectors import mexc_wallet
+    return fixtures.mexc_routes(sizes["balances"]) + fixtures.coingecko_routes([]), {}, mexc_wallet.run
+
+
+def binance(sizes):
+    # Nécessite python-binance, dont le client passe lui aussi par une session requests
+    from ..collectors import binance_wallet
+    routes = fixtures.binance_routes(sizes["balances"]) + fixtures.coingecko_routes([])
+    return routes, {}, binance_wallet.run
+
+
+CASES = {
+    "prices_markets": prices_markets,
+    "prices_market_chart": prices_market_chart,
+    "evm": evm,
+    "starknet": starknet,
+    "mexc": mexc,
+    "binance": binance,
+}
+
+# Avec des réponses enregistrées, chaque collecteur tourne avec la configuration du .env
+RECORDED_CASES = ["prices", "evm", "starknet", "mexc", "binance"]
+
+# --------------------------------------------------------------------------------
+
+# MESURE
+
+
+@contextlib.contextmanager
+def isolated(env=None):
+    """Caches, index des actifs et variables d'environnement propres au bloc."""
+    with tempfile.TemporaryDirectory() as cache_dir, \
+            mock.patch.dict(os.environ, {"portfolio_cache_dir": cache_dir, **(env or {})}):
+        asset_mapping._index = None
+        try:
+            yield
+        finally:
+            asset_mapping._index = None
+
+
+def measure(run, routes, sink_name, repeat, recorded=None):
+    """
+    Meilleur temps de ``run(sink)`` sur ``repeat`` exécutions, chacune dans une
+    destination neuve. La première exécution remplit les caches (liste CoinGecko,
+    index des actifs) : à partir de deux répétitions, le meilleur temps les exclut.
+    """
+    best = None
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as directory:
+            sink = SINKS[sink_name](directory)
+            with replay(routes, recorded) as adapter, contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                rows = run(sink)
+                seconds = time.perf_counter() - start
+            sink.close()
+        if best is None or seconds < best["seconds"]:
+            best = {"rows": rows, "seconds": seconds, "requests": adapter.requests,
+                    "bytes": adapter.bytes, "misses": len(adapter.misses)}
+    return best
+
+
+def run_cases(names, sizes, sink_names, repeat, recorded=None):
+    results = {}
+    print(f"{'cas':<22} {'destination':<10} {'lignes':>8} {'durée (s)':>10} {'lignes/s':>10} {'requêtes':>9} {'Mo':>7}")
+    for name in names:
+        try:
+            if recorded is None:
+                routes, env, run = CASES[name](sizes)
+            else:
+                from .. import collectors
+                routes, env, run = [], {}, collectors.load(name).run
+        except ImportError as exc:
+            print(f"{name:<22} ignoré ({exc})")
+            continue
+        for sink_name in sink_names:
+            with isolated({**BENCH_ENV, **env} if recorded is None else None):
+                result = measure(run, routes, sink_name, repeat, recorded)
+            rate = result["rows"] / result["seconds"] if result["seconds"] else 0.0
+            results[f"{name}/{sink_name}"] = {**result, "rows_per_second": rate}
+            print(f"{name:<22} {sink_name:<10} {result['rows']:>8} {result['seconds']:>10.3f} "
+                  f"{rate:>10.0f} {result['requests']:>9} {result['bytes'] / 1e6:>7.2f}"
+                  + (f"  ({result['misses']} requête(s) sans réponse)" if result["misses"] else ""))
+    return results
+
+
+def record_cases(names, directory):
+    """Lance les collecteurs contre les vraies API en enregistrant leurs réponses dans ``directory``."""
+    from dotenv import load_dotenv
+
+    from .. import collectors
+    load_dotenv()
+    for name in names:
+        # Cache vide : la liste CoinGecko et l'index des actifs sont eux aussi enregistrés
+        with isolated(), tempfile.TemporaryDirectory() as sink_dir, record(directory):
+            sink = SINKS["sqlite"](sink_dir)
+            rows = collectors.load(name).run(sink=sink)
+            sink.close()
+        print(f"{name}: {rows} ligne(s), réponses enregistrées dans {directory}")
+
+
+def compare(results, baseline, tolerance):
+    """Cas dont le débit est inférieur à la référence de plus de ``tolerance`` (fraction)."""
+    regressions = []
+    for key, reference in baseline.items():
+        current = results.get(key)
+        if current and current["rows_per_second"] < reference["rows_per_second"] * (1 - tolerance):
+            regressions.append(key)
+            print(f"RÉGRESSION {key} : {current['rows_per_second']:.0f} lignes/s "
+                  f"contre {reference['rows_per_second']:.0f} en référence")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="portfolio_tracker.benchmarks.collectors")
+    parser.add_argument("cases", nargs="*", help="cas à mesurer (tous par défaut)")
+    parser.add_argument("--scale", action="store_true", help="tailles de montée en charge")
+    parser.add_argument("--sinks", default="sqlite,parquet", help="destinations parmi sqlite, parquet")
+    parser.add_argument("--repeat", type=int, default=2, help="exécutions par cas (meilleur temps retenu)")
+    parser.add_argument("--fixtures", help="rejouer les réponses enregistrées dans ce dossier")
+    parser.add_argument("--record", help="enregistrer les réponses des vraies API dans ce dossier")
+    parser.add_argument("--save-baseline", help="enregistrer les résultats comme référence (JSON)")
+    parser.add_argument("--baseline", help="comparer les résultats à une référence (JSON)")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="baisse de débit tolérée (0.3 = 30 %%)")
+    args = parser.parse_args(argv)
+
+    if args.record:
+        record_cases(args.cases or RECORDED_CASES, args.record)
+        return 0
+
+    recorded = recorded_routes(args.fixtures) if args.fixtures else None
+    names = args.cases or (RECORDED_CASES if recorded is not None else list(CASES))
+    unknown = set(names) - set(RECORDED_CASES if recorded is not None else CASES)
+    if unknown:
+        parser.error(f"cas inconnu(s) : {', '.join(sorted(unknown))}")
+    results = run_cases(names, SCALE_SIZES if args.scale else SIZES, args.sinks.split(","), args.repeat, recorded)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        return 1 if compare(results, baseline, args.tolerance) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,207 @@
+"""
+Réponses synthétiques au format des API réelles, et routes de rejeu associées.
+
+Les tailles sont paramétrables pour les tests de montée en charge (milliers de
+cryptos, centaines de portefeuilles, années d'historique). Les valeurs sont
+tirées d'un générateur initialisé, si bien que deux lancements servent
+exactement les mêmes réponses.
+"""
+import random
+from datetime import datetime, timezone
+
+from ..collectors.prices import Liste
+from ..starknet_rpc import DEFAULT_TOKENS
+from ..stubs import StubStarknetRpc
+
+STARKNET_RPC_URL = "https://starknet.replay/rpc"
+
+# Tickers réels des ids suivis par défaut ; les autres reçoivent un ticker dérivé de l'id
+KNOWN_SYMBOLS = {
+    "bitcoin": "btc", "ethereum": "eth", "starknet": "strk", "tether": "usdt", "usd-coin": "usdc",
+    "wrapped-bitcoin": "wbtc", "wrapped-steth": "wsteth", "weth": "weth", "binancecoin": "bnb",
+    "solana": "sol", "cardano": "ada", "chainlink": "link", "near": "near", "arbitrum": "arb",
+    "optimism": "op", "mantle": "mnt",
+}
+
+DAY_MS = 86_400_000
+
+
+def coin_ids(n):
+    """Ids suivis par défaut, complétés d'ids synthétiques jusqu'à ``n``."""
+    return list(Liste[:n]) + [f"coin-{i:05d}" for i in range(max(0, n - len(Liste)))]
+
+
+def coin_symbol(coin_id):
+    return KNOWN_SYMBOLS.get(coin_id) or coin_id.replace("-", "")
+
+
+def wallet_address(i, width=40):
+    return "0x" + f"{i + 1:0{width}x}"
+
+# --------------------------------------------------------------------------------
+
+# COINGECKO
+
+
+def coins_list(ids):
+    """Contenu de ``/coins/list``."""
+    return [{"id": coin_id, "symbol": coin_symbol(coin_id), "name": coin_id.title()} for coin_id in ids]
+
+
+def markets(ids, now=None):
+    """Contenu de ``/coins/markets`` pour les ``ids`` demandés."""
+    rng = random.Random(len(ids))
+    updated = (now or datetime.now(timezone.utc)).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+    return [{
+        "id": coin_id,
+        "symbol": coin_symbol(coin_id),
+        "name": coin_id.title(),
+        "current_price": rng.lognormvariate(0, 3),
+        "market_cap": rng.lognormvariate(18, 3),
+        "total_volume": rng.lognormvariate(15, 3),
+        "price_change_percentage_24h": rng.gauss(0, 5),
+        "last_updated": updated,
+    } for coin_id in ids]
+
+
+def market_chart(coin_id, days, now=None):
+    """Contenu de ``/coins/{id}/market_chart`` en journalier : ``days`` + 1 points par série."""
+    rng = random.Random(coin_id)
+    today = int((now or datetime.now(timezone.utc)).timestamp() * 1000) // DAY_MS * DAY_MS
+    timestamps = [today - (days - i) * DAY_MS for i in range(days + 1)]
+    price = rng.lognormvariate(0, 3)
+    prices, caps, volumes = [], [], []
+    for timestamp in timestamps:
+        price *= 1 + rng.gauss(0, 0.03)
+        prices.append([timestamp, price])
+        caps.append([timestamp, price * 1e9])
+        volumes.append([timestamp, price * 1e7])
+    return {"prices": prices, "market_caps": caps, "total_volumes": volumes}
+
+
+def coingecko_routes(ids):
+    # Les ids suivis par défaut restent listés : l'index des actifs en a besoin pour les soldes
+    listed = coins_list(dict.fromkeys(Liste + list(ids)))
+    return [
+        ("GET", r"api\.coingecko\.com/api/v3/coins/list",
+         lambda match, query, body: (200, listed)),
+        ("GET", r"api\.coingecko\.com/api/v3/coins/markets",
+         lambda match, query, body: (200, markets(query["ids"].split(",")))),
+        ("GET", r"api\.coingecko\.com/api/v3/coins/([^/]+)/market_chart",
+         lambda match, query, body: (200, market_chart(match.group(1), int(query["days"])))),
+    ]
+
+# --------------------------------------------------------------------------------
+
+# TICKERS DES ÉCHANGES
+
+
+def tickers(ids, share, quotes=("USDT", "USDC", "BTC"), seed=0):
+    """Contenu de ``/api/v3/ticker/price`` : une part ``share`` des ids cotée contre une ou plusieurs devises."""
+    rng = random.Random(seed + len(ids))
+    pairs = [{"symbol": "BTCUSDT", "price": f"{rng.uniform(50_000, 100_000):.2f}"}]
+    for coin_id in ids:
+        if rng.random() >= share:
+            continue
+        base = coin_symbol(coin_id).upper()
+        price = rng.lognormvariate(0, 3)
+        for quote in rng.sample(quotes, rng.randint(1, len(quotes))):
+            quoted = price / 75_000 if quote == "BTC" else price
+            pairs.append({"symbol": base + quote, "price": f"{quoted:.10f}"})
+    return pairs
+
+
+def listed_tickers(ids):
+    """Section ``tickers`` de ``asset_mapping.json`` correspondant aux réponses de ``ticker_routes``."""
+    return {(exchange, coin_symbol(coin_id).upper()): coin_id for exchange in ("binance", "mexc") for coin_id in ids}
+
+
+def ticker_routes(ids):
+    """Binance cote environ 60 % des ids, MEXC 80 % : CoinGecko ne reçoit que le reste."""
+    binance, mexc = tickers(ids, 0.6, seed=1), tickers(ids, 0.8, seed=2)
+    return [
+        ("GET", r"api\.binance\.com/api/v3/ticker/price", lambda match, query, body: (200, binance)),
+        ("GET", r"api\.mexc\.com/api/v3/ticker/price", lambda match, query, body: (200, mexc)),
+    ]
+
+# --------------------------------------------------------------------------------
+
+# ZERION
+
+
+def zerion_position(address, i, rng):
+    position_type = rng.choice(["wallet", "wallet", "wallet", "deposit", "loan", "staked"])
+    return {
+        "type": "positions",
+        "id": f"{address}-{i}",
+        "attributes": {
+            "position_type": position_type,
+            "protocol": None if position_type == "wallet" else rng.choice(["Aave V3", "Lido", "Morpho"]),
+            "quantity": {"numeric": f"{rng.lognormvariate(0, 2):.8f}"},
+            "value": rng.lognormvariate(4, 2),
+            "fungible_info": {"symbol": coin_symbol(rng.choice(Liste)).upper()},
+        },
+        "relationships": {"chain": {"data": {"type": "chains", "id": rng.choice(["ethereum", "base", "arbitrum", "optimism"])}}},
+    }
+
+
+def zerion_routes(positions_per_wallet=60, page_size=20):
+    """Positions paginées par ``links.next``, générées à partir de l'adresse."""
+
+    def handle(match, query, body):
+        address = match.group(1)
+        page = int(query.get("page[after]", 0))
+        rng = random.Random(address)
+        positions = [zerion_position(address, i, rng) for i in range(positions_per_wallet)]
+        data = positions[page:page + page_size]
+        links = {"self": f"https://api.zerion.io/v1/wallets/{address}/positions/"}
+        if page + page_size < len(positions):
+            links["next"] = f"https://api.zerion.io/v1/wallets/{address}/positions/?page[after]={page + page_size}"
+        return 200, {"links": links, "data": data}
+
+    return [("GET", r"api\.zerion\.io/v1/wallets/([^/]+)/positions/", handle)]
+
+# --------------------------------------------------------------------------------
+
+# SOLDES DES PLATEFORMES CENTRALISÉES
+
+
+def account_balances(n, zero_share=0.9, prefix=""):
+    """Soldes ``{"asset", "free", "locked"}`` dont une majorité à zéro, comme sur un vrai compte."""
+    rng = random.Random(n)
+    assets = [coin_symbol(coin_id).upper() for coin_id in coin_ids(n)]
+    return [{
+        "asset": prefix + asset if rng.random() < 0.1 else asset,
+        "free": "0.00000000" if rng.random() < zero_share else f"{rng.lognormvariate(0, 2):.8f}",
+        "locked": "0.00000000",
+    } for asset in assets]
+
+
+def mexc_routes(n_balances=2000):
+    account = {"canTrade": True, "accountType": "SPOT", "balances": account_balances(n_balances)}
+    return [("GET", r"api\.mexc\.com/api/v3/account", lambda match, query, body: (200, account))]
+
+
+def binance_routes(n_balances=2000):
+    account = {"canTrade": True, "accountType": "SPOT", "balances": account_balances(n_balances, prefix="LD")}
+    return [
+        ("GET", r"api\d?\.binance\.com/api/v3/ping", lambda match, query, body: (200, {})),
+        ("GET", r"api\d?\.binance\.com/api/v3/time",
+         lambda match, query, body: (200, {"serverTime": int(datetime.now(timezone.utc).timestamp() * 1000)})),
+        ("GET", r"api\d?\.binance\.com/api/v3/account", lambda match, query, body: (200, account)),
+    ]
+
+# --------------------------------------------------------------------------------
+
+# NŒUD STARKNET
+
+
+def starknet_routes(addresses):
+    """Lots ``starknet_call`` servis par le nœud minimal de ``stubs``, sans serveur HTTP."""
+    rng = random.Random(len(addresses))
+    balances = {
+        (token["address"], address): int(rng.lognormvariate(0, 2) * 10 ** token["decimals"])
+        for address in addresses for token in DEFAULT_TOKENS if rng.random() < 0.6
+    }
+    node = StubStarknetRpc(balances)
+    return [("POST", r"starknet\.replay/rpc", lambda match, query, body: node.handle("POST", "/rpc", body))]
@@ -0,0 +1,151 @@
+"""
+Rejeu de réponses d'API sans réseau, au niveau de la session ``requests``.
+
+Le temps d'un bloc ``with replay(routes)``, toutes les sessions ``requests``
+(celles des collecteurs comme celle du client Binance) sont servies par
+``ReplayAdapter`` au lieu du réseau. Une route associe une méthode et une
+expression régulière sur ``hôte + chemin`` à une fonction qui renvoie
+``(status, objet JSON)``.
+
+Les réponses réelles peuvent être enregistrées une fois avec ``record(dossier)``
+(un fichier JSON par requête) puis rejouées avec ``recorded_routes(dossier)`` ;
+elles sont prioritaires sur les routes synthétiques de ``fixtures``. Les
+paramètres qui changent à chaque appel (``timestamp``, ``signature``) sont
+ignorés pour retrouver une réponse enregistrée ; le corps des requêtes POST
+(lots JSON-RPC) fait partie de la clé.
+"""
+import hashlib
+import json
+import os
+import re
+from contextlib import contextmanager
+from unittest import mock
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+
+# Paramètres propres à chaque appel, exclus de la clé d'une réponse enregistrée
+VOLATILE_PARAMS = {"timestamp", "signature", "recvWindow"}
+
+
+def request_key(method, url, body=None):
+    """Clé stable d'une requête : méthode, hôte, chemin, paramètres triés (hors paramètres volatils) et corps."""
+    parts = urlsplit(url)
+    query = sorted((key, value) for key, value in parse_qsl(parts.query) if key not in VOLATILE_PARAMS)
+    key = f"{method} {parts.netloc}{parts.path}?{urlencode(query)}"
+    if body:
+        key += " " + hashlib.sha1(body if isinstance(body, bytes) else body.encode()).hexdigest()
+    return key
+
+
+def parse_body(body):
+    """Corps JSON (lots JSON-RPC) ou formulaire (client Binance) d'une requête."""
+    if not body:
+        return None
+    if isinstance(body, bytes):
+        body = body.decode()
+    try:
+        return json.loads(body)
+    except ValueError:
+        return dict(parse_qsl(body))
+
+
+def make_response(request, status, payload):
+    response = requests.Response()
+    response.status_code = status
+    response._content = json.dumps(payload).encode()
+    response.headers["Content-Type"] = "application/json"
+    response.encoding = "utf-8"
+    response.url = request.url
+    response.request = request
+    return response
+
+
+class ReplayAdapter(BaseAdapter):
+    """Adaptateur ``requests`` qui répond à partir des routes, et compte les requêtes servies."""
+
+    def __init__(self, routes, recorded=None):
+        super().__init__()
+        self.routes = [(method, re.compile(pattern), handler) for method, pattern, handler in routes]
+        self.recorded = recorded or {}
+        self.requests = 0
+        self.bytes = 0
+        self.misses = []
+
+    def resolve(self, request):
+        key = request_key(request.method, request.url, request.body)
+        if key in self.recorded:
+            return self.recorded[key]
+        parts = urlsplit(request.url)
+        body = parse_body(request.body)
+        for method, pattern, handler in self.routes:
+            match = pattern.fullmatch(f"{parts.netloc}{parts.path}")
+            if method == request.method and match:
+                return handler(match, dict(parse_qsl(parts.query)), body)
+        self.misses.append(key)
+        return 404, {"error": f"aucune réponse enregistrée pour {key}"}
+
+    def send(self, request, **kwargs):
+        status, payload = self.resolve(request)
+        response = make_response(request, status, payload)
+        self.requests += 1
+        self.bytes += len(response.content)
+        return response
+
+    def close(self):
+        pass
+
+
+@contextmanager
+def replay(routes, recorded=None):
+    """Sert toutes les sessions ``requests`` depuis ``routes`` le temps du bloc ; renvoie l'adaptateur."""
+    adapter = ReplayAdapter(routes, recorded)
+    with mock.patch.object(requests.Session, "get_adapter", lambda session, url: adapter):
+        yield adapter
+
+# --------------------------------------------------------------------------------
+
+# ENREGISTREMENT ET RELECTURE DE RÉPONSES RÉELLES
+
+
+class RecordingAdapter(HTTPAdapter):
+    """Adaptateur réseau normal qui enregistre chaque réponse JSON dans ``directory``."""
+
+    def __init__(self, directory):
+        super().__init__()
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def send(self, request, **kwargs):
+        response = super().send(request, **kwargs)
+        try:
+            payload = response.json()
+        except ValueError:
+            return response
+        key = request_key(request.method, request.url, request.body)
+        name = hashlib.sha1(key.encode()).hexdigest()[:16]
+        with open(os.path.join(self.directory, f"{name}.json"), "w", encoding="utf-8") as f:
+            json.dump({"key": key, "status": response.status_code, "body": payload}, f)
+        return response
+
+
+@contextmanager
+def record(directory):
+    """Laisse passer les requêtes vers les vraies API et enregistre leurs réponses."""
+    adapter = RecordingAdapter(directory)
+    with mock.patch.object(requests.Session, "get_adapter", lambda session, url: adapter):
+        yield adapter
+
+
+def recorded_routes(directory):
+    """Réponses enregistrées par ``record`` : {clé de requête: (status, JSON)}."""
+    recorded = {}
+    if not directory or not os.path.isdir(directory):
+        return recorded
+    for name in os.listdir(directory):
+        if name.endswith(".json"):
+            with open(os.path.join(directory, name), encoding="utf-8") as f:
+                fixture = json.load(f)
+            recorded[fixture["key"]] = (fixture["status"], fixture["body"])
+    return recorded
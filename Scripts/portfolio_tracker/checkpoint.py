@@ -0,0 +1,38 @@
+"""
+Point de reprise local : un fichier JSON réécrit de façon atomique, qui permet
+à un traitement long interrompu de reprendre là où il s'est arrêté.
+"""
+import json
+import os
+
+from .config import cache_path
+
+
+class Checkpoint:
+    """Ensemble de clés terminées et état libre (``state``), persistés dans ``name``."""
+
+    def __init__(self, name):
+        self.path = cache_path(name)
+        data = {}
+        if self.path.exists():
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        self.done = set(data.get("done", []))
+        self.state = data.get("state", {})
+
+    def __contains__(self, key):
+        return key in self.done
+
+    def add(self, keys):
+        self.done.update(keys)
+
+    def save(self):
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"done": sorted(self.done), "state": self.state}, f)
+        os.replace(tmp, self.path)
+
+    def reset(self):
+        self.done, self.state = set(), {}
+        if self.path.exists():
+            self.path.unlink()
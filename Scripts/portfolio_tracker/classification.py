@@ -0,0 +1,33 @@
+"""
+Règles de classification des positions, en version vectorisée.
+
+Les règles elles-mêmes sont celles de ``schema`` (``position_type``,
+``signed_amount``), partagées avec les chemins légers. Les valeurs se répètent
+beaucoup : chaque règle n'est évaluée qu'une fois par valeur distincte
+(``pd.factorize``) puis redistribuée sur toutes les lignes, au lieu d'un
+``apply`` ligne par ligne.
+"""
+import numpy as np
+import pandas as pd
+
+from .schema import position_type, signed_amount
+
+
+def classify_positions(symbols, montants):
+    """Type de position de chaque ligne : 'staked', 'deposit', 'loan' ou 'wallet'."""
+    symbols = pd.Series(symbols)
+    montants = pd.Series(montants, index=symbols.index)
+    # Le type ne dépend du montant que par son signe : une évaluation par couple (symbole, signe) distinct
+    symbol_codes, symbol_uniques = pd.factorize(symbols, use_na_sentinel=False)
+    signs = np.sign(montants.fillna(0).to_numpy(dtype=float)).astype(int) + 1
+    keys, inverse = np.unique(symbol_codes * 3 + signs, return_inverse=True)
+    types = np.array([position_type(symbol_uniques[key // 3], key % 3 - 1) for key in keys], dtype=object)
+    return pd.Series(types[inverse], index=symbols.index, dtype=object)
+
+
+def sign_loans(montants, types):
+    """Passe en négatif les montants des positions de type 'loan'."""
+    montants = pd.Series(montants)
+    types = pd.Series(types, index=montants.index)
+    factors = types.map({value: signed_amount(1.0, value) for value in types.unique()})
+    return montants * factors.to_numpy(dtype=float)
@@ -0,0 +1,83 @@
+"""
+Cache local de la correspondance id → symbole de CoinGecko (``/coins/list``).
+
+La liste complète (plus de 10 000 jetons) est stockée dans une base SQLite et
+n'est retéléchargée que lorsqu'elle est périmée (``coin_list_ttl_hours``) ou
+qu'un id demandé en est absent.
+"""
+import os
+import sqlite3
+import time
+
+import pandas as pd
+
+from .coingecko import BASE_URL, get_headers
+from .config import cache_path
+from .fetch import FetchError, request_with_retry
+
+# Durée de validité du cache : une semaine
+DEFAULT_TTL_HOURS = 24 * 7
+
+# Délai minimal entre deux rafraîchissements provoqués par un id inconnu
+MIN_REFRESH_SECONDS = 3600
+
+
+def connect(path=None):
+    conn = sqlite3.connect(path or cache_path("coingecko_coins.sqlite"))
+    conn.execute("CREATE TABLE IF NOT EXISTS coins (id TEXT PRIMARY KEY, symbol TEXT NOT NULL, name TEXT)")
+    conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+    return conn
+
+
+def fetched_at(conn):
+    row = conn.execute("SELECT value FROM meta WHERE key = 'fetched_at'").fetchone()
+    return float(row[0]) if row else 0.0
+
+
+def refresh(conn, session, limiter=None):
+    """Télécharge ``/coins/list`` et remplace le contenu du cache."""
+    response = request_with_retry(session, "GET", f"{BASE_URL}/coins/list", limiter, headers=get_headers())
+    if response.status_code != 200:
+        raise FetchError(f"coins/list: ERREUR {response.status_code}")
+    coins = response.json()
+    with conn:
+        conn.execute("DELETE FROM coins")
+        conn.executemany(
+            "INSERT OR REPLACE INTO coins (id, symbol, name) VALUES (?, ?, ?)",
+            [(coin['id'], coin['symbol'], coin.get('name')) for coin in coins]
+        )
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('fetched_at', ?)", (str(time.time()),))
+    print(f"coins/list: {len(coins)} jetons mis en cache")
+
+
+def lookup(conn, ids):
+    placeholders = ",".join("?" * len(ids))
+    rows = conn.execute(f"SELECT id, symbol, name FROM coins WHERE id IN ({placeholders})", list(ids)).fetchall()
+    return pd.DataFrame(rows, columns=['id', 'symbol', 'name'])
+
+
+def load_coin_symbols(ids, session, limiter=None, path=None, ttl_hours=None):
+    """
+    Renvoie un DataFrame ``id, symbol, name`` limité aux ``ids`` demandés.
+
+    Le cache est rafraîchi s'il est périmé, ou si un id manque et que le
+    dernier téléchargement date de plus d'une heure.
+    """
+    ids = list(dict.fromkeys(ids))
+    if ttl_hours is None:
+        ttl_hours = float(os.getenv("coin_list_ttl_hours", DEFAULT_TTL_HOURS))
+    conn = connect(path)
+    try:
+        age = time.time() - fetched_at(conn)
+        if age > ttl_hours * 3600:
+            refresh(conn, session, limiter)
+            age = 0.0
+        df_symbol = lookup(conn, ids)
+        missing = set(ids) - set(df_symbol['id'])
+        if missing and age > MIN_REFRESH_SECONDS:
+            print(f"coins/list: ids absents du cache {sorted(missing)}, rafraîchissement")
+            refresh(conn, session, limiter)
+            df_symbol = lookup(conn, ids)
+    finally:
+        conn.close()
+    return df_symbol
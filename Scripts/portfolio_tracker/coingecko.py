@@ -0,0 +1,104 @@
+"""
+Accès à l'API CoinGecko : en-têtes, limiteur réglé sur le quota et appels de marché.
+
+- ``fetch_markets`` : cours du jour de nombreuses cryptos en un seul appel groupé.
+- ``fetch_market_chart`` / ``fetch_market_chart_range`` : historique d'une crypto,
+  utilisé pour les rattrapages.
+"""
+import os
+
+from .fetch import FetchError, TokenBucket, request_with_retry
+
+BASE_URL = "https://api.coingecko.com/api/v3"
+
+# Quota de l'offre Demo : 30 appels par minute
+DEFAULT_RATE_PER_MINUTE = 30
+
+
+def get_headers():
+    return {
+        "accept": "application/json",
+        "x-cg-demo-api-key": os.getenv("coingecko_api_key")
+    }
+
+
+def get_limiter():
+    """Limiteur partagé, réglable via la variable d'environnement ``coingecko_rate_per_minute``."""
+    rate = float(os.getenv("coingecko_rate_per_minute", DEFAULT_RATE_PER_MINUTE))
+    return TokenBucket(rate, burst=int(os.getenv("coingecko_burst", 1)))
+
+
+def fetch_market_chart(session, crypto, limiter=None, currency="usd", days=1, interval="daily"):
+    """Récupère ``/coins/{id}/market_chart`` ; lève ``FetchError`` si l'appel échoue."""
+    response = request_with_retry(
+        session, "GET", f"{BASE_URL}/coins/{crypto}/market_chart", limiter,
+        params={"vs_currency": currency, "days": days, "interval": interval},
+        headers=get_headers()
+    )
+    if response.status_code != 200:
+        raise FetchError(f"ERREUR {response.status_code}")
+    return response.json()
+
+
+def fetch_market_chart_range(session, crypto, start, end, limiter=None, currency="usd"):
+    """
+    Récupère ``/coins/{id}/market_chart/range`` entre deux timestamps (secondes).
+
+    La granularité est choisie par l'API : horaire jusqu'à 90 jours, journalière au-delà.
+    """
+    response = request_with_retry(
+        session, "GET", f"{BASE_URL}/coins/{crypto}/market_chart/range", limiter,
+        params={"vs_currency": currency, "from": int(start), "to": int(end)},
+        headers=get_headers()
+    )
+    if response.status_code != 200:
+        raise FetchError(f"ERREUR {response.status_code}")
+    return response.json()
+
+
+# Nombre maximal d'ids acceptés par page sur /coins/markets
+MARKETS_MAX_PER_PAGE = 250
+
+# Champs conservés dans la réponse de /coins/markets
+MARKETS_FIELDS = ['id', 'symbol', 'current_price', 'market_cap', 'total_volume', 'last_updated']
+
+
+def chunks(items, size):
+    items = list(items)
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def fetch_markets(session, ids, limiter=None, currency="usd", chunk_size=MARKETS_MAX_PER_PAGE):
+    """
+    Récupère ``/coins/markets`` pour une liste d'ids, par paquets de ``chunk_size``.
+
+    Un seul appel couvre jusqu'à 250 cryptos, au lieu d'un appel ``market_chart``
+    par crypto. Renvoie la liste des enregistrements de toutes les réponses.
+    """
+    records = []
+    for chunk in chunks(ids, chunk_size):
+        response = request_with_retry(
+            session, "GET", f"{BASE_URL}/coins/markets", limiter,
+            params={"vs_currency": currency, "ids": ",".join(chunk), "per_page": len(chunk), "page": 1},
+            headers=get_headers()
+        )
+        if response.status_code != 200:
+            raise FetchError(f"ERREUR {response.status_code}")
+        records.extend(response.json())
+    return records
+
+
+def markets_to_df(records):
+    """
+    Convertit les enregistrements de ``/coins/markets`` en DataFrame au format de ``crypto_price``.
+
+    Le prix est le cours au moment de l'appel (``last_updated``), daté du jour UTC :
+    il est provisoire (``schema.SPOT_SUFFIX``) jusqu'à l'écriture du prix d'ouverture.
+    """
+    # Import à la demande : le chemin léger (``light``) n'utilise que ``fetch_markets``
+    import pandas as pd
+    df = pd.DataFrame.from_records(records, columns=MARKETS_FIELDS)
+    df['date'] = pd.to_datetime(df['last_updated'], utc=True).dt.date
+    df['symbol'] = df['symbol'].str.upper()
+    df = df.rename(columns={'current_price': 'prix', 'id': 'crypto'})
+    return df.reindex(['date', 'symbol', 'prix', 'market_cap', 'total_volume', 'crypto'], axis=1)
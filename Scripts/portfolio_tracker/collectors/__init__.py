@@ -0,0 +1,40 @@
+"""
+Collecteurs de données : chaque module expose ``run(sink=None)`` qui récupère,
+transforme et enregistre les données d'une source (voir ``sinks``), et renvoie le nombre de
+lignes écrites.
+
+Les modules sont importés à la demande (``load``) : une dépendance manquante
+pour une source (ex. Selenium) n'empêche pas les autres de tourner.
+"""
+import importlib
+import os
+
+COLLECTORS = {
+    "prices": "portfolio_tracker.collectors.prices",
+    "binance": "portfolio_tracker.collectors.binance_wallet",
+    "mexc": "portfolio_tracker.collectors.mexc_wallet",
+    "evm": "portfolio_tracker.collectors.evm_wallet",
+    "starknet": "portfolio_tracker.collectors.starknet_wallet",
+    "binance_trades": "portfolio_tracker.collectors.binance_trades",
+    "mexc_trades": "portfolio_tracker.collectors.mexc_trades",
+    "evm_transactions": "portfolio_tracker.collectors.evm_transactions",
+}
+
+
+# Configuration des sources de trades, facultatives : sans l'une au moins des variables
+# de chaque groupe, le lancement par défaut les ignore au lieu de les compter en échec
+REQUIRED_ENV = {
+    "binance_trades": [("binance_api_key",), ("binance_api_secret",)],
+    "mexc_trades": [("mexc_api_key",), ("mexc_secret_key",)],
+    "evm_transactions": [("evm_adresses", "evm_adress"), ("zerion_api_key",)],
+}
+
+
+def missing_env(name):
+    """Variables manquantes pour le collecteur ``name`` (liste vide s'il est configuré)."""
+    return [" ou ".join(group) for group in REQUIRED_ENV.get(name, []) if not any(os.getenv(variable) for variable in group)]
+
+
+def load(name):
+    """Importe et renvoie le module du collecteur ``name``."""
+    return importlib.import_module(COLLECTORS[name])
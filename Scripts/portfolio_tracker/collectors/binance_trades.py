@@ -0,0 +1,105 @@
+"""
+Collecteur de l'historique des trades Spot Binance (table ``binance_trades``).
+
+L'API ``myTrades`` se consulte paire par paire. Sont suivies les paires formées
+des actifs détenus et des devises de cotation ``binance_quote_assets``, celles
+déjà suivies lors des lancements précédents et celles de ``binance_trade_pairs``.
+Pour chaque paire, seuls les trades d'identifiant supérieur au curseur sont
+demandés, par pages de 1000.
+"""
+import os
+
+from ..fetch import TokenBucket
+from ..metrics import stage
+from ..sinks import get_sink
+from ..transactions import Cursors, from_millis, to_frame
+from .binance_wallet import get_client
+
+TABLE = "binance_trades"
+CURSORS_NAME = "binance_trades_cursors.json"
+ACCOUNT = "spot"
+
+PAGE_SIZE = 1000
+DEFAULT_QUOTE_ASSETS = "USDT,USDC,FDUSD,BTC,ETH,BNB"
+
+# --------------------------------------------------------------------------------
+
+# CHOIX DES PAIRES
+
+
+def held_assets(account):
+    """Actifs dont le solde (disponible ou bloqué) n'est pas nul."""
+    return {balance["asset"] for balance in account["balances"]
+            if float(balance["free"]) + float(balance["locked"]) > 0}
+
+
+def trade_pairs(client, assets, cursors):
+    """Paires existantes formées des actifs détenus, plus les paires déjà suivies ou configurées."""
+    quotes = [quote.strip() for quote in os.getenv("binance_quote_assets", DEFAULT_QUOTE_ASSETS).split(",") if quote.strip()]
+    listed = {symbol["symbol"] for symbol in client.get_exchange_info()["symbols"]}
+    candidates = {asset + quote for asset in assets for quote in quotes if asset != quote}
+    configured = {pair.strip() for pair in os.getenv("binance_trade_pairs", "").split(",") if pair.strip()}
+    return sorted((candidates & listed) | set(cursors.symbols(ACCOUNT)) | configured)
+
+# --------------------------------------------------------------------------------
+
+# LECTURE INCRÉMENTALE
+
+
+def fetch_trades(client, pair, from_id, limiter=None):
+    """Trades de ``pair`` d'identifiant ≥ ``from_id``, toutes pages confondues."""
+    trades = []
+    while True:
+        if limiter is not None:
+            limiter.acquire()
+        page = client.get_my_trades(symbol=pair, fromId=from_id, limit=PAGE_SIZE)
+        trades.extend(page)
+        if len(page) < PAGE_SIZE:
+            return trades
+        from_id = page[-1]["id"] + 1
+
+
+def normalise(trades):
+    return [(
+        from_millis(trade["time"]),
+        'Binance',
+        None,
+        trade["symbol"],
+        str(trade["id"]),
+        'BUY' if trade["isBuyer"] else 'SELL',
+        float(trade["qty"]),
+        float(trade["price"]),
+        float(trade["quoteQty"]),
+        float(trade["commission"]),
+        trade["commissionAsset"],
+    ) for trade in trades]
+
+# --------------------------------------------------------------------------------
+
+# ENREGISTREMENT DES DONNÉES
+
+
+def run(sink=None):
+    sink = sink or get_sink()
+    client = get_client()
+    cursors = Cursors(CURSORS_NAME)
+
+    # myTrades pèse 20 sur les 6000 points/minute du quota Binance
+    limiter = TokenBucket(float(os.getenv("binance_rate_per_minute", 240)))
+
+    pairs = trade_pairs(client, held_assets(client.get_account()), cursors)
+    rows = 0
+    for pair in pairs:
+        last_id = cursors.get(ACCOUNT, pair)
+        with stage("fetch"):
+            trades = fetch_trades(client, pair, 0 if last_id is None else last_id + 1, limiter)
+        if not trades:
+            continue
+        with stage("transform"):
+            df = to_frame(normalise(trades))
+        rows += sink.write(df, TABLE)
+        # Avancer le curseur seulement une fois les trades enregistrés
+        cursors.set(ACCOUNT, pair, max(trade["id"] for trade in trades))
+        print(f"{pair}: {len(trades)} nouveau(x) trade(s)")
+    print(f"{len(pairs)} paire(s) suivie(s), {rows} trade(s) écrit(s)")
+    return rows
@@ -0,0 +1,88 @@
+"""
+Collecteur des soldes du compte Spot Binance (table ``binance_soldewallet``).
+"""
+import os
+from datetime import date
+
+import pandas as pd
+
+from ..asset_mapping import get_index
+from ..balances import filter_balances
+from ..metrics import instrument_session, stage
+from ..sinks import get_sink
+
+TABLE = "binance_soldewallet"
+
+# --------------------------------------------------------------------------------
+
+# PARAMÉTRAGE DE L'API
+
+
+def get_client():
+    # Récupération des clés API depuis les variables d'environnement
+    api_key = os.getenv("binance_api_key")
+    api_secret = os.getenv("binance_api_secret")
+
+    # Import à la demande : le client python-binance est lourd à charger
+    from binance.client import Client
+
+    # Initialisation du client Binance ; ses requêtes ne passent pas par request_with_retry,
+    # elles sont mesurées par un hook de la session
+    client = Client(api_key, api_secret)
+    instrument_session(client.session)
+    return client
+
+
+def fetch(client=None):
+    # Récupération des informations du compte
+    return (client or get_client()).get_account()
+
+# --------------------------------------------------------------------------------
+
+# NETTOYAGE ET PRÉPARATION DES DONNÉES
+
+
+def transform(account, sink=None):
+    # Ne garder que les soldes non nuls et hors poussière (la colonne "locked" n'est pas reprise)
+    balances = filter_balances(account["balances"], 'binance', sink)
+
+    # Récupération des montants
+    df_wallet = pd.DataFrame.from_records(balances, columns=['symbol', 'montant'])
+
+    # Ajouter une colonne date avec la date du jour
+    df_wallet['date'] = date.today()
+
+    # Ajouter une colonne plateforme
+    df_wallet['plateforme'] = 'Binance'
+
+    # Ajouter une colonne protocole
+    df_wallet['protocole'] = None
+
+    # Ajouter une colonne type_position
+    df_wallet['type_position'] = 'wallet'
+
+    # Ajouter une colonne adresse
+    df_wallet['adresse'] = None
+
+    # Réorganiser les colonnes
+    df_wallet = df_wallet.reindex(['date', 'symbol', 'plateforme', 'montant', 'type_position', 'protocole', 'adresse'], axis=1)
+
+    # Symbole canonique via l'index des actifs (LDBTC → BTC, produits Earn compris)
+    df_wallet['symbol'] = get_index().canonical_series('binance', df_wallet['symbol'])
+
+    return df_wallet
+
+# --------------------------------------------------------------------------------
+
+# ENREGISTREMENT DES DONNÉES DANS MYSQL
+
+
+def run(sink=None):
+    sink = sink or get_sink()
+    with stage("fetch"):
+        account = fetch()
+    with stage("transform"):
+        df_wallet = transform(account, sink)
+
+    # Écrire les données dans la table 'binance_soldewallet' (mise à jour des lignes existantes du jour, sans doublon)
+    return sink.write(df_wallet, TABLE)
@@ -0,0 +1,125 @@
+"""
+Collecteur de l'historique des transactions EVM via l'API Zerion (table ``evm_transactions``).
+
+Chaque adresse de ``evm_adresses`` repart de l'horodatage de sa dernière
+transaction enregistrée (filtre ``min_mined_at``) et suit la pagination
+``links.next``. Une ligne est écrite par transfert d'actif (montant négatif en
+sortie) ; les frais de la transaction sont portés par son premier transfert,
+ou par une ligne de montant nul si elle n'en comporte aucun (ex. approve).
+"""
+import os
+from datetime import datetime
+
+from ..fetch import FetchError, TokenBucket, fetch_all, request_with_retry
+from ..metrics import stage
+from ..sinks import get_sink
+from ..transactions import Cursors, to_frame
+from .evm_wallet import get_addresses, make_session
+
+TABLE = "evm_transactions"
+CURSORS_NAME = "evm_transactions_cursors.json"
+
+TRANSACTIONS_URL = "https://api.zerion.io/v1/wallets/{address}/transactions/"
+TRANSACTIONS_PARAMS = {
+    "currency": "usd",
+    "page[size]": 100,
+    "filter[trash]": "only_non_trash",
+}
+
+# --------------------------------------------------------------------------------
+
+# LECTURE INCRÉMENTALE
+
+
+def fetch(session, address, since=None, limiter=None):
+    """Transactions d'une adresse minées à partir de ``since`` (ms), page après page."""
+    transactions = []
+    params = dict(TRANSACTIONS_PARAMS)
+    if since is not None:
+        params["filter[min_mined_at]"] = since
+    url = TRANSACTIONS_URL.format(address=address)
+    while url:
+        response = request_with_retry(session, "GET", url, limiter, params=params)
+        if response.status_code != 200:
+            raise FetchError(f"ERREUR {response.status_code}")
+        json_data = response.json()
+        transactions.extend(json_data["data"])
+        # L'URL de la page suivante contient déjà tous les paramètres
+        url, params = (json_data.get("links") or {}).get("next"), None
+    return transactions
+
+
+def mined_at(transaction):
+    """Horodatage UTC naïf de la transaction."""
+    value = transaction["attributes"]["mined_at"].replace("Z", "+00:00")
+    return datetime.fromisoformat(value).replace(tzinfo=None)
+
+
+def normalise(transactions, address):
+    rows = []
+    for transaction in transactions:
+        attributes = transaction["attributes"]
+        ts = mined_at(transaction)
+        chain = ((transaction.get("relationships") or {}).get("chain") or {}).get("data", {}).get("id")
+        fee = attributes.get("fee") or {}
+        fee_amount = float((fee.get("quantity") or {}).get("numeric") or 0)
+        fee_symbol = (fee.get("fungible_info") or {}).get("symbol")
+        transfers = attributes.get("transfers") or []
+        if not transfers:
+            rows.append((ts, chain, address, fee_symbol, f"{attributes['hash']}:0", attributes['operation_type'],
+                         0.0, None, None, fee_amount, fee_symbol))
+        for i, transfer in enumerate(transfers):
+            quantity = float(transfer["quantity"]["numeric"])
+            rows.append((
+                ts,
+                chain,
+                address,
+                (transfer.get("fungible_info") or {}).get("symbol"),
+                f"{attributes['hash']}:{i}",
+                f"{attributes['operation_type']}:{transfer['direction']}",
+                -quantity if transfer["direction"] == "out" else quantity,
+                transfer.get("price"),
+                transfer.get("value"),
+                fee_amount if i == 0 else 0.0,
+                fee_symbol if i == 0 else None,
+            ))
+    return rows
+
+# --------------------------------------------------------------------------------
+
+# ENREGISTREMENT DES DONNÉES
+
+
+def run(sink=None):
+    sink = sink or get_sink()
+    addresses = get_addresses()
+    cursors = Cursors(CURSORS_NAME)
+
+    nb_threads = int(os.getenv("zerion_threads", 4))
+    session = make_session(nb_threads)
+    limiter = TokenBucket(float(os.getenv("zerion_rate_per_minute", 60)))
+
+    def fetch_address(address):
+        since = cursors.get(address, "*")
+        return fetch(session, address, None if since is None else since + 1, limiter)
+
+    # Récupérer les nouvelles transactions de toutes les adresses en parallèle
+    with stage("fetch"):
+        transactions, failed = fetch_all(addresses, fetch_address, max_workers=nb_threads)
+    for address, error in failed.items():
+        print(f"{address}: ABANDON ({error})")
+
+    rows = 0
+    for address, items in transactions.items():
+        if not items:
+            continue
+        with stage("transform"):
+            df = to_frame(normalise(items, address))
+        rows += sink.write(df, TABLE)
+        # Avancer le curseur (en ms) seulement une fois les transactions enregistrées
+        last = max(mined_at(transaction) for transaction in items)
+        cursors.set(address, "*", int((last - datetime(1970, 1, 1)).total_seconds() * 1000))
+        print(f"{address}: {len(items)} nouvelle(s) transaction(s)")
+    if addresses and failed.keys() == set(addresses):
+        raise FetchError("aucune adresse EVM n'a pu être lue")
+    return rows
@@ -0,0 +1,139 @@
+"""
+Collecteur des positions de portefeuilles EVM via l'API Zerion (table ``evm_soldewallet``).
+
+Toutes les adresses de ``evm_adresses`` sont lues en parallèle sous un même
+limiteur de débit, avec une session HTTP unique (connexions réutilisées), en
+suivant la pagination ``links.next`` jusqu'à la dernière page.
+"""
+import os
+from datetime import date
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from ..asset_mapping import get_index
+from ..fetch import FetchError, TokenBucket, fetch_all, request_with_retry
+from ..metrics import stage
+
+TABLE = "evm_soldewallet"
+
+POSITIONS_URL = "https://api.zerion.io/v1/wallets/{address}/positions/"
+POSITIONS_PARAMS = {
+    "filter[positions]": "no_filter",
+    "currency": "usd",
+    "filter[trash]": "only_non_trash",
+    "sort": "value",
+}
+
+COLUMNS = ['date', 'symbol', 'plateforme', 'montant', 'type_position', 'protocole', 'adresse']
+
+# --------------------------------------------------------------------------------
+
+# PARAMÉTRAGE DE L'API
+
+
+def get_addresses():
+    """Adresses à suivre : ``evm_adresses`` (séparées par des virgules), à défaut ``evm_adress``."""
+    addresses = os.getenv("evm_adresses") or os.getenv("evm_adress") or ""
+    return [address.strip() for address in addresses.split(",") if address.strip()]
+
+
+def make_session(pool_size=8):
+    # Session unique : en-têtes communs et connexions keep-alive partagées entre les threads
+    session = requests.Session()
+    session.headers.update({
+        "accept": "application/json",
+        "authorization": f"Basic {os.getenv('zerion_api_key')}"
+    })
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    return session
+
+
+def fetch(session, address, limiter=None):
+    """Renvoie toutes les positions d'une adresse, page après page."""
+    positions = []
+    url, params = POSITIONS_URL.format(address=address), POSITIONS_PARAMS
+    while url:
+        response = request_with_retry(session, "GET", url, limiter, params=params)
+        if response.status_code != 200:
+            raise FetchError(f"ERREUR {response.status_code}")
+        json_data = response.json()
+        positions.extend(json_data["data"])
+        # L'URL de la page suivante contient déjà tous les paramètres
+        url, params = (json_data.get("links") or {}).get("next"), None
+    return positions
+
+# --------------------------------------------------------------------------------
+
+# NETTOYAGE DES DONNÉES
+
+
+def normalise(positions, address, today=None):
+    """Extrait les seuls champs utiles de chaque position, sans aplatir tout le JSON."""
+    today = today or date.today()
+    rows = []
+    for position in positions:
+        attributes = position["attributes"]
+        rows.append((
+            today,
+            (attributes.get("fungible_info") or {}).get("symbol"),
+            position["relationships"]["chain"]["data"]["id"],
+            float(attributes["quantity"]["numeric"]),
+            attributes["position_type"],
+            attributes.get("protocol"),
+            address,
+        ))
+    return rows
+
+
+def transform(rows):
+    # Imports à la demande : le chemin léger (``light``) s'arrête à ``normalise``
+    import pandas as pd
+
+    from ..classification import sign_loans
+
+    df_EVM = pd.DataFrame.from_records(rows, columns=COLUMNS)
+
+    # Mettre à jour les montants des positions de type 'loan' en négatif
+    df_EVM['montant'] = sign_loans(df_EVM['montant'], df_EVM['type_position'])
+
+    # Symbole canonique via l'index des actifs (USDC.e → USDC)
+    df_EVM['symbol'] = get_index().canonical_series('evm', df_EVM['symbol'])
+
+    return df_EVM
+
+# --------------------------------------------------------------------------------
+
+# ENREGISTREMENT DES DONNÉES DANS MYSQL
+
+
+def fetch_rows():
+    """Positions normalisées (tuples au format de ``COLUMNS``) de toutes les adresses suivies."""
+    # Récupérer les adresses des portefeuilles depuis les variables d'environnement
+    addresses = get_addresses()
+
+    nb_threads = int(os.getenv("zerion_threads", 4))
+    session = make_session(nb_threads)
+    limiter = TokenBucket(float(os.getenv("zerion_rate_per_minute", 60)))
+
+    # Récupérer les positions de toutes les adresses en parallèle (adresses en échec remises en file)
+    with stage("fetch"):
+        positions, failed = fetch_all(addresses, lambda address: fetch(session, address, limiter), max_workers=nb_threads)
+    for address, error in failed.items():
+        print(f"{address}: ABANDON ({error})")
+    if not positions:
+        raise FetchError("aucune adresse EVM n'a pu être lue")
+
+    with stage("transform"):
+        return [row for address, items in positions.items() for row in normalise(items, address)]
+
+
+def run(sink=None):
+    rows = fetch_rows()
+    with stage("transform"):
+        df_EVM = transform(rows)
+
+    # Écrire les données dans la table 'evm_soldewallet' (mise à jour des lignes existantes du jour, sans doublon)
+    from ..sinks import get_sink
+    return (sink or get_sink()).write(df_EVM, TABLE)
\ No newline at end of file
@@ -0,0 +1,143 @@
+"""
+Collecteur de l'historique des trades Spot MEXC (table ``mexc_trades``).
+
+Même principe que pour Binance : les paires suivies sont formées des actifs
+détenus et des devises de cotation ``mexc_quote_assets``, plus celles déjà
+suivies et celles de ``mexc_trade_pairs``. L'API ``myTrades`` se pagine par
+date : chaque paire repart de la milliseconde qui suit la fin de la période
+déjà lue, par pages de 100, en fenêtres ``startTime``/``endTime`` de
+``mexc_trades_window_hours`` heures (24 par défaut) jusqu'à maintenant.
+
+Sans ``startTime``, l'API ne renvoie que les derniers trades : une paire sans
+curseur repart de ``mexc_trades_start`` (date ISO), ou des
+``mexc_trades_history_days`` derniers jours (30 par défaut, l'historique que
+l'API conserve). Les requêtes sont signées comme pour le solde du compte.
+"""
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+import requests
+
+from ..fetch import FetchError, TokenBucket, request_with_retry
+from ..metrics import stage
+from ..sinks import get_sink
+from ..transactions import Cursors, from_millis, to_frame
+from .mexc_wallet import BASE_URL, ENDPOINT, signed_get
+
+TABLE = "mexc_trades"
+CURSORS_NAME = "mexc_trades_cursors.json"
+ACCOUNT = "spot"
+
+TRADES_ENDPOINT = "/api/v3/myTrades"
+EXCHANGE_INFO_ENDPOINT = "/api/v3/exchangeInfo"
+PAGE_SIZE = 100
+DEFAULT_QUOTE_ASSETS = "USDT,USDC"
+DEFAULT_HISTORY_DAYS = 30
+DEFAULT_WINDOW_HOURS = 24
+
+# --------------------------------------------------------------------------------
+
+# CHOIX DES PAIRES
+
+
+def listed_pairs(session, limiter=None):
+    response = request_with_retry(session, "GET", f"{BASE_URL}{EXCHANGE_INFO_ENDPOINT}", limiter)
+    if response.status_code != 200:
+        raise FetchError(f"ERREUR {response.status_code}")
+    return {symbol["symbol"] for symbol in response.json()["symbols"]}
+
+
+def trade_pairs(session, account, cursors, limiter=None):
+    """Paires existantes formées des actifs détenus, plus les paires déjà suivies ou configurées."""
+    quotes = [quote.strip() for quote in os.getenv("mexc_quote_assets", DEFAULT_QUOTE_ASSETS).split(",") if quote.strip()]
+    assets = {balance["asset"] for balance in account["balances"]
+              if float(balance["free"]) + float(balance["locked"]) > 0}
+    candidates = {asset + quote for asset in assets for quote in quotes if asset != quote}
+    configured = {pair.strip() for pair in os.getenv("mexc_trade_pairs", "").split(",") if pair.strip()}
+    return sorted((candidates & listed_pairs(session, limiter)) | set(cursors.symbols(ACCOUNT)) | configured)
+
+# --------------------------------------------------------------------------------
+
+# LECTURE INCRÉMENTALE
+
+
+def history_start(now):
+    """Début (ms) de l'historique d'une paire sans curseur : ``mexc_trades_start`` ou les derniers jours."""
+    start = os.getenv("mexc_trades_start")
+    if not start:
+        days = float(os.getenv("mexc_trades_history_days", DEFAULT_HISTORY_DAYS))
+        return now - int(timedelta(days=days).total_seconds() * 1000)
+    start = datetime.fromisoformat(start)
+    if start.tzinfo is None:
+        start = start.replace(tzinfo=timezone.utc)
+    return int(start.timestamp() * 1000)
+
+
+def fetch_window(session, pair, start_time, end_time, limiter=None):
+    """Trades de ``pair`` entre ``start_time`` et ``end_time`` (ms, inclus), toutes pages confondues."""
+    trades = {}
+    while True:
+        params = {"symbol": pair, "startTime": start_time, "endTime": end_time, "limit": PAGE_SIZE}
+        page = sorted(signed_get(TRADES_ENDPOINT, params, session, limiter), key=lambda trade: trade["time"])
+        trades.update((trade["id"], trade) for trade in page)
+        if len(page) < PAGE_SIZE:
+            return trades
+        # Page pleine : repartir du dernier horodatage vu (une milliseconde plus loin s'il n'a pas bougé)
+        last_time = page[-1]["time"]
+        start_time = last_time if last_time != start_time else last_time + 1
+
+
+def fetch_trades(session, pair, start_time, end_time, limiter=None):
+    """Trades de ``pair`` entre ``start_time`` et ``end_time`` (ms, inclus), fenêtre par fenêtre, sans doublon."""
+    window = int(float(os.getenv("mexc_trades_window_hours", DEFAULT_WINDOW_HOURS)) * 3600 * 1000)
+    trades = {}
+    for window_start in range(start_time, end_time + 1, window):
+        trades.update(fetch_window(session, pair, window_start, min(window_start + window - 1, end_time), limiter))
+    return sorted(trades.values(), key=lambda trade: trade["time"])
+
+
+def normalise(trades):
+    return [(
+        from_millis(trade["time"]),
+        'MEXC',
+        None,
+        trade["symbol"],
+        str(trade["id"]),
+        'BUY' if trade["isBuyer"] else 'SELL',
+        float(trade["qty"]),
+        float(trade["price"]),
+        float(trade["quoteQty"]),
+        float(trade["commission"]),
+        trade["commissionAsset"],
+    ) for trade in trades]
+
+# --------------------------------------------------------------------------------
+
+# ENREGISTREMENT DES DONNÉES
+
+
+def run(sink=None):
+    sink = sink or get_sink()
+    cursors = Cursors(CURSORS_NAME)
+    session = requests.Session()
+    limiter = TokenBucket(float(os.getenv("mexc_rate_per_minute", 300)))
+
+    pairs = trade_pairs(session, signed_get(ENDPOINT, session=session, limiter=limiter), cursors, limiter)
+    # Fin de la période lue, commune à toutes les paires : le curseur d'une paire est le dernier instant lu
+    now = int(time.time() * 1000)
+    rows = 0
+    for pair in pairs:
+        last_time = cursors.get(ACCOUNT, pair)
+        with stage("fetch"):
+            trades = fetch_trades(session, pair, history_start(now) if last_time is None else last_time + 1,
+                                  now, limiter)
+        if trades:
+            with stage("transform"):
+                df = to_frame(normalise(trades))
+            rows += sink.write(df, TABLE)
+            print(f"{pair}: {len(trades)} nouveau(x) trade(s)")
+        # Avancer le curseur seulement une fois les trades enregistrés, même sans trade (période déjà lue)
+        cursors.set(ACCOUNT, pair, now)
+    print(f"{len(pairs)} paire(s) suivie(s), {rows} trade(s) écrit(s)")
+    return rows
@@ -0,0 +1,124 @@
+"""
+Collecteur des soldes du compte Spot MEXC (table ``mexc_soldewallet``).
+"""
+import hashlib
+import hmac
+import os
+import time
+from datetime import date
+from urllib.parse import urlencode
+
+import requests
+
+from ..asset_mapping import get_index
+from ..balances import filter_balances
+from ..fetch import request_with_retry
+from ..metrics import stage
+
+TABLE = "mexc_soldewallet"
+
+# Définir l'endpoint de l'API MEXC
+BASE_URL = "https://api.mexc.com"
+ENDPOINT = "/api/v3/account"
+
+# --------------------------------------------------------------------------------
+
+# PARAMÉTRAGE DE L'API
+
+
+def signed_query(params=None):
+    """Chaîne de requête signée : paramètres, timestamp et signature HMAC SHA256."""
+    secret_key = os.getenv("mexc_secret_key")
+
+    # Générer le timestamp actuel en millisecondes
+    timestamp = int(time.time() * 1000)
+
+    # Construire la chaîne de requête avec le timestamp
+    query_string = urlencode({**(params or {}), "timestamp": timestamp})
+
+    # Générer la signature HMAC SHA256 pour authentifier la requête
+    signature = hmac.new(secret_key.encode('utf-8'), query_string.encode('utf-8'), hashlib.sha256).hexdigest()
+    return f"{query_string}&signature={signature}"
+
+
+def signed_request(method, endpoint, params=None, session=None, limiter=None):
+    """Requête signée vers l'API MEXC (relance sur 429/5xx), renvoie le JSON."""
+    # Construire l'URL finale avec la signature
+    url = f"{BASE_URL}{endpoint}?{signed_query(params)}"
+
+    # Définir les en-têtes de la requête avec la clé API
+    headers = {
+        "X-MEXC-APIKEY": os.getenv("mexc_api_key")
+    }
+
+    # Envoyer la requête à l'API MEXC
+    response = request_with_retry(session or requests.Session(), method, url, limiter, headers=headers)
+
+    # Vérifier la réponse et renvoyer le JSON si la requête est réussie
+    if response.status_code != 200:
+        raise RuntimeError(f"Erreur : {response.status_code}, {response.text}")
+    return response.json()
+
+
+def signed_get(endpoint, params=None, session=None, limiter=None):
+    """Requête GET signée vers l'API MEXC, renvoie le JSON."""
+    return signed_request("GET", endpoint, params, session, limiter)
+
+
+def fetch():
+    # Récupérer le solde du portefeuille
+    return signed_get(ENDPOINT)
+
+# --------------------------------------------------------------------------------
+
+# TRANSFORMATION DES DONNÉES
+
+
+def transform(data, sink=None):
+    # Import à la demande : le chemin léger (``light``) n'utilise que ``fetch``
+    import pandas as pd
+
+    # Ne garder que les soldes non nuls et hors poussière (la colonne 'locked' n'est pas reprise)
+    balances = filter_balances(data["balances"], 'mexc', sink)
+
+    # Convertir les soldes conservés en un DataFrame pandas
+    df_wallet = pd.DataFrame.from_records(balances, columns=['symbol', 'montant'])
+
+    # Ajouter une colonne avec la date actuelle
+    df_wallet['date'] = date.today()
+
+    # Ajouter une colonne indiquant la plateforme
+    df_wallet['plateforme'] = 'MEXC'
+
+    # Ajouter une colonne pour le protocole, initialisée à None
+    df_wallet['protocole'] = None
+
+    # Ajouter une colonne pour le type de position, ici 'wallet'
+    df_wallet['type_position'] = 'wallet'
+
+    # Ajouter une colonne pour l'adresse, initialisée à None
+    df_wallet['adresse'] = None
+
+    # Réorganiser les colonnes
+    df_wallet = df_wallet.reindex(['date', 'symbol', 'plateforme', 'montant', 'type_position', 'protocole', 'adresse'], axis=1)
+
+    # Symbole canonique via l'index des actifs, comme les autres collecteurs
+    df_wallet['symbol'] = get_index().canonical_series('mexc', df_wallet['symbol'])
+
+    return df_wallet
+
+# --------------------------------------------------------------------------------
+
+# ENREGISTREMENT DES DONNÉES DANS MYSQL
+
+
+def run(sink=None):
+    from ..sinks import get_sink
+    sink = sink or get_sink()
+    with stage("fetch"):
+        data = fetch()
+    with stage("transform"):
+        df_wallet = transform(data, sink)
+
+    # Écrire les données dans la table 'mexc_soldewallet' (mise à jour des lignes existantes du jour, sans doublon)
+    return sink.write(df_wallet, TABLE)
@@ -0,0 +1,205 @@
+"""
+Collecteur des prix CoinGecko (table ``crypto_price``).
+
+Deux modes d'ingestion :
+
+- ``markets`` : prix du jour de toutes les cryptos par appels groupés (défaut),
+  tirés d'abord des tickers de Binance et MEXC (``price_sources``), CoinGecko
+  ne recevant que les cryptos qu'aucun échange ne cote ;
+- ``market_chart`` : un appel par crypto, utilisé pour récupérer un historique.
+
+Les autres chemins (``market_chart``, rattrapage, repli intrajournalier)
+écrivent le prix d'ouverture du jour. Le mode ``markets`` n'a que le cours
+instantané : sa ligne est provisoire (``source`` suffixée par ``:spot``),
+remplacée par le prix d'ouverture dès qu'il est écrit, et n'écrase jamais
+un prix d'ouverture déjà connu.
+"""
+import os
+
+import pandas as pd
+import requests
+
+from ..asset_mapping import Liste, get_index
+from ..coingecko import (MARKETS_MAX_PER_PAGE, chunks, fetch_market_chart, fetch_markets,
+                         get_limiter, markets_to_df)
+from ..fetch import fetch_all
+from ..metrics import stage
+from ..price_sources import collect_exchange_prices, get_sources
+from ..schema import SPOT_SUFFIX, is_spot
+from ..sinks import get_sink
+
+TABLE = "crypto_price"
+
+# --------------------------------------------------------------------------------
+
+# PARAMÈTRES DE L'API
+
+# Définir les paramètres pour l'appel à l'API
+currency = 'usd'
+interval = 'daily'
+
+# --------------------------------------------------------------------------------
+
+# MODE "MARKETS" : PRIX DU JOUR PAR APPELS GROUPÉS
+
+
+def ingest_coingecko_markets(session, limiter, ids, index):
+    # Récupérer les données de marché des cryptos demandées, par paquets de 250 ids
+    with stage("fetch"):
+        records = fetch_markets(session, ids, limiter, currency)
+    print(f"{len(records)}/{len(ids)} cryptos récupérées en {len(chunks(ids, MARKETS_MAX_PER_PAGE))} appel(s)")
+
+    # Signaler les cryptos absentes de la réponse
+    for crypto in set(ids) - {record['id'] for record in records}:
+        print(f"{crypto}: ABSENT de la réponse")
+
+    with stage("transform"):
+        # Convertir directement les réponses en DataFrame
+        df_price_symbol = markets_to_df(records)
+
+        # Symbole canonique de chaque id (unique, contrairement au ticker fourni par l'API)
+        df_price_symbol['symbol'] = df_price_symbol['crypto'].map(index.symbols).fillna(df_price_symbol['symbol'])
+
+        # Supprimer la colonne inutile
+        return df_price_symbol.drop(columns=['crypto']).assign(source='coingecko' + SPOT_SUFFIX)
+
+
+def without_final(sink, df):
+    """Cours provisoires des seuls (jour, symbole) sans prix d'ouverture : celui-ci n'est jamais écrasé."""
+    if df.empty or not sink.has_table(TABLE):
+        return df
+    existing = sink.read(TABLE, ['date', 'symbol', 'source'], start=df['date'].min(), end=df['date'].max(),
+                         filters={'symbol': df['symbol'].unique()})
+    final = existing[~existing['source'].map(is_spot)]
+    merged = df.merge(final[['date', 'symbol']].drop_duplicates(), on=['date', 'symbol'], how='left', indicator=True)
+    kept = merged[merged['_merge'] == 'left_only'].drop(columns=['_merge'])
+    if len(kept) < len(df):
+        print(f"{len(df) - len(kept)} prix d'ouverture déjà connus, conservés")
+    return kept
+
+
+def ingest_markets(session, limiter, ids=Liste, sources=None):
+    sources = sources or get_sources()
+    index = get_index(ids, session, limiter)
+
+    # Prix des échanges : un appel par échange pour toutes ses paires
+    with stage("fetch"):
+        df_exchanges = collect_exchange_prices(sources, session, index)
+    wanted = {index.symbols[crypto] for crypto in ids if crypto in index.symbols}
+    df_exchanges = df_exchanges[df_exchanges['symbol'].isin(wanted)]
+
+    # CoinGecko ne reçoit que les cryptos qu'aucun échange ne cote
+    covered = set(df_exchanges['symbol'])
+    remaining = [crypto for crypto in ids if index.symbols.get(crypto) not in covered]
+    if remaining and "coingecko" not in sources:
+        print(f"{len(remaining)} crypto(s) sans prix (CoinGecko absent de price_sources)")
+    if not remaining or "coingecko" not in sources:
+        return df_exchanges.reset_index(drop=True)
+
+    df_coingecko = ingest_coingecko_markets(session, limiter, remaining, index)
+    frames = [df for df in (df_exchanges, df_coingecko) if not df.empty]
+    if not frames:
+        return df_coingecko
+    return pd.concat(frames, ignore_index=True)
+
+# --------------------------------------------------------------------------------
+
+# MODE "MARKET_CHART" : HISTORIQUE CRYPTO PAR CRYPTO
+
+
+# Fonction pour transformer les données JSON en DataFrame
+def create_df(crypto_data, crypto_name):
+    prices = pd.DataFrame(crypto_data['prices'], columns=['timestamp', 'price'])
+    market_caps = pd.DataFrame(crypto_data['market_caps'], columns=['timestamp', 'market_cap'])
+    total_volumes = pd.DataFrame(crypto_data['total_volumes'], columns=['timestamp', 'total_volume'])
+
+    # Fusionner les DataFrames sur le timestamp
+    df = pd.merge(prices, market_caps, on='timestamp', how='outer')
+    df = pd.merge(df, total_volumes, on='timestamp', how='outer')
+
+    # Ajouter une colonne pour le nom de la cryptomonnaie
+    df['crypto'] = crypto_name
+
+    # Convertir le timestamp en date
+    df['date'] = pd.to_datetime(df['timestamp'], unit='ms')
+
+    return df
+
+
+def ingest_market_chart(session, limiter, days_before, ids=Liste):
+    # Correspondance id → symbole canonique, chargée depuis l'index local des actifs
+    symbols = get_index(ids, session, limiter).symbols
+
+    # Fonction pour récupérer les données de marché d'une crypto (avec relance sur 429/5xx)
+    def fetch_crypto(crypto):
+        data = fetch_market_chart(session, crypto, limiter, currency, days_before, interval)
+        with stage("transform"):
+            return create_df(data, crypto)
+
+    # Récupérer les données de marché en parallèle, les cryptos en échec sont remises en file
+    nb_threads = int(os.getenv("coingecko_threads", 4))
+    with stage("fetch"):
+        all_data, failed = fetch_all(ids, fetch_crypto, max_workers=nb_threads)
+
+    # Signaler les cryptos qui restent en échec après toutes les tentatives
+    for crypto, error in failed.items():
+        print(f"{crypto}: ABANDON ({error})")
+
+    with stage("transform"):
+        # Fusionner tous les DataFrames dans all_data en un seul DataFrame
+        final_df = pd.concat(all_data.values(), ignore_index=True)
+
+        # Convertir la colonne 'date' en type datetime
+        final_df['date'] = pd.to_datetime(final_df['date'])
+
+        # Garder uniquement la date (sans l'heure)
+        final_df['date'] = final_df['date'].dt.date
+
+        # Supprimer la colonne 'timestamp'
+        final_df.drop(columns=["timestamp"], inplace=True)
+
+        # Réorganiser les colonnes
+        final_df = final_df.reindex(['date', 'price', 'market_cap', 'total_volume', 'crypto'], axis=1)
+
+        # Ne garder que le premier point de chaque jour (prix d'ouverture)
+        filtered_df = final_df.drop_duplicates(subset=['crypto', 'date'], keep='first').reset_index(drop=True)
+
+        # Symbole canonique de chaque id (pas de jointure sur le ticker, qui n'est pas unique)
+        df_price_symbol = filtered_df.assign(symbol=filtered_df['crypto'].map(symbols)).dropna(subset=['symbol'])
+
+        # Supprimer la colonne inutile
+        df_price_symbol = df_price_symbol.drop(['crypto'], axis=1)
+
+        # Réorganiser les colonnes
+        df_price_symbol = df_price_symbol.reindex(['date', 'symbol', 'price', 'market_cap', 'total_volume'], axis=1)
+
+        # Renommer les colonnes
+        df_price_symbol = df_price_symbol.rename(columns={'price': 'prix'})
+
+        return df_price_symbol.assign(source='coingecko')
+
+# --------------------------------------------------------------------------------
+
+# APPEL À L'API ET ENREGISTREMENT DES DONNÉES DANS MYSQL
+
+
+def run(sink=None, days_before=None, mode=None):
+    days_before = days_before or int(os.getenv("coingecko_days", 1))
+
+    # Mode d'ingestion : "markets" (un appel groupé pour toutes les cryptos) pour le prix du jour,
+    # "market_chart" (un appel par crypto) uniquement pour récupérer un historique
+    mode = mode or os.getenv("coingecko_mode", "markets" if days_before == 1 else "market_chart")
+
+    sink = sink or get_sink()
+
+    # Limiteur réglé sur le quota de l'API (appels/minute) et session HTTP réutilisée
+    limiter = get_limiter()
+    session = requests.Session()
+
+    if mode == "markets":
+        df_price_symbol = without_final(sink, ingest_markets(session, limiter))
+    else:
+        df_price_symbol = ingest_market_chart(session, limiter, days_before)
+
+    # Écrire les données dans la table 'crypto_price' (mise à jour des lignes existantes du jour, sans doublon)
+    return sink.write(df_price_symbol, TABLE)
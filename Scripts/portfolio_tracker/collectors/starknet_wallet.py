@@ -0,0 +1,107 @@
+"""
+Collecteur des portefeuilles Starknet (tables ``starknet_soldewallet`` et
+``starknet_soldewallet_dataviz``).
+
+Deux sources, choisies par la variable ``starknet_source`` :
+
+- ``rpc`` (défaut) : soldes lus par lots JSON-RPC ``starknet_call`` ;
+- ``scraper`` : page du portfolio Argent rendue avec Selenium (solution de repli).
+"""
+import os
+from datetime import date
+
+import pandas as pd
+
+from ..asset_mapping import get_index
+from ..classification import classify_positions
+from ..metrics import stage
+from ..sinks import get_sink
+from ..starknet_rpc import fetch_balances, get_addresses
+
+TABLE = "starknet_soldewallet"
+TABLE_DATAVIZ = "starknet_soldewallet_dataviz"
+
+# --------------------------------------------------------------------------------
+
+# LECTURE DES SOLDES PAR JSON-RPC
+
+
+def read_rpc(addresses):
+    # Lire les soldes de tous les jetons pour toutes les adresses, par lots d'appels
+    rows = fetch_balances(addresses)
+    print(f"{len(rows)} soldes non nuls lus pour {len(addresses)} adresse(s)")
+    return [pd.DataFrame(rows, columns=['symbol', 'montant', 'adresse'])]
+
+# --------------------------------------------------------------------------------
+
+# LECTURE DU PORTFOLIO ARGENT AVEC SELENIUM (SOLUTION DE REPLI)
+
+
+def read_scraper(addresses):
+    # Import à la demande : Selenium n'est nécessaire que pour cette source
+    from ..argent_scraper import scrape_all
+
+    # Un seul navigateur pour toutes les adresses
+    return scrape_all(addresses, timeout=float(os.getenv("starknet_scraper_timeout", 15)))
+
+# --------------------------------------------------------------------------------
+
+# FUSION ET TRANSFORMATION DES DONNÉES
+
+
+def transform(frames):
+    # Fusionner les DataFrames des portefeuilles
+    df_argent_braavos = pd.concat(frames, axis=0, ignore_index=True)
+
+    # Ajouter une colonne avec la date actuelle
+    df_argent_braavos['date'] = date.today()
+
+    # Ajouter une colonne indiquant la plateforme (StarkNet)
+    df_argent_braavos['plateforme'] = 'starknet'
+
+    # Initialiser la colonne 'protocole' avec une chaîne vide
+    df_argent_braavos['protocole'] = ''
+
+    # Déterminer le type de position en fonction du symbole et du montant (staked, deposit, loan, wallet)
+    df_argent_braavos['type_position'] = classify_positions(df_argent_braavos['symbol'], df_argent_braavos['montant'])
+
+    # Réorganiser les colonnes pour un format cohérent
+    df_argent_braavos = df_argent_braavos.reindex(['date', 'symbol', 'plateforme', 'montant', 'type_position', 'protocole', 'adresse'], axis=1)
+
+    # PRÉPARATION DES DONNÉES POUR LA VISUALISATION
+
+    # Dupliquer le DataFrame pour créer une version adaptée à la visualisation
+    df_argent_braavos_dataviz = df_argent_braavos.copy()
+
+    # Symbole canonique via l'index des actifs (ex: xSTRK = STRK, wstETH = WSTETH) pour la jointure avec une table de prix
+    df_argent_braavos_dataviz['symbol'] = get_index().canonical_series('starknet', df_argent_braavos_dataviz['symbol'])
+
+    return df_argent_braavos, df_argent_braavos_dataviz
+
+# --------------------------------------------------------------------------------
+
+# ENREGISTREMENT DES DONNÉES DANS MYSQL
+
+
+def run(sink=None, source=None):
+    # Récupérer les adresses des portefeuilles depuis les variables d'environnement
+    addresses = get_addresses()
+
+    source = source or os.getenv("starknet_source", "rpc")
+    with stage("fetch"):
+        if source == "rpc":
+            frames = read_rpc(addresses)
+        else:
+            frames = read_scraper(addresses)
+
+    with stage("transform"):
+        df_argent_braavos, df_argent_braavos_dataviz = transform(frames)
+
+    sink = sink or get_sink()
+
+    # Écrire les données dans la table 'starknet_soldewallet' (mise à jour des lignes existantes du jour, sans doublon)
+    rows = sink.write(df_argent_braavos, TABLE)
+
+    # Écrire les données adaptées pour la visualisation dans une autre table
+    rows += sink.write(df_argent_braavos_dataviz, TABLE_DATAVIZ)
+    return rows
@@ -0,0 +1,26 @@
+"""
+Emplacements locaux partagés (caches, points de reprise, données locales).
+"""
+import os
+from pathlib import Path
+
+# Dossier des caches locaux, réglable via la variable d'environnement ``portfolio_cache_dir``
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent.parent / ".cache"
+
+
+def cache_path(name):
+    """Chemin d'un fichier dans le dossier de cache (créé au besoin)."""
+    cache_dir = Path(os.getenv("portfolio_cache_dir", DEFAULT_CACHE_DIR))
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return cache_dir / name
+
+
+# Dossier des données locales (stockage Parquet), réglable via ``portfolio_data_dir``
+DEFAULT_DATA_DIR = Path(__file__).resolve().parent.parent / ".data"
+
+
+def data_path(name):
+    """Chemin d'un fichier ou dossier dans le dossier des données locales (créé au besoin)."""
+    data_dir = Path(os.getenv("portfolio_data_dir", DEFAULT_DATA_DIR))
+    data_dir.mkdir(parents=True, exist_ok=True)
+    return data_dir / name
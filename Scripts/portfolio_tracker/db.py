@@ -0,0 +1,282 @@
+"""
+Connexion à la base et écriture idempotente des DataFrames.
+
+``upsert`` remplace ``to_sql(if_exists="append")`` : les lignes sont insérées
+par paquets en ``INSERT ... VALUES (...), (...) ON DUPLICATE KEY UPDATE`` sur
+la clé naturelle de la table, si bien qu'une relance le même jour met à jour
+les lignes existantes au lieu de les dupliquer.
+"""
+import os
+
+import pandas as pd
+from sqlalchemy import Boolean, Date, DateTime, Float, MetaData, String, Table, Text, create_engine, inspect, text
+
+from .schema import SUM_COLUMNS, natural_key
+
+DEFAULT_BATCH_SIZE = 1000
+
+# Longueur indexée des colonnes texte (MySQL n'indexe un TEXT que sur un préfixe)
+TEXT_INDEX_LENGTH = 100
+
+
+def get_engine(**kwargs):
+    """Crée le moteur MySQL à partir des variables d'environnement ``db_*``."""
+    db_username = os.getenv("db_username")
+    db_password = os.getenv("db_password")
+    db_name = os.getenv("db_name")
+    db_host = os.getenv("db_host")
+    db_port = os.getenv("db_port")
+    url = os.getenv("db_url", f"mysql+pymysql://{db_username}:{db_password}@{db_host}:{db_port}/{db_name}")
+    return create_engine(url, pool_pre_ping=True, **kwargs)
+
+
+# --------------------------------------------------------------------------------
+
+# CRÉATION DE LA TABLE, INDEX UNIQUE ET MIGRATION
+
+
+def index_name(table):
+    return f"uq_{table}_natural_key"
+
+
+def has_unique_key(inspector, table, key):
+    indexes = [index['column_names'] for index in inspector.get_indexes(table) if index.get('unique')]
+    indexes += [constraint['column_names'] for constraint in inspector.get_unique_constraints(table)]
+    return any(set(columns) == set(key) for columns in indexes)
+
+
+def column_types(df, key):
+    """
+    Types SQL des colonnes non numériques, déduits des valeurs : la table est créée à
+    partir d'un DataFrame vide, où pandas n'a plus rien pour les reconnaître
+    (une colonne de ``datetime.date`` deviendrait TEXT).
+    """
+    dtype = {}
+    for column in df.columns:
+        if pd.api.types.is_datetime64_any_dtype(df[column]):
+            dtype[column] = DateTime()
+            continue
+        if pd.api.types.is_numeric_dtype(df[column]) or pd.api.types.is_bool_dtype(df[column]):
+            continue
+        kind = pd.api.types.infer_dtype(df[column], skipna=True)
+        if kind == 'date':
+            dtype[column] = Date()
+        elif kind in ('datetime', 'datetime64'):
+            dtype[column] = DateTime()
+        elif kind in ('floating', 'integer', 'mixed-integer-float', 'decimal'):
+            dtype[column] = Float()
+        elif kind == 'boolean':
+            dtype[column] = Boolean()
+        else:
+            # VARCHAR indexable pour la clé, TEXT sinon
+            dtype[column] = String(TEXT_INDEX_LENGTH) if column in key else Text()
+    return dtype
+
+
+def create_table(engine, table, df, key):
+    """Crée la table à partir du DataFrame, avec les types déduits de ses valeurs."""
+    df.head(0).to_sql(table, con=engine, index=False, dtype=column_types(df, key))
+
+
+def key_parts(engine, table, key, columns):
+    """Colonnes de l'index, avec un préfixe indexé pour les TEXT sous MySQL."""
+    quote = engine.dialect.identifier_preparer.quote
+    parts = []
+    for column in key:
+        length = f"({TEXT_INDEX_LENGTH})" if engine.dialect.name == "mysql" and "TEXT" in str(columns[column]).upper() else ""
+        parts.append(f"{quote(column)}{length}")
+    return ", ".join(parts)
+
+
+def create_unique_key(engine, table, key):
+    """Crée l'index unique d'une table qui vient d'être créée (donc vide)."""
+    columns = {column['name']: column['type'] for column in inspect(engine).get_columns(table)}
+    quote = engine.dialect.identifier_preparer.quote
+    with engine.begin() as conn:
+        conn.execute(text(f"CREATE UNIQUE INDEX {quote(index_name(table))} ON {quote(table)} "
+                          f"({key_parts(engine, table, key, columns)})"))
+
+
+def check_unique_key(engine, table, key):
+    """
+    Refuse d'écrire dans une table existante sans index unique sur la clé :
+    l'upsert y ajouterait des doublons. La migration est explicite (``migrate``).
+    """
+    if not has_unique_key(inspect(engine), table, key):
+        raise RuntimeError(f"{table}: pas d'index unique sur ({', '.join(key)}) ; "
+                           f"lancer d'abord « python -m portfolio_tracker migrate {table} »")
+
+
+def migrate_unique_key(engine, table, key):
+    """
+    Dédoublonne une table historique (alimentée en mode append) et crée son
+    index unique. Renvoie le nombre de lignes (avant, après).
+
+    Les NULL de la clé deviennent '' comme dans ``prepare_frame`` (MySQL
+    considère deux NULL comme distincts) et, entre doublons, la ligne écrite
+    en dernier est conservée.
+
+    - SQLite : en place, dans une seule transaction ;
+    - MySQL : les DDL valident implicitement, une transaction ne protège donc
+      rien. Les lignes sont copiées dans ``<table>_dedup`` (supprimée en cas
+      d'échec), la table d'origine n'est pas modifiée, puis les deux tables
+      sont échangées par un seul ``RENAME TABLE``, atomique.
+    """
+    inspector = inspect(engine)
+    if has_unique_key(inspector, table, key):
+        return None
+    columns = {column['name']: column['type'] for column in inspector.get_columns(table)}
+    quote = engine.dialect.identifier_preparer.quote
+    key_sql = ", ".join(quote(column) for column in key)
+    count = f"SELECT COUNT(*) FROM {quote(table)}"
+
+    if engine.dialect.name == "sqlite":
+        with engine.begin() as conn:
+            before = conn.execute(text(count)).scalar()
+            for column in key:
+                if column != 'date':
+                    conn.execute(text(f"UPDATE {quote(table)} SET {quote(column)} = '' WHERE {quote(column)} IS NULL"))
+            conn.execute(text(f"DELETE FROM {quote(table)} WHERE rowid NOT IN "
+                              f"(SELECT MAX(rowid) FROM {quote(table)} GROUP BY {key_sql})"))
+            conn.execute(text(f"CREATE UNIQUE INDEX {quote(index_name(table))} ON {quote(table)} ({key_sql})"))
+            return before, conn.execute(text(count)).scalar()
+
+    if engine.dialect.name != "mysql":
+        raise NotImplementedError(f"migration non supportée pour le dialecte {engine.dialect.name}")
+
+    tmp, old = f"{table}_dedup", f"{table}_old"
+    if inspector.has_table(old):
+        raise RuntimeError(f"{old} existe déjà (migration précédente) : la vérifier et la supprimer avant de relancer")
+    names = ", ".join(quote(column) for column in columns)
+    select = ", ".join(f"COALESCE({quote(column)}, '') AS {quote(column)}" if column in key and column != 'date'
+                       else quote(column) for column in columns)
+    # Parcours dans l'ordre d'insertion (table sans clé primaire) : la dernière ligne écrase les précédentes
+    updates = ", ".join(f"{quote(column)} = VALUES({quote(column)})"
+                        for column in [column for column in columns if column not in key] or key[:1])
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        before = conn.execute(text(count)).scalar()
+        # Reste d'une migration interrompue avant l'échange : la table d'origine est intacte
+        conn.execute(text(f"DROP TABLE IF EXISTS {quote(tmp)}"))
+        conn.execute(text(f"CREATE TABLE {quote(tmp)} LIKE {quote(table)}"))
+        try:
+            conn.execute(text(f"ALTER TABLE {quote(tmp)} ADD UNIQUE INDEX {quote(index_name(table))} "
+                              f"({key_parts(engine, table, key, columns)})"))
+            conn.execute(text(f"INSERT INTO {quote(tmp)} ({names}) SELECT {select} FROM {quote(table)} "
+                              f"ON DUPLICATE KEY UPDATE {updates}"))
+            conn.execute(text(f"RENAME TABLE {quote(table)} TO {quote(old)}, {quote(tmp)} TO {quote(table)}"))
+        except Exception:
+            conn.execute(text(f"DROP TABLE IF EXISTS {quote(tmp)}"))
+            raise
+        conn.execute(text(f"DROP TABLE {quote(old)}"))
+        return before, conn.execute(text(count)).scalar()
+
+
+def ensure_columns(engine, table, df):
+    """Ajoute à une table existante les colonnes du DataFrame qui lui manquent (ex. ``source``)."""
+    existing = {column['name'] for column in inspect(engine).get_columns(table)}
+    missing = [column for column in df.columns if column not in existing]
+    if not missing:
+        return
+    quote = engine.dialect.identifier_preparer.quote
+    print(f"{table}: ajout des colonnes {', '.join(missing)}")
+    with engine.begin() as conn:
+        for column in missing:
+            column_type = Float() if pd.api.types.is_numeric_dtype(df[column]) else Text()
+            conn.execute(text(f"ALTER TABLE {quote(table)} ADD COLUMN {quote(column)} "
+                              f"{column_type.compile(dialect=engine.dialect)}"))
+
+
+def ensure_index(engine, table, columns, name=None):
+    """Crée un index (non unique) sur ``columns`` s'il n'en existe aucun avec ces colonnes."""
+    inspector = inspect(engine)
+    if any(index['column_names'] == list(columns) for index in inspector.get_indexes(table)):
+        return
+    types = {column['name']: column['type'] for column in inspector.get_columns(table)}
+    quote = engine.dialect.identifier_preparer.quote
+    parts = []
+    for column in columns:
+        length = f"({TEXT_INDEX_LENGTH})" if engine.dialect.name == "mysql" and "TEXT" in str(types[column]).upper() else ""
+        parts.append(f"{quote(column)}{length}")
+    name = name or f"ix_{table}_{'_'.join(columns)}"
+    print(f"{table}: création de l'index {name}")
+    with engine.begin() as conn:
+        conn.execute(text(f"CREATE INDEX {quote(name)} ON {quote(table)} ({', '.join(parts)})"))
+
+
+# --------------------------------------------------------------------------------
+
+# ÉCRITURE PAR PAQUETS
+
+
+def prepare_frame(df, key, sum_columns=None):
+    """Remplace les NULL de la clé par '' et fusionne les lignes qui partagent la clé."""
+    df = df.copy()
+    for column in key:
+        if column != 'date':
+            df[column] = df[column].fillna('')
+    if sum_columns:
+        # Une somme de valeurs toutes manquantes reste manquante (min_count=1)
+        grouped = df.groupby(key, sort=False, dropna=False)
+        result = grouped[sum_columns].sum(min_count=1)
+        others = [column for column in df.columns if column not in key and column not in sum_columns]
+        if others:
+            result = result.join(grouped[others].last())
+        df = result.reset_index().reindex(df.columns, axis=1)
+    else:
+        df = df.drop_duplicates(subset=key, keep='last')
+    return df
+
+
+def build_upsert(engine, table_obj, key, columns):
+    update_columns = [column for column in columns if column not in key]
+    if engine.dialect.name == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+        stmt = insert(table_obj)
+        # Sans colonne hors clé, on réaffecte la clé pour obtenir un « INSERT IGNORE » sans avertissement
+        updates = {column: stmt.inserted[column] for column in (update_columns or key[:1])}
+        return stmt.on_duplicate_key_update(updates)
+    if engine.dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    elif engine.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        raise NotImplementedError(f"upsert non supporté pour le dialecte {engine.dialect.name}")
+    stmt = insert(table_obj)
+    if not update_columns:
+        return stmt.on_conflict_do_nothing(index_elements=key)
+    return stmt.on_conflict_do_update(index_elements=key, set_={column: stmt.excluded[column] for column in update_columns})
+
+
+def upsert(df, table, engine, key=None, batch_size=None, sum_columns=None):
+    """
+    Écrit ``df`` dans ``table`` sans créer de doublons sur la clé naturelle.
+
+    La table et son index unique sont créés s'ils manquent, de même que les
+    colonnes absentes d'une table existante ; une table existante sans index
+    unique doit d'abord passer par ``migrate_unique_key``. Les lignes sont
+    envoyées par paquets de ``batch_size`` (variable ``db_batch_size``) en un
+    seul ``INSERT`` multi-lignes chacun. Renvoie le nombre de lignes écrites.
+    """
+    key = key or natural_key(table)
+    sum_columns = SUM_COLUMNS.get(table) if sum_columns is None else sum_columns
+    batch_size = batch_size or int(os.getenv("db_batch_size", DEFAULT_BATCH_SIZE))
+    if df.empty:
+        return 0
+    df = prepare_frame(df, key, sum_columns)
+
+    if not inspect(engine).has_table(table):
+        create_table(engine, table, df, key)
+        create_unique_key(engine, table, key)
+    else:
+        ensure_columns(engine, table, df)
+        check_unique_key(engine, table, key)
+
+    table_obj = Table(table, MetaData(), autoload_with=engine)
+    stmt = build_upsert(engine, table_obj, key, df.columns)
+
+    # Conversion en types Python natifs (NaN → NULL)
+    records = df.astype(object).where(df.notna(), None).to_dict('records')
+    with engine.begin() as conn:
+        for start in range(0, len(records), batch_size):
+            conn.execute(stmt.values(records[start:start + batch_size]))
+    return len(records)
@@ -0,0 +1,178 @@
+"""
+Moteur de récupération HTTP partagé par les collecteurs.
+
+- ``TokenBucket`` : limiteur de débit réglé sur le quota de l'API (appels/minute),
+  partagé entre tous les threads d'un même collecteur.
+- ``request_with_retry`` : relance les réponses 429/5xx avec un backoff
+  exponentiel qui respecte l'en-tête ``Retry-After`` quand il est présent.
+- ``fetch_all`` : exécute les appels dans un pool de threads et remet en file
+  les éléments en échec au lieu de les abandonner.
+
+Les requêtes, les 429 et les attentes sont comptés par ``metrics``.
+"""
+import contextvars
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import requests
+
+from . import metrics
+
+# Codes HTTP pour lesquels une nouvelle tentative a du sens
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class FetchError(Exception):
+    """Erreur levée quand une ressource ne peut pas être récupérée."""
+
+
+# --------------------------------------------------------------------------------
+
+# LIMITEUR DE DÉBIT
+
+
+class TokenBucket:
+    """
+    Limiteur « token bucket » thread-safe.
+
+    ``rate_per_minute`` jetons sont ajoutés par minute, jusqu'à ``burst`` jetons
+    en réserve. Chaque appel à ``acquire`` consomme un jeton et attend si le
+    seau est vide. ``pause`` bloque tous les threads (ex. après un 429).
+    """
+
+    def __init__(self, rate_per_minute, burst=1):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._last = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if now < self._blocked_until:
+                    wait = self._blocked_until - now
+                elif self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                else:
+                    wait = (1 - self._tokens) / self.rate
+            metrics.record_sleep(wait)
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+
+
+# --------------------------------------------------------------------------------
+
+# REQUÊTES AVEC RELANCE
+
+
+def retry_after_seconds(response):
+    """Durée d'attente demandée par l'en-tête ``Retry-After`` (secondes ou date HTTP)."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def backoff_delay(attempt, base=1.0, maximum=60.0):
+    """Backoff exponentiel avec un peu d'aléa pour éviter les relances synchronisées."""
+    return min(maximum, base * 2 ** attempt) * (0.5 + random.random() / 2)
+
+
+def request_with_retry(session, method, url, limiter=None, max_retries=5,
+                       backoff=1.0, max_backoff=60.0, timeout=30, **kwargs):
+    """
+    Envoie une requête en respectant le limiteur et relance les 429/5xx.
+
+    Renvoie la dernière réponse obtenue : c'est à l'appelant de vérifier
+    ``status_code`` une fois les relances épuisées.
+    """
+    for attempt in range(max_retries + 1):
+        if limiter is not None:
+            limiter.acquire()
+        start = time.perf_counter()
+        try:
+            response = session.request(method, url, timeout=timeout, **kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            metrics.record_error(time.perf_counter() - start)
+            if attempt == max_retries:
+                raise
+            delay = backoff_delay(attempt, backoff, max_backoff)
+        else:
+            metrics.record_response(response, time.perf_counter() - start)
+            if response.status_code not in RETRY_STATUS or attempt == max_retries:
+                return response
+            delay = retry_after_seconds(response)
+            if delay is None:
+                delay = backoff_delay(attempt, backoff, max_backoff)
+            # Un 429 concerne tout le quota : on met en pause tous les threads
+            if response.status_code == 429 and limiter is not None:
+                limiter.pause(delay)
+        metrics.record_sleep(delay)
+        time.sleep(delay)
+
+
+# --------------------------------------------------------------------------------
+
+# EXÉCUTION CONCURRENTE
+
+
+def fetch_all(items, fetch_one, max_workers=4, max_rounds=3, on_result=None):
+    """
+    Appelle ``fetch_one(item)`` pour chaque élément dans un pool de threads.
+
+    Les éléments en échec sont remis en file et retentés lors du tour suivant,
+    jusqu'à ``max_rounds`` tours. Renvoie ``(résultats, échecs)`` : deux
+    dictionnaires indexés par élément, les résultats dans l'ordre d'entrée.
+
+    Si ``on_result(item, résultat)`` est fourni, il est appelé dans le thread
+    principal au fil de l'eau et les résultats ne sont pas conservés.
+    """
+    items = list(items)
+    results = {}
+    errors = {}
+    pending = items
+    for _ in range(max_rounds):
+        if not pending:
+            break
+        failed = []
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            # Chaque tâche hérite du contexte courant (collecteur auquel attribuer les mesures)
+            futures = {pool.submit(contextvars.copy_context().run, fetch_one, item): item for item in pending}
+            for future in as_completed(futures):
+                item = futures[future]
+                try:
+                    results[item] = future.result()
+                except Exception as exc:
+                    errors[item] = exc
+                    failed.append(item)
+                    print(f"{item}: ERREUR ({exc}), remis en file")
+                else:
+                    errors.pop(item, None)
+                    print(f"{item}: OK")
+                    if on_result is not None:
+                        on_result(item, results.pop(item))
+        pending = failed
+    ordered = {item: results[item] for item in items if item in results}
+    return ordered, {item: errors[item] for item in pending}
@@ -0,0 +1,309 @@
+"""
+Mode intrajournalier : relevés fréquents des soldes Binance, MEXC et des prix.
+
+Un ordonnanceur ``asyncio`` unique interroge chaque source toutes les
+``intraday_interval`` secondes (300 par défaut). Les appels bloquants tournent
+dans des threads (``asyncio.to_thread``) pour que les sources ne s'attendent
+pas entre elles.
+
+Les relevés sont horodatés et partitionnés par jour, une table par jour :
+
+- ``intraday_balance_AAAAMMJJ`` : (ts, plateforme, symbol, montant) ;
+- ``intraday_price_AAAAMMJJ`` : (ts, symbol, prix, market_cap, total_volume, source).
+
+Seules les valeurs qui ont changé depuis le relevé précédent sont écrites ;
+un solde disparu est écrit à 0. Le premier relevé de chaque jour est complet,
+si bien que chaque partition se suffit à elle-même : l'état à l'instant t est
+la dernière ligne de chaque clé avant t.
+
+Les partitions sont écrites dans la destination configurée (``sinks``) : une
+table SQL par jour, ou un dossier Parquet par jour avec ``portfolio_sink=parquet``
+(aucune base n'est alors nécessaire). La tâche de rétention replie celles plus
+anciennes que ``intraday_retention_days`` jours (7 par défaut) dans les tables
+quotidiennes (solde de clôture, prix d'ouverture, sans écraser les lignes déjà
+collectées), puis supprime la partition du jour entier.
+"""
+import asyncio
+import os
+import re
+import time
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+import requests
+
+from .metrics import collector, record_rows
+from .schema import SPOT_SUFFIX, is_spot
+from .sinks import get_sink
+
+BALANCE_PREFIX = "intraday_balance"
+PRICE_PREFIX = "intraday_price"
+
+DEFAULT_INTERVAL = 300
+DEFAULT_RETENTION_DAYS = 7
+DEFAULT_ROLLUP_INTERVAL = 3600
+
+# Tables quotidiennes alimentées par le repli des soldes, selon la plateforme
+DAILY_BALANCE_TABLES = {"Binance": "binance_soldewallet", "MEXC": "mexc_soldewallet"}
+DAILY_PRICE_TABLE = "crypto_price"
+
+SOURCES = ["binance", "mexc", "prices"]
+
+# --------------------------------------------------------------------------------
+
+# PARTITIONS JOURNALIÈRES
+
+
+def partition_table(prefix, day):
+    return f"{prefix}_{day:%Y%m%d}"
+
+
+def list_partitions(sink, prefix):
+    """Partitions existantes d'une table intrajournalière : {jour: nom de table}."""
+    pattern = re.compile(rf"^{prefix}_(\d{{8}})$")
+    partitions = {}
+    for table in sink.tables(prefix):
+        match = pattern.match(table)
+        if match:
+            partitions[datetime.strptime(match.group(1), "%Y%m%d").date()] = table
+    return partitions
+
+
+def last_rows(df, key):
+    """Dernière ligne de chaque clé, dans l'ordre des horodatages."""
+    return df.sort_values('ts', kind='stable').drop_duplicates(subset=key, keep='last')
+
+
+def load_state(sink, table, key, value, scope):
+    """État courant d'une partition (dernière valeur de chaque clé) pour les lignes de ``scope``."""
+    if not sink.has_table(table):
+        return {}
+    df = sink.read(table, ['ts'] + key + [value], filters={column: [scope[column]] for column in scope})
+    df = last_rows(df, key)
+    return dict(zip(df[key].itertuples(index=False, name=None), df[value]))
+
+# --------------------------------------------------------------------------------
+
+# RELEVÉS EN DELTA
+
+
+class SnapshotJob:
+    """
+    Relevé d'une source : ``read()`` renvoie un DataFrame contenant les colonnes
+    ``key`` et ``value`` (plus d'éventuelles colonnes annexes). Seules les lignes
+    dont la valeur a changé sont écrites dans la partition du jour.
+    """
+
+    def __init__(self, name, read, prefix, key, value, scope=None, zero_missing=False, sink=None):
+        self.name = name
+        self.read = read
+        self.prefix = prefix
+        self.key = key
+        self.value = value
+        self.scope = scope or {}
+        self.zero_missing = zero_missing
+        self.sink = sink
+        self.table = None
+        self.state = {}
+
+    def changes(self, df):
+        """Lignes nouvelles ou modifiées, et lignes à 0 pour les clés disparues."""
+        keys = list(df[self.key].itertuples(index=False, name=None))
+        current = set(keys)
+        known = pd.Series([k in self.state for k in keys], index=df.index, dtype=bool)
+        previous = pd.Series([self.state.get(k) for k in keys], index=df.index, dtype=float)
+        values = df[self.value].astype(float)
+        # Égalité qui tient compte des NaN : un prix manquant resté manquant n'est pas réécrit
+        same = (previous == values) | (previous.isna() & values.isna())
+        changed = df[~known | ~same]
+        if self.zero_missing:
+            gone = [k for k, v in self.state.items() if v and k not in current]
+            if gone:
+                zeros = pd.DataFrame(gone, columns=self.key).assign(**{self.value: 0.0})
+                changed = pd.concat([changed, zeros], ignore_index=True)
+        return changed
+
+    def run_once(self, now=None):
+        now = now or datetime.now().replace(microsecond=0)
+        table = partition_table(self.prefix, now.date())
+        if table != self.table:
+            # Nouvelle partition : état relu en base (relance en cours de journée), relevé complet sinon
+            self.table = table
+            self.state = load_state(self.sink, table, self.key, self.value, self.scope)
+
+        df = self.read()
+        changed = self.changes(df)
+        if changed.empty:
+            return 0
+        # La colonne date (jour de la partition) sert au partitionnement Parquet
+        changed = changed.assign(date=now.date(), ts=pd.Timestamp(now))
+        rows = self.sink.write(changed, table)
+        self.state.update(zip(changed[self.key].itertuples(index=False, name=None), changed[self.value]))
+        return rows
+
+
+def balance_reader(collector, sink):
+    """Lecture des soldes d'un compte d'échange avec le ``fetch``/``transform`` du collecteur quotidien."""
+    def read():
+        df = collector.transform(collector.fetch(), sink)
+        # Plusieurs symboles bruts peuvent donner le même symbole canonique (BTC et LDBTC)
+        return df.groupby(['plateforme', 'symbol'], as_index=False)['montant'].sum()
+    return read
+
+
+def price_reader():
+    from .coingecko import get_limiter
+    from .collectors.prices import ingest_markets
+    session, limiter = requests.Session(), get_limiter()
+
+    def read():
+        return ingest_markets(session, limiter).drop(columns=['date'])
+    return read
+
+
+def make_jobs(sources, sink):
+    jobs = []
+    for source in sources:
+        if source == "binance":
+            from .collectors import binance_wallet
+            jobs.append(SnapshotJob(source, balance_reader(binance_wallet, sink), BALANCE_PREFIX,
+                                    ['plateforme', 'symbol'], 'montant', {'plateforme': 'Binance'}, True, sink))
+        elif source == "mexc":
+            from .collectors import mexc_wallet
+            jobs.append(SnapshotJob(source, balance_reader(mexc_wallet, sink), BALANCE_PREFIX,
+                                    ['plateforme', 'symbol'], 'montant', {'plateforme': 'MEXC'}, True, sink))
+        elif source == "prices":
+            jobs.append(SnapshotJob(source, price_reader(), PRICE_PREFIX, ['symbol'], 'prix', sink=sink))
+        else:
+            raise ValueError(f"source intrajournalière inconnue : {source}")
+    return jobs
+
+# --------------------------------------------------------------------------------
+
+# REPLI DANS LES TABLES QUOTIDIENNES ET RÉTENTION
+
+
+def missing_rows(sink, table, df, key, replace_spot=False):
+    """
+    Lignes de ``df`` dont la clé est absente de ``table`` (les données collectées ne sont pas écrasées).
+    Avec ``replace_spot``, une ligne existante provisoire (cours instantané) compte comme absente.
+    """
+    if df.empty or not sink.has_table(table):
+        return df
+    days = sorted(df['date'].unique())
+    existing = sink.read(table, key + (['source'] if replace_spot else []), start=days[0], end=days[-1])
+    if replace_spot:
+        existing = existing[~existing['source'].map(is_spot)][key]
+    merged = df.merge(existing.drop_duplicates(), on=key, how='left', indicator=True)
+    return merged[merged['_merge'] == 'left_only'].drop(columns=['_merge'])
+
+
+def rollup_balances(sink, day, table):
+    """Solde de clôture du jour de chaque (plateforme, symbole), écrit dans les tables quotidiennes."""
+    df = last_rows(sink.read(table, ['ts', 'plateforme', 'symbol', 'montant']), ['plateforme', 'symbol'])
+    df = df[df['montant'] != 0]
+    rows = 0
+    for plateforme, group in df.groupby('plateforme'):
+        daily_table = DAILY_BALANCE_TABLES.get(plateforme)
+        if daily_table is None:
+            continue
+        group = group.assign(date=day, type_position='wallet', protocole=None, adresse=None)
+        group = group.reindex(['date', 'symbol', 'plateforme', 'montant', 'type_position', 'protocole', 'adresse'], axis=1)
+        rows += sink.write(missing_rows(sink, daily_table, group, ['date', 'symbol', 'plateforme']), daily_table)
+    return rows
+
+
+def rollup_prices(sink, day, table):
+    """
+    Premier prix du jour de chaque symbole (prix d'ouverture, comme le mode ``market_chart``),
+    qui remplace un cours provisoire du même jour.
+    """
+    df = sink.read(table)
+    df = df.sort_values('ts', kind='stable').drop_duplicates(subset=['symbol'], keep='first')
+    df = df.assign(date=day, source=df['source'].str.removesuffix(SPOT_SUFFIX))
+    df = df.reindex(['date', 'symbol', 'prix', 'market_cap', 'total_volume', 'source'], axis=1)
+    return sink.write(missing_rows(sink, DAILY_PRICE_TABLE, df, ['date', 'symbol'], replace_spot=True), DAILY_PRICE_TABLE)
+
+
+def run_retention(sink=None, retention_days=None, today=None):
+    """Replie puis supprime les partitions plus anciennes que la durée de rétention."""
+    sink = sink or get_sink()
+    if retention_days is None:
+        retention_days = int(os.getenv("intraday_retention_days", DEFAULT_RETENTION_DAYS))
+    cutoff = (today or date.today()) - timedelta(days=retention_days)
+    rows = 0
+    for prefix, rollup in ((BALANCE_PREFIX, rollup_balances), (PRICE_PREFIX, rollup_prices)):
+        for day, table in sorted(list_partitions(sink, prefix).items()):
+            if day >= cutoff:
+                continue
+            written = rollup(sink, day, table)
+            sink.drop(table)
+            print(f"{table}: {written} lignes repliées dans les tables quotidiennes, partition supprimée")
+            rows += written
+    return rows
+
+# --------------------------------------------------------------------------------
+
+# ORDONNANCEUR
+
+
+async def poll(name, func, interval, stop):
+    """Exécute ``func`` toutes les ``interval`` secondes ; une erreur n'arrête pas la boucle."""
+    def measured():
+        # Mesures de chaque relevé attribuées à la source (exposées par --metrics-port)
+        with collector(name):
+            rows = func()
+            record_rows(rows)
+            return rows
+
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            rows = await asyncio.to_thread(measured)
+            print(f"{datetime.now():%H:%M:%S} {name}: {rows} ligne(s) écrite(s)")
+        except Exception as exc:
+            print(f"{datetime.now():%H:%M:%S} {name}: ERREUR ({exc!r})")
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=max(0.0, interval - (time.perf_counter() - start)))
+        except asyncio.TimeoutError:
+            pass
+
+
+async def schedule(sources, interval, rollup_interval, sink, stop):
+    jobs = make_jobs(sources, sink)
+    tasks = [asyncio.create_task(poll(job.name, job.run_once, interval, stop)) for job in jobs]
+    tasks.append(asyncio.create_task(poll("retention", lambda: run_retention(sink), rollup_interval, stop)))
+    await asyncio.gather(*tasks)
+
+
+def run_intraday(sources=None, interval=None, rollup_interval=None, sink=None, once=False):
+    """
+    Lance l'ordonnanceur intrajournalier jusqu'à interruption (Ctrl+C).
+    Avec ``once``, chaque source est relevée une seule fois.
+    """
+    sources = list(sources or SOURCES)
+    interval = interval or float(os.getenv("intraday_interval", DEFAULT_INTERVAL))
+    rollup_interval = rollup_interval or float(os.getenv("intraday_rollup_interval", DEFAULT_ROLLUP_INTERVAL))
+    # Une connexion par source, plus une pour la rétention
+    sink = sink or get_sink(pool_size=len(sources) + 1)
+
+    if once:
+        try:
+            return sum(job.run_once() for job in make_jobs(sources, sink))
+        finally:
+            sink.close()
+
+    async def main():
+        stop = asyncio.Event()
+        try:
+            await schedule(sources, interval, rollup_interval, sink, stop)
+        finally:
+            stop.set()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("Arrêt de l'ordonnanceur intrajournalier")
+    finally:
+        sink.close()
+    return 0
@@ -0,0 +1,381 @@
+"""
+Chemins légers des collecteurs ``prices``, ``binance``, ``mexc``, ``evm`` et
+``starknet``, pour un lancement isolé ou une vérification planifiée.
+
+Ni pandas, ni SQLAlchemy, ni python-binance, ni Selenium ne sont chargés : les
+réponses des API sont converties en tuples et écrites avec le pilote DB-API de
+la base (``pymysql``, ou ``sqlite3`` pour une URL ``db_url`` en ``sqlite://``)
+par un ``INSERT ... ON DUPLICATE KEY UPDATE`` (``ON CONFLICT`` pour SQLite) sur
+la clé naturelle de la table. Les lignes écrites sont celles des collecteurs
+complets, à ceci près que :
+
+- la table doit exister, avec son index unique : le premier lancement passe
+  par le collecteur complet (``run``), qui les crée ;
+- les prix viennent de CoinGecko ``/coins/markets`` seul (le calcul des prix
+  à partir des tickers des échanges reste dans le collecteur complet), écrits
+  comme cours provisoires sans écraser un prix d'ouverture déjà connu.
+
+``profile_imports`` mesure, dans un processus neuf, le temps et la mémoire de
+chargement du chemin léger et du collecteur complet de chaque source.
+"""
+import hashlib
+import hmac
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import time
+from datetime import date, datetime, timezone
+from pathlib import Path
+from urllib.parse import unquote, urlencode, urlparse
+
+import requests
+
+from .fetch import FetchError, request_with_retry
+from .metrics import stage
+from .query_cache import record_write
+from .schema import (BALANCE_COLUMNS, NATURAL_KEYS, SPOT_SUFFIX, SUM_COLUMNS, position_type,
+                     signed_amount)
+
+PRICE_COLUMNS = ['date', 'symbol', 'prix', 'market_cap', 'total_volume', 'source']
+
+BINANCE_URL = "https://api.binance.com"
+
+# --------------------------------------------------------------------------------
+
+# ÉCRITURE DE TUPLES PAR LE PILOTE DE LA BASE
+
+
+def merge_rows(rows, columns, key, sum_columns=()):
+    """Remplace les NULL de la clé par '' et fusionne les lignes qui partagent la clé (comme ``db.prepare_frame``)."""
+    key_positions = [columns.index(column) for column in key]
+    sum_positions = [columns.index(column) for column in sum_columns]
+    merged = {}
+    for row in rows:
+        row = list(row)
+        for position in key_positions:
+            if row[position] is None and columns[position] != 'date':
+                row[position] = ''
+        row_key = tuple(row[position] for position in key_positions)
+        previous = merged.get(row_key)
+        if previous is not None:
+            for position in sum_positions:
+                if previous[position] is not None:
+                    row[position] = previous[position] + (row[position] or 0)
+        merged[row_key] = row
+    return [tuple(row) for row in merged.values()]
+
+
+class RowSink:
+    """Destination SQL minimale : tuples écrits sur la clé naturelle, sans création de table."""
+
+    name = "light"
+
+    def __init__(self, url=None):
+        url = url or os.getenv("db_url")
+        if url is None:
+            import pymysql
+            self.dialect = "mysql"
+            self.conn = pymysql.connect(host=os.getenv("db_host"), port=int(os.getenv("db_port") or 3306),
+                                        user=os.getenv("db_username"), password=os.getenv("db_password"),
+                                        database=os.getenv("db_name"))
+            return
+        parsed = urlparse(url)
+        scheme = parsed.scheme.split("+")[0]
+        if scheme == "sqlite":
+            self.dialect = "sqlite"
+            self.conn = sqlite3.connect(unquote(parsed.path[1:]) or ":memory:")
+        elif scheme == "mysql":
+            import pymysql
+            self.dialect = "mysql"
+            self.conn = pymysql.connect(host=parsed.hostname, port=parsed.port or 3306,
+                                        user=unquote(parsed.username or ""), password=unquote(parsed.password or ""),
+                                        database=parsed.path[1:])
+        else:
+            raise ValueError(f"chemin léger non supporté pour la base {scheme}")
+
+    @property
+    def mark(self):
+        return "?" if self.dialect == "sqlite" else "%s"
+
+    def quote(self, name):
+        return f'"{name}"' if self.dialect == "sqlite" else f"`{name}`"
+
+    def execute(self, sql, params=()):
+        cursor = self.conn.cursor()
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+    def columns(self, table):
+        """Colonnes de ``table`` (liste vide si elle n'existe pas)."""
+        if self.dialect == "sqlite":
+            return [row[1] for row in self.execute(f"PRAGMA table_info({self.quote(table)})")]
+        return [row[0] for row in self.execute(
+            "SELECT column_name FROM information_schema.columns WHERE table_schema = DATABASE() "
+            "AND table_name = %s ORDER BY ordinal_position", (table,))]
+
+    def write(self, table, columns, rows):
+        """Écrit les tuples ``rows`` (colonnes ``columns``) ; renvoie le nombre de lignes écrites."""
+        if not rows:
+            return 0
+        existing = self.columns(table)
+        if not existing:
+            raise RuntimeError(f"{table}: table absente, lancer une première fois le collecteur complet")
+        key = NATURAL_KEYS[table]
+        rows = merge_rows(rows, columns, key, SUM_COLUMNS.get(table, []))
+
+        # Colonnes ajoutées depuis la création de la table (ex. source) : laissées au collecteur complet
+        kept = [position for position, column in enumerate(columns) if column in existing]
+        columns = [columns[position] for position in kept]
+        rows = [tuple(row[position] for position in kept) for row in rows]
+        if self.dialect == "sqlite":
+            # Dates au format ISO, comme les écrit SQLAlchemy
+            rows = [tuple(value.isoformat() if isinstance(value, date) else value for value in row) for row in rows]
+
+        quote = self.quote
+        names = ", ".join(quote(column) for column in columns)
+        marks = ", ".join([self.mark] * len(columns))
+        updates = [column for column in columns if column not in key]
+        if self.dialect == "mysql":
+            assignments = ", ".join(f"{quote(column)} = VALUES({quote(column)})" for column in updates or key[:1])
+            conflict = f"ON DUPLICATE KEY UPDATE {assignments}"
+        else:
+            assignments = ", ".join(f"{quote(column)} = excluded.{quote(column)}" for column in updates)
+            action = f"DO UPDATE SET {assignments}" if updates else "DO NOTHING"
+            conflict = f"ON CONFLICT ({', '.join(quote(column) for column in key)}) {action}"
+        with stage(f"write_{self.name}"):
+            cursor = self.conn.cursor()
+            cursor.executemany(f"INSERT INTO {quote(table)} ({names}) VALUES ({marks}) {conflict}", rows)
+            self.conn.commit()
+        if 'date' in columns:
+            record_write(table, {row[columns.index('date')] for row in rows})
+        return len(rows)
+
+    def latest_prices(self, symbols):
+        """Dernier prix connu de chaque symbole dans ``crypto_price`` (seuil de poussière)."""
+        symbols = sorted(symbols)
+        if not symbols or not self.columns("crypto_price"):
+            return {}
+        rows = self.execute(
+            f"SELECT symbol, prix FROM crypto_price WHERE prix IS NOT NULL "
+            f"AND symbol IN ({', '.join([self.mark] * len(symbols))}) ORDER BY date", symbols)
+        return dict(rows)
+
+    def opening_prices(self, days):
+        """(jour ISO, symbole) dont ``crypto_price`` a déjà le prix d'ouverture (ligne non provisoire)."""
+        days = sorted({day.isoformat() for day in days})
+        columns = self.columns("crypto_price")
+        if not days or not columns:
+            return set()
+        params = days if self.dialect == "sqlite" else [date.fromisoformat(day) for day in days]
+        spot = ""
+        if 'source' in columns:
+            spot = f" AND (source IS NULL OR source NOT LIKE {self.mark})"
+            params = [*params, f"%{SPOT_SUFFIX}"]
+        rows = self.execute(f"SELECT date, symbol FROM crypto_price WHERE date IN "
+                            f"({', '.join([self.mark] * len(days))}){spot}", params)
+        return {(str(day)[:10], symbol) for day, symbol in rows}
+
+    def close(self):
+        self.conn.close()
+
+# --------------------------------------------------------------------------------
+
+# COLLECTEURS
+
+
+def run_prices(sink):
+    from .asset_mapping import Liste, get_index
+    from .coingecko import fetch_markets, get_limiter
+
+    session, limiter = requests.Session(), get_limiter()
+    index = get_index(Liste, session, limiter)
+    with stage("fetch"):
+        records = fetch_markets(session, Liste, limiter)
+    print(f"{len(records)}/{len(Liste)} cryptos récupérées")
+
+    # Cours daté du jour UTC de last_updated, symbole canonique de l'index
+    today = datetime.now(timezone.utc).date()
+    rows = [(
+        date.fromisoformat(record['last_updated'][:10]) if record.get('last_updated') else today,
+        index.symbols.get(record['id'], record['symbol'].upper()),
+        record.get('current_price'),
+        record.get('market_cap'),
+        record.get('total_volume'),
+        'coingecko' + SPOT_SUFFIX,
+    ) for record in records]
+
+    # Cours provisoires : un prix d'ouverture déjà écrit pour le jour n'est pas écrasé
+    final = sink.opening_prices({row[0] for row in rows})
+    rows = [row for row in rows if (row[0].isoformat(), row[1]) not in final]
+    return sink.write("crypto_price", PRICE_COLUMNS, rows)
+
+
+def binance_account(session=None):
+    """Compte Spot Binance par l'API REST signée, sans le client python-binance."""
+    query = urlencode({"timestamp": int(time.time() * 1000)})
+    signature = hmac.new(os.getenv("binance_api_secret").encode('utf-8'), query.encode('utf-8'),
+                         hashlib.sha256).hexdigest()
+    response = request_with_retry(session or requests.Session(), "GET",
+                                  f"{BINANCE_URL}/api/v3/account?{query}&signature={signature}",
+                                  headers={"X-MBX-APIKEY": os.getenv("binance_api_key")})
+    if response.status_code != 200:
+        raise FetchError(f"binance account: ERREUR {response.status_code}, {response.text}")
+    return response.json()
+
+
+def run_binance(sink):
+    from .asset_mapping import get_index
+    from .balances import filter_balances
+
+    with stage("fetch"):
+        account = binance_account()
+    balances = filter_balances(account["balances"], 'binance', price_lookup=sink.latest_prices)
+
+    # Symbole canonique (LDBTC → BTC) : les lignes qui partagent la clé sont additionnées
+    index, today = get_index(), date.today()
+    rows = [(today, index.canonical_symbol('binance', symbol), 'Binance', montant, 'wallet', None, None)
+            for symbol, montant in balances]
+    return sink.write("binance_soldewallet", BALANCE_COLUMNS, rows)
+
+
+def run_mexc(sink):
+    from .asset_mapping import get_index
+    from .balances import filter_balances
+    from .collectors import mexc_wallet
+
+    with stage("fetch"):
+        account = mexc_wallet.fetch()
+    balances = filter_balances(account["balances"], 'mexc', price_lookup=sink.latest_prices)
+    index, today = get_index(), date.today()
+    rows = [(today, index.canonical_symbol('mexc', symbol), 'MEXC', montant, 'wallet', None, None)
+            for symbol, montant in balances]
+    return sink.write(mexc_wallet.TABLE, BALANCE_COLUMNS, rows)
+
+
+def run_evm(sink):
+    from .asset_mapping import get_index
+    from .collectors import evm_wallet
+
+    # Symbole canonique, et montant des positions de type 'loan' en négatif
+    index = get_index()
+    rows = [(row[0], index.canonical_symbol('evm', row[1]), row[2], signed_amount(row[3], row[4])) + row[4:]
+            for row in evm_wallet.fetch_rows()]
+    return sink.write(evm_wallet.TABLE, BALANCE_COLUMNS, rows)
+
+
+def run_starknet(sink):
+    from .asset_mapping import get_index
+    from .starknet_rpc import fetch_balances, get_addresses
+
+    addresses = get_addresses()
+    with stage("fetch"):
+        balances = fetch_balances(addresses)
+    print(f"{len(balances)} soldes non nuls lus pour {len(addresses)} adresse(s)")
+
+    today = date.today()
+    rows = [(today, balance['symbol'], 'starknet', balance['montant'],
+             position_type(balance['symbol'], balance['montant']), '', balance['adresse']) for balance in balances]
+
+    # Version pour la visualisation : symbole canonique (xSTRK = STRK) pour la jointure avec les prix
+    index = get_index()
+    dataviz = [row[:1] + (index.canonical_symbol('starknet', row[1]),) + row[2:] for row in rows]
+    return (sink.write("starknet_soldewallet", BALANCE_COLUMNS, rows)
+            + sink.write("starknet_soldewallet_dataviz", BALANCE_COLUMNS, dataviz))
+
+
+RUNNERS = {
+    "prices": run_prices,
+    "binance": run_binance,
+    "mexc": run_mexc,
+    "evm": run_evm,
+    "starknet": run_starknet,
+}
+
+
+def unsupported(name):
+    """Raison pour laquelle le chemin léger ne peut pas servir (``None`` s'il le peut)."""
+    if os.getenv("portfolio_sink", "mysql") != "mysql":
+        return f"destination {os.getenv('portfolio_sink')}"
+    if name == "starknet" and os.getenv("starknet_source", "rpc") != "rpc":
+        return "source Starknet scraper (Selenium)"
+    return None
+
+
+def run(name, sink=None):
+    """Lance le chemin léger du collecteur ``name`` ; renvoie le nombre de lignes écrites."""
+    own = sink is None
+    sink = sink or RowSink()
+    try:
+        return RUNNERS[name](sink)
+    finally:
+        if own:
+            sink.close()
+
+# --------------------------------------------------------------------------------
+
+# COÛT DE DÉMARRAGE
+
+
+# Modules chargés par chaque chemin léger, en plus de ce module
+LIGHT_IMPORTS = {
+    "prices": ["portfolio_tracker.coingecko", "portfolio_tracker.asset_mapping"],
+    "binance": ["portfolio_tracker.asset_mapping", "portfolio_tracker.balances"],
+    "mexc": ["portfolio_tracker.balances", "portfolio_tracker.collectors.mexc_wallet"],
+    "evm": ["portfolio_tracker.collectors.evm_wallet"],
+    "starknet": ["portfolio_tracker.asset_mapping", "portfolio_tracker.starknet_rpc"],
+}
+
+# Modules chargés à l'exécution par les collecteurs complets, en plus du leur
+FULL_IMPORTS = {
+    "binance": ["binance.client"],
+    "evm": ["portfolio_tracker.classification"],
+}
+
+PROFILE_SCRIPT = """
+import importlib, json, sys, time
+start = time.perf_counter()
+for module in sys.argv[1:]:
+    importlib.import_module(module)
+seconds = time.perf_counter() - start
+from portfolio_tracker.metrics import peak_memory_mb
+print(json.dumps({"seconds": seconds, "memory_mb": peak_memory_mb()}))
+"""
+
+
+def measure_imports(modules):
+    """Temps de chargement de ``modules`` et pic de mémoire d'un processus Python neuf qui les importe."""
+    result = subprocess.run([sys.executable, "-c", PROFILE_SCRIPT, *modules], capture_output=True, text=True,
+                            cwd=Path(__file__).resolve().parent.parent)
+    if result.returncode != 0:
+        return {"seconds": None, "memory_mb": None, "error": result.stderr.strip().splitlines()[-1]}
+    return json.loads(result.stdout)
+
+
+def profile_imports(names=None):
+    """Coût de démarrage du chemin léger et du collecteur complet de chaque source."""
+    from . import collectors
+    driver = "sqlite3" if (os.getenv("db_url") or "").startswith("sqlite") else "pymysql"
+    results = {}
+    for name in names or RUNNERS:
+        results[name] = {
+            "light": measure_imports(["portfolio_tracker.light", driver] + LIGHT_IMPORTS[name]),
+            "full": measure_imports([collectors.COLLECTORS[name], "portfolio_tracker.sinks"] + FULL_IMPORTS.get(name, [])),
+        }
+    return results
+
+
+def print_profile(results):
+    def cell(measure):
+        if measure.get("error"):
+            return f"{'ERREUR':>18}"
+        memory = "?" if measure["memory_mb"] is None else f"{measure['memory_mb']:.0f} Mo"
+        return f"{measure['seconds']:7.2f}s {memory:>9}"
+
+    print(f"{'collecteur':<10} {'chemin léger':>18} {'collecteur complet':>18}")
+    for name, result in results.items():
+        print(f"{name:<10} {cell(result['light'])} {cell(result['full'])}")
+        for kind in ("light", "full"):
+            if result[kind].get("error"):
+                print(f"  {kind}: {result[kind]['error']}")
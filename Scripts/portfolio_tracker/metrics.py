@@ -0,0 +1,253 @@
+"""
+Instrumentation des collecteurs : durée des étapes, appels HTTP, lignes écrites et mémoire.
+
+Un collecteur tourne dans un bloc ``collector(nom)`` ; tout ce qui est mesuré
+dans ce bloc (y compris dans les threads lancés par ``fetch_all``) lui est
+attribué :
+
+- ``stage(nom)`` : durée d'une étape (``fetch``, ``transform``, ``write``,
+  ``page_load``...) dans un histogramme ;
+- ``record_response`` : requête HTTP (durée, statut 429, octets reçus),
+  appelé par ``request_with_retry`` ;
+- ``record_sleep`` : attente du limiteur ou du backoff.
+
+Le pic de mémoire (``ru_maxrss``) est celui du processus entier, dont les
+collecteurs partagent les threads : il est publié une seule fois, sans
+attribution à un collecteur.
+
+``write_report`` enregistre le bilan d'un lancement en JSON, et ``serve``
+expose les mesures au format texte de Prometheus sur ``/metrics``.
+"""
+import bisect
+import contextvars
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .config import data_path
+
+# Bornes supérieures (secondes) des classes des histogrammes de durée
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, float("inf"))
+
+# Compteurs exposés, avec leur description
+COUNTERS = {
+    "http_requests": "Requêtes HTTP envoyées",
+    "http_429": "Réponses 429 (quota dépassé)",
+    "http_errors": "Requêtes sans réponse (connexion, délai)",
+    "bytes_downloaded": "Octets reçus dans les corps de réponse",
+    "rows_written": "Lignes écrites dans la destination",
+}
+
+# Collecteur en cours dans le contexte courant (hérité par les threads de fetch_all)
+_current = contextvars.ContextVar("metrics_collector", default=None)
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """Borne supérieure de la classe qui contient le quantile ``q`` (estimation)."""
+        if not self.count:
+            return None
+        rank, seen = q * self.count, 0
+        for bound, count in zip(BUCKETS, self.counts):
+            seen += count
+            if seen >= rank:
+                return round(min(bound, self.max), 6)
+        return round(self.max, 6)
+
+    def to_dict(self):
+        return {"count": self.count, "sum": round(self.sum, 6), "max": round(self.max, 6),
+                "p50": self.quantile(0.5), "p95": self.quantile(0.95)}
+
+
+class Registry:
+    """Mesures de tous les collecteurs du processus, protégées par un verrou."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.histograms = {}
+            self.counters = {}
+
+    def observe(self, stage_name, seconds, collector_name=None):
+        key = (collector_name or _current.get() or "-", stage_name)
+        with self._lock:
+            self.histograms.setdefault(key, Histogram()).observe(seconds)
+
+    def inc(self, counter, value=1, collector_name=None):
+        key = (collector_name or _current.get() or "-", counter)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def snapshot(self):
+        """Mesures par collecteur : ``{nom: {"stages": ..., "counters": ...}}``."""
+        with self._lock:
+            names = {name for name, _ in self.histograms} | {name for name, _ in self.counters}
+            return {name: {
+                "stages": {stage_name: histogram.to_dict() for (owner, stage_name), histogram in sorted(self.histograms.items())
+                           if owner == name},
+                "counters": {counter: value for (owner, counter), value in sorted(self.counters.items()) if owner == name},
+            } for name in sorted(names)}
+
+    def prometheus(self):
+        """Mesures au format texte d'exposition de Prometheus."""
+        lines = ["# HELP portfolio_stage_seconds Durée des étapes des collecteurs",
+                 "# TYPE portfolio_stage_seconds histogram"]
+        with self._lock:
+            for (name, stage_name), histogram in sorted(self.histograms.items()):
+                labels = f'collector="{name}",stage="{stage_name}"'
+                cumulative = 0
+                for bound, count in zip(BUCKETS, histogram.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f'portfolio_stage_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+                lines.append(f"portfolio_stage_seconds_sum{{{labels}}} {histogram.sum}")
+                lines.append(f"portfolio_stage_seconds_count{{{labels}}} {histogram.count}")
+            for counter, description in COUNTERS.items():
+                lines += [f"# HELP portfolio_{counter}_total {description}", f"# TYPE portfolio_{counter}_total counter"]
+                lines += [f'portfolio_{counter}_total{{collector="{name}"}} {value}'
+                          for (name, owner_counter), value in sorted(self.counters.items()) if owner_counter == counter]
+        peak = peak_memory_mb()
+        if peak is not None:
+            lines += ["# HELP portfolio_process_peak_memory_megabytes Pic de mémoire résidente du processus, "
+                      "tous collecteurs confondus",
+                      "# TYPE portfolio_process_peak_memory_megabytes gauge",
+                      f"portfolio_process_peak_memory_megabytes {peak}"]
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# --------------------------------------------------------------------------------
+
+# MESURES
+
+
+def peak_memory_mb():
+    """Pic de mémoire résidente du processus (Mo), ou ``None`` si le système ne le fournit pas."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Octets sous macOS, kilo-octets sous Linux
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+@contextmanager
+def collector(name):
+    """Attribue au collecteur ``name`` les mesures prises dans le bloc et mesure sa durée totale."""
+    token = _current.set(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        REGISTRY.observe("total", time.perf_counter() - start, name)
+        _current.reset(token)
+
+
+@contextmanager
+def stage(name):
+    """Durée d'une étape du collecteur en cours."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        REGISTRY.observe(name, time.perf_counter() - start)
+
+
+def record_response(response, seconds):
+    REGISTRY.observe("http", seconds)
+    REGISTRY.inc("http_requests")
+    if response.status_code == 429:
+        REGISTRY.inc("http_429")
+    REGISTRY.inc("bytes_downloaded", len(response.content))
+
+
+def record_error(seconds):
+    REGISTRY.observe("http", seconds)
+    REGISTRY.inc("http_requests")
+    REGISTRY.inc("http_errors")
+
+
+def record_sleep(seconds):
+    REGISTRY.observe("sleep", seconds)
+
+
+def record_rows(rows, collector_name=None):
+    REGISTRY.inc("rows_written", rows or 0, collector_name)
+
+
+def instrument_session(session):
+    """Mesure les réponses d'une session qui n'utilise pas ``request_with_retry`` (client Binance)."""
+    session.hooks["response"].append(
+        lambda response, *args, **kwargs: record_response(response, response.elapsed.total_seconds())
+    )
+    return session
+
+# --------------------------------------------------------------------------------
+
+# BILAN JSON ET EXPOSITION PROMETHEUS
+
+
+def write_report(results, elapsed, path=None):
+    """
+    Enregistre le bilan d'un lancement (statut et mesures de chaque étape) en JSON,
+    par défaut sous ``.data/runs``, et renvoie son chemin.
+    """
+    metrics = REGISTRY.snapshot()
+    report = {
+        "finished_at": datetime.now().isoformat(timespec="seconds"),
+        "seconds": round(elapsed, 3),
+        # Pic du processus entier : les collecteurs tournent en parallèle dans ses threads
+        "peak_memory_mb": peak_memory_mb(),
+        "collectors": {result["collector"]: {**result, **metrics.pop(result["collector"], {})} for result in results},
+        "other": metrics,
+    }
+    path = path or data_path("runs") / f"run-{datetime.now():%Y%m%dT%H%M%S}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, default=str)
+    return path
+
+
+def serve(port, host="127.0.0.1"):
+    """Expose ``/metrics`` dans un thread en arrière-plan ; renvoie le serveur (``shutdown()`` pour l'arrêter)."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            data = REGISTRY.prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"Mesures exposées sur http://{host}:{server.server_port}/metrics")
+    return server
@@ -0,0 +1,78 @@
+"""
+Exécution de tous les collecteurs en parallèle avec une destination partagée.
+
+Chaque collecteur tourne dans son propre thread et écrit dans la même
+destination (pour MySQL, des connexions empruntées au pool d'un moteur unique). L'échec d'une source est consigné sans interrompre
+les autres : la durée totale est celle du collecteur le plus lent. Au lancement
+par défaut, une source de trades non configurée est ignorée (statut ``IGNORÉ``).
+"""
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from . import collectors
+from .metrics import collector, record_rows
+from .sinks import get_sink
+
+
+def run_stage(name, func):
+    """Exécute une étape et renvoie son bilan (statut, lignes écrites, durée, erreur)."""
+    start = time.perf_counter()
+    try:
+        # Les mesures prises pendant l'étape (requêtes, attentes, écritures) lui sont attribuées
+        with collector(name):
+            rows = func()
+            record_rows(rows)
+    except Exception as exc:
+        traceback.print_exc()
+        return {"collector": name, "status": "ERREUR", "rows": 0,
+                "seconds": time.perf_counter() - start, "error": repr(exc)}
+    return {"collector": name, "status": "OK", "rows": rows,
+            "seconds": time.perf_counter() - start, "error": None}
+
+
+def run_collector(name, sink, skip_unconfigured=False):
+    missing = collectors.missing_env(name) if skip_unconfigured else []
+    if missing:
+        return {"collector": name, "status": "IGNORÉ", "rows": 0, "seconds": 0.0,
+                "error": f"non configuré ({', '.join(missing)})"}
+    return run_stage(name, lambda: collectors.load(name).run(sink=sink))
+
+
+def run_valuation_stage(sink):
+    """Valorise les positions une fois les collecteurs terminés."""
+    from .valuation import run_valuation
+    return run_stage("valuation", lambda: run_valuation(sink))
+
+
+def run_pnl_stage(sink):
+    """Applique les nouveaux trades au calcul du PnL une fois les collecteurs terminés."""
+    from .pnl import run_pnl
+    return run_stage("pnl", lambda: run_pnl(sink))
+
+
+def run_all(names=None, sink=None, max_workers=None, valuation=True):
+    """
+    Lance les collecteurs ``names`` (tous par défaut) en parallèle et renvoie leurs bilans,
+    puis la valorisation du portefeuille et le PnL si ``valuation`` est vrai.
+    Sans ``names``, les sources de trades non configurées sont ignorées ; demandées
+    explicitement, elles sont lancées (et échouent si leur configuration manque).
+    """
+    skip_unconfigured = not names
+    names = list(names or collectors.COLLECTORS)
+    max_workers = max_workers or len(names)
+    sink = sink or get_sink(pool_size=max_workers, max_overflow=max_workers)
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="collector") as pool:
+        results = list(pool.map(lambda name: run_collector(name, sink, skip_unconfigured), names))
+    if valuation:
+        results.append(run_valuation_stage(sink))
+        results.append(run_pnl_stage(sink))
+    sink.close()
+    return results
+
+
+def print_summary(results, elapsed):
+    for result in results:
+        detail = f"{result['rows']} lignes" if result['status'] == "OK" else result['error']
+        print(f"{result['collector']:<10} {result['status']:<7} {result['seconds']:6.1f}s  {detail}")
+    print(f"Durée totale : {elapsed:.1f}s")
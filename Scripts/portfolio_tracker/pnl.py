@@ -0,0 +1,453 @@
+"""
+Prix de revient et PnL par actif, en FIFO et en coût moyen (table ``pnl_daily``).
+
+Les trades Binance et MEXC et les échanges EVM (Zerion) sont convertis en
+« mouvements » : une quantité signée d'un actif et sa contre-valeur en dollars.
+Un achat BTCUSDT donne +BTC ; un échange contre BTC donne aussi un mouvement
+-BTC sur la devise de cotation ; les frais sont une sortie sans contrepartie.
+Les actifs de ``pnl_cash_assets`` (stablecoins) servent de monnaie et ne sont
+pas suivis. Un trade sans contre-valeur (devise de cotation sans prix dans
+``crypto_price``) est signalé et écarté, plutôt que compté à coût nul.
+
+Les deux méthodes sont calculées sur des tableaux NumPy, actif par actif et par
+lots chronologiques de ``pnl_batch_size`` mouvements, sans boucle par trade :
+
+- quantité détenue : somme cumulée des mouvements, bornée à 0 (une vente
+  supérieure à la quantité connue ne consomme que celle-ci) ;
+- coût moyen : récurrence linéaire ``coût_k = f_k * coût_k-1 + achat_k``
+  résolue par produit cumulé, ``f_k`` étant la part conservée après une vente ;
+- FIFO : les lots d'achat sont alignés sur un axe de quantité cumulée ; le coût
+  des unités vendues est lu par interpolation (``np.interp``) du coût cumulé.
+
+L'état de chaque actif (quantité, coût moyen, lots FIFO ouverts, PnL réalisé)
+est conservé dans un point de reprise, avec un repère par source comme les
+curseurs des collecteurs : l'horodatage de la dernière ligne traitée de chaque
+paire (trades) ou adresse (Zerion), dont les lignes sont écrites dans l'ordre
+chronologique. Un lancement quotidien ne lit que les lignes postérieures à ces
+repères, puis écrit une ligne par jour et par actif, valorisée au prix de
+``crypto_price``. Une ligne nouvelle antérieure au dernier mouvement appliqué
+à son actif (paire ou adresse nouvellement suivie, relue depuis le début) fait
+recalculer cet actif depuis son premier mouvement.
+"""
+import os
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from .asset_mapping import get_index
+from .checkpoint import Checkpoint
+from .sinks import get_sink
+
+TABLE = "pnl_daily"
+CHECKPOINT_NAME = "pnl_checkpoint.json"
+
+TRADE_TABLES = {"binance_trades": "binance", "mexc_trades": "mexc"}
+TRANSACTION_TABLE = "evm_transactions"
+
+# Colonne qui regroupe les lignes comme le curseur du collecteur (paire, adresse) : un repère par groupe
+MARK_COLUMNS = {"binance_trades": "symbol", "mexc_trades": "symbol", TRANSACTION_TABLE: "adresse"}
+
+DEFAULT_QUOTE_ASSETS = "USDT,USDC,FDUSD,BUSD,BTC,ETH,BNB"
+DEFAULT_CASH_ASSETS = "USDT,USDC,FDUSD,BUSD,DAI,USD"
+DEFAULT_BATCH_SIZE = 50000
+
+# Seuil du produit cumulé (en log) au-delà duquel la récurrence est relancée
+LOG_PRODUCT_LIMIT = -500.0
+
+# Tolérance relative sur les quantités (résidus d'arrondi des sommes cumulées)
+QUANTITY_TOLERANCE = 1e-12
+
+COLUMNS = ['date', 'symbol', 'quantite', 'prix', 'valeur', 'cout_fifo', 'cout_moyen',
+           'pnl_realise_fifo', 'pnl_realise_moyen', 'pnl_realise_fifo_cumule', 'pnl_realise_moyen_cumule',
+           'pnl_latent_fifo', 'pnl_latent_moyen']
+
+
+def env_list(name, default):
+    return [item.strip() for item in os.getenv(name, default).split(",") if item.strip()]
+
+# --------------------------------------------------------------------------------
+
+# MOUVEMENTS
+
+
+def split_pair(pairs, quotes):
+    """Sépare chaque paire en (base, cotation) selon la plus longue devise de cotation reconnue."""
+    quotes = sorted(quotes, key=len, reverse=True)
+    result = {}
+    for pair in pd.unique(pairs):
+        quote = next((quote for quote in quotes if pair.endswith(quote) and len(pair) > len(quote)), None)
+        result[pair] = (pair[:-len(quote)], quote) if quote else (None, None)
+    return result
+
+
+def usd_prices(sink, symbols, start):
+    """Prix en dollars de ``crypto_price`` pour ``symbols`` depuis ``start``, triés pour ``merge_asof``."""
+    df = sink.read("crypto_price", ['date', 'symbol', 'prix'], start=start, filters={'symbol': symbols})
+    df = df.dropna(subset=['prix'])
+    df['date'] = pd.to_datetime(df['date'])
+    return df.sort_values('date')
+
+
+def trade_legs(df, source, index, quotes, cash, prices):
+    """Mouvements issus des trades d'échange : base, cotation (si non monétaire) et frais."""
+    if df.empty:
+        return []
+    parts = split_pair(df['symbol'], quotes)
+    base = df['symbol'].map(lambda pair: parts[pair][0])
+    quote = df['symbol'].map(lambda pair: parts[pair][1])
+    unknown = base.isna()
+    if unknown.any():
+        print(f"PnL : paires non reconnues ignorées : {', '.join(sorted(df.loc[unknown, 'symbol'].unique()))}")
+    df = df[~unknown].assign(base=index.canonical_series(source, base[~unknown]).to_numpy(),
+                             quote=index.canonical_series(source, quote[~unknown]).to_numpy(),
+                             fee=index.canonical_series(source, df.loc[~unknown, 'frais_symbol']).to_numpy())
+
+    # Contre-valeur en dollars : montant en devise de cotation × dernier prix connu de celle-ci
+    df = df.assign(day=pd.to_datetime(df['date'])).sort_values('day')
+    df = pd.merge_asof(df, prices.rename(columns={'date': 'day', 'symbol': 'quote', 'prix': 'prix_quote'}),
+                       on='day', by='quote', direction='backward')
+    rate = df['prix_quote'].where(~df['quote'].isin(cash), df['prix_quote'].fillna(1.0))
+    value = df['montant_quote'] * rate
+
+    # Contre-valeur inconnue (devise de cotation sans prix) : trade écarté plutôt que compté à coût nul
+    unpriced = value.isna().to_numpy()
+    if unpriced.any():
+        print(f"PnL : {unpriced.sum()} trade(s) ignoré(s), sans prix pour "
+              f"{', '.join(sorted(df.loc[unpriced, 'quote'].astype(str).unique()))} (--restart une fois le prix connu)")
+        df, value = df[~unpriced], value[~unpriced]
+    sign = np.where(df['type'] == 'BUY', 1.0, -1.0)
+
+    legs = [pd.DataFrame({'ts': df['ts'], 'symbol': df['base'], 'quantite': sign * df['montant'], 'valeur': value})]
+    legs.append(pd.DataFrame({'ts': df['ts'], 'symbol': df['quote'], 'quantite': -sign * df['montant_quote'], 'valeur': value}))
+    legs.append(pd.DataFrame({'ts': df['ts'], 'symbol': df['fee'], 'quantite': -df['frais'], 'valeur': 0.0}))
+    return legs
+
+
+def transaction_legs(df, index):
+    """Mouvements des échanges on-chain (opérations ``trade`` de Zerion, déjà valorisées en dollars)."""
+    df = df[df['type'].str.startswith('trade:')]
+    unpriced = df['montant_quote'].isna()
+    if unpriced.any():
+        print(f"PnL : {unpriced.sum()} échange(s) on-chain ignoré(s), sans contre-valeur en dollars")
+        df = df[~unpriced]
+    if df.empty:
+        return []
+    return [pd.DataFrame({'ts': df['ts'], 'symbol': index.canonical_series('evm', df['symbol']).to_numpy(),
+                          'quantite': df['montant'], 'valeur': df['montant_quote'].abs()})]
+
+
+def latest_ts(sink, table):
+    """Horodatage de la dernière ligne de chaque groupe de ``table``, agrégé par la base."""
+    column = MARK_COLUMNS[table]
+    df = sink.query(f"SELECT {column}, MAX(ts) AS ts FROM {table} GROUP BY {column}")
+    return dict(zip(df[column], pd.to_datetime(df['ts'])))
+
+
+def new_rows(sink, marks):
+    """Lignes de trades et de transactions postérieures au repère de leur groupe (toutes pour un groupe nouveau)."""
+    frames = {}
+    for table, column in MARK_COLUMNS.items():
+        if not sink.has_table(table):
+            continue
+        seen = {group: pd.Timestamp(ts) for group, ts in marks.get(table, {}).items()}
+        fresh = [group for group, ts in latest_ts(sink, table).items()
+                 if group is not None and (group not in seen or ts > seen[group])]
+        if not fresh:
+            continue
+        # Seuls les jours à partir du plus ancien repère sont lus, tout l'historique d'un groupe nouveau
+        start = None if any(group not in seen for group in fresh) else min(seen[group] for group in fresh).date()
+        df = sink.read(table, start=start, filters={column: fresh})
+        mark = pd.to_datetime(df[column].map(seen))
+        frames[table] = df[mark.isna().to_numpy() | (pd.to_datetime(df['ts']) > mark).to_numpy()]
+    return frames
+
+
+def advance_marks(marks, frames):
+    """Repères avancés jusqu'à la dernière ligne lue de chaque groupe."""
+    marks = {table: dict(groups) for table, groups in marks.items()}
+    for table, df in frames.items():
+        latest = pd.to_datetime(df['ts']).groupby(df[MARK_COLUMNS[table]]).max()
+        marks.setdefault(table, {}).update((group, ts.isoformat()) for group, ts in latest.items())
+    return marks
+
+
+def all_rows(sink):
+    return {table: sink.read(table) for table in [*TRADE_TABLES, TRANSACTION_TABLE] if sink.has_table(table)}
+
+
+def load_legs(sink, frames):
+    """Mouvements des lignes de ``frames`` (table → DataFrame), triés chronologiquement."""
+    index = get_index()
+    quotes, cash = env_list("pnl_quote_assets", DEFAULT_QUOTE_ASSETS), env_list("pnl_cash_assets", DEFAULT_CASH_ASSETS)
+
+    legs = []
+    trades = [df for table, df in frames.items() if table in TRADE_TABLES and not df.empty]
+    if trades:
+        symbols = {index.canonical_symbol(source, quote) for source in TRADE_TABLES.values() for quote in quotes}
+        first = min(pd.to_datetime(df['date']).min() for df in trades).date()
+        prices = usd_prices(sink, symbols, first - timedelta(days=7))
+        for table, source in TRADE_TABLES.items():
+            if table in frames:
+                legs += trade_legs(frames[table], source, index, quotes, cash, prices)
+    if TRANSACTION_TABLE in frames:
+        legs += transaction_legs(frames[TRANSACTION_TABLE], index)
+    if not legs:
+        return pd.DataFrame(columns=['ts', 'symbol', 'quantite', 'valeur'])
+
+    df = pd.concat(legs, ignore_index=True)
+    df['ts'] = pd.to_datetime(df['ts'])
+    df = df[df['symbol'].notna() & (df['quantite'] != 0) & ~df['symbol'].isin(cash)]
+    return df.sort_values('ts', kind='stable').reset_index(drop=True)
+
+# --------------------------------------------------------------------------------
+
+# MOTEUR DE LOTS VECTORISÉ
+
+
+def holdings(q0, delta):
+    """Quantité détenue après chaque mouvement, bornée à 0 (formule de réflexion de la somme cumulée)."""
+    s = q0 + np.cumsum(delta)
+    return s - np.minimum(0.0, np.minimum.accumulate(s))
+
+
+def linear_recurrence(f, b, c0):
+    """
+    ``c_k = f_k * c_k-1 + b_k`` sans boucle par élément : ``c = P * (c0 + cumsum(b / P))``
+    avec ``P`` le produit cumulé des ``f``. Le calcul repart d'un nouveau segment à chaque
+    position soldée (``f = 0``) ou quand le produit devient trop petit.
+    """
+    out = np.empty(len(f))
+    start, c = 0, c0
+    with np.errstate(divide='ignore'):
+        log_f = np.log(f)
+    while start < len(f):
+        log_p = np.cumsum(log_f[start:])
+        breaks = np.flatnonzero(log_p < LOG_PRODUCT_LIMIT)
+        end = start + (breaks[0] if len(breaks) else len(log_p))
+        if end > start:
+            p = np.exp(log_p[:end - start])
+            out[start:end] = p * (c + np.cumsum(b[start:end] / p))
+            c = out[end - 1]
+        if end < len(f):
+            # Position soldée (ou presque) : calcul direct de ce point, puis nouveau segment
+            out[end] = f[end] * c + b[end]
+            c = out[end]
+        start = end + 1
+    return out
+
+
+def average_cost(state, delta, value):
+    """Coût moyen : (quantité, coût de la position, PnL réalisé) après chaque mouvement."""
+    q0, c0 = state['quantite'], state['cout_moyen']
+    qty = holdings(q0, delta)
+    qty_prev = np.concatenate(([q0], qty[:-1]))
+    buys = delta > 0
+    sold = np.where(buys, 0.0, qty_prev - qty)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        kept = np.where(buys, 1.0, np.where(qty_prev > 0, 1.0 - sold / qty_prev, 0.0))
+        # Seule la part réellement détenue d'une vente est réalisée
+        proceeds = np.where(buys, 0.0, np.where(delta < 0, value * sold / -delta, 0.0))
+    kept = np.clip(kept, 0.0, 1.0)
+    cost = linear_recurrence(kept, np.where(buys, value, 0.0), c0)
+    cost_prev = np.concatenate(([c0], cost[:-1]))
+    realised = np.where(buys, 0.0, proceeds - cost_prev * (1.0 - kept))
+    return qty, cost, realised
+
+
+def fifo(state, delta, value):
+    """FIFO : (coût des lots ouverts, PnL réalisé) après chaque mouvement, et lots restants."""
+    lots = np.asarray(state['lots'], dtype=float).reshape(-1, 2)
+    q0 = lots[:, 0].sum()
+    buys = delta > 0
+
+    # Axe de quantité cumulée : lots ouverts puis achats, dans l'ordre chronologique
+    lot_qty = np.concatenate((lots[:, 0], np.where(buys, delta, 0.0)))
+    lot_cost = np.concatenate((lots[:, 1], np.where(buys, value, 0.0)))
+    axis_qty = np.concatenate(([0.0], np.cumsum(lot_qty)))
+    axis_cost = np.concatenate(([0.0], np.cumsum(lot_cost)))
+
+    qty = holdings(q0, delta)
+    bought = axis_qty[len(lots) + 1:]
+    consumed = bought - qty
+    consumed_prev = np.concatenate(([0.0], consumed[:-1]))
+    consumed_cost = np.interp(consumed, axis_qty, axis_cost)
+    consumed_cost_prev = np.concatenate(([0.0], consumed_cost[:-1]))
+
+    sold = consumed - consumed_prev
+    with np.errstate(divide='ignore', invalid='ignore'):
+        proceeds = np.where(buys, 0.0, np.where(delta < 0, value * sold / -delta, 0.0))
+    realised = np.where(buys, 0.0, proceeds - (consumed_cost - consumed_cost_prev))
+    open_cost = axis_cost[len(lots) + 1:] - consumed_cost
+
+    # Lots encore ouverts : ceux qui dépassent la quantité consommée, le premier éventuellement entamé.
+    # ``bought - qty`` est calculé avec deux ordres de sommation différents : un résidu d'arrondi
+    # (ex. -1e-16 sans aucune vente) ne doit ni reculer avant le premier lot ni laisser de poussière
+    tolerance = QUANTITY_TOLERANCE * max(1.0, axis_qty[-1])
+    used = consumed[-1] if len(consumed) else 0.0
+    used = 0.0 if used < tolerance else used
+    first = max(np.searchsorted(axis_qty, used, side='right') - 1, 0)
+    remaining_qty = lot_qty[first:].copy()
+    remaining_cost = lot_cost[first:].copy()
+    if len(remaining_qty):
+        part = (axis_qty[first + 1] - used) / remaining_qty[0] if remaining_qty[0] else 0.0
+        part = min(max(part, 0.0), 1.0)
+        remaining_qty[0] *= part
+        remaining_cost[0] *= part
+    keep = remaining_qty > tolerance
+    return open_cost, realised, np.column_stack((remaining_qty[keep], remaining_cost[keep])).tolist()
+
+
+def new_state():
+    return {'quantite': 0.0, 'cout_moyen': 0.0, 'lots': [], 'realise_fifo': 0.0, 'realise_moyen': 0.0,
+            'ts': None, 'jour': None, 'realise_fifo_jour': 0.0, 'realise_moyen_jour': 0.0}
+
+
+def apply_legs(state, legs):
+    """Applique les mouvements d'un actif à son état ; renvoie l'état final et les résultats par mouvement."""
+    delta = legs['quantite'].to_numpy(dtype=float)
+    value = legs['valeur'].to_numpy(dtype=float)
+    qty, cost_avg, realised_avg = average_cost(state, delta, value)
+    cost_fifo, realised_fifo, lots = fifo(state, delta, value)
+    result = pd.DataFrame({
+        'ts': legs['ts'].to_numpy(), 'quantite': qty, 'cout_moyen': cost_avg, 'cout_fifo': cost_fifo,
+        'pnl_realise_moyen': realised_avg, 'pnl_realise_fifo': realised_fifo,
+    })
+    state = {**state, 'quantite': float(qty[-1]), 'cout_moyen': float(cost_avg[-1]), 'lots': lots}
+    return state, result
+
+# --------------------------------------------------------------------------------
+
+# AGRÉGATION QUOTIDIENNE
+
+
+def daily_rows(symbol, state, results, start, end):
+    """Une ligne par jour de ``start`` à ``end`` : état de fin de journée et PnL réalisé du jour."""
+    days = pd.date_range(start, end, freq='D').date
+    if results:
+        df = pd.concat(results, ignore_index=True)
+        df['date'] = df['ts'].dt.date
+        grouped = df.groupby('date')
+        daily = grouped[['quantite', 'cout_moyen', 'cout_fifo']].last()
+        daily = daily.join(grouped[['pnl_realise_fifo', 'pnl_realise_moyen']].sum())
+    else:
+        daily = pd.DataFrame(columns=['quantite', 'cout_moyen', 'cout_fifo', 'pnl_realise_fifo', 'pnl_realise_moyen'])
+    daily = daily.reindex(days)
+
+    # Le premier jour reprend le PnL déjà réalisé ce jour-là lors d'un lancement précédent
+    if state['jour'] == start.isoformat():
+        daily.loc[start, 'pnl_realise_fifo'] = np.nansum([daily.loc[start, 'pnl_realise_fifo'], state['realise_fifo_jour']])
+        daily.loc[start, 'pnl_realise_moyen'] = np.nansum([daily.loc[start, 'pnl_realise_moyen'], state['realise_moyen_jour']])
+    initial = {'quantite': state['initial_quantite'], 'cout_moyen': state['initial_cout_moyen'],
+               'cout_fifo': state['initial_cout_fifo']}
+    for column in ['quantite', 'cout_moyen', 'cout_fifo']:
+        daily[column] = daily[column].astype(float).ffill().fillna(initial[column])
+    for column in ['pnl_realise_fifo', 'pnl_realise_moyen']:
+        daily[column] = daily[column].astype(float).fillna(0.0)
+    realised_before = {
+        'fifo': state['realise_fifo'] - (state['realise_fifo_jour'] if state['jour'] == start.isoformat() else 0.0),
+        'moyen': state['realise_moyen'] - (state['realise_moyen_jour'] if state['jour'] == start.isoformat() else 0.0),
+    }
+    daily['pnl_realise_fifo_cumule'] = realised_before['fifo'] + daily['pnl_realise_fifo'].cumsum()
+    daily['pnl_realise_moyen_cumule'] = realised_before['moyen'] + daily['pnl_realise_moyen'].cumsum()
+    daily = daily.rename_axis('date').reset_index()
+    daily['symbol'] = symbol
+    return daily
+
+
+def value_daily(sink, daily):
+    """Valorise les positions au prix du jour et calcule le PnL latent."""
+    prices = sink.read("crypto_price", ['date', 'symbol', 'prix'], start=daily['date'].min(),
+                       filters={'symbol': set(daily['symbol'])})
+    prices = prices.drop_duplicates(subset=['date', 'symbol'], keep='last')
+    df = daily.merge(prices, on=['date', 'symbol'], how='left', validate='many_to_one')
+    df['valeur'] = df['quantite'] * df['prix']
+    df['pnl_latent_fifo'] = df['valeur'] - df['cout_fifo']
+    df['pnl_latent_moyen'] = df['valeur'] - df['cout_moyen']
+    return df.reindex(COLUMNS, axis=1)
+
+# --------------------------------------------------------------------------------
+
+# CALCUL INCRÉMENTAL
+
+
+def run_pnl(sink=None, restart=False, end=None, batch_size=None):
+    """Applique les nouveaux mouvements, écrit ``pnl_daily`` jusqu'à ``end`` (aujourd'hui) et renvoie le nombre de lignes."""
+    sink = sink or get_sink()
+    end = end or date.today()
+    batch_size = batch_size or int(os.getenv("pnl_batch_size", DEFAULT_BATCH_SIZE))
+    checkpoint = Checkpoint(CHECKPOINT_NAME)
+    if restart:
+        checkpoint.reset()
+    assets = checkpoint.state.get("assets", {})
+
+    # Point de reprise d'une version précédente (identifiants des lignes traitées) : sans repère,
+    # toutes les lignes sont relues et leurs actifs recalculés une fois
+    marks = checkpoint.state.get("marks", {})
+    frames = new_rows(sink, marks)
+    marks = advance_marks(marks, frames)
+    legs = load_legs(sink, frames)
+    print(f"PnL : {len(legs)} nouveau(x) mouvement(s) sur {legs['symbol'].nunique()} actif(s)")
+    if legs.empty and not assets:
+        checkpoint.state = {**checkpoint.state, "marks": marks}
+        checkpoint.save()
+        return 0
+
+    # Premier jour à (ré)écrire : dernier jour écrit, ou jour du premier mouvement
+    start = date.fromisoformat(checkpoint.state["date"]) if checkpoint.state.get("date") else legs['ts'].min().date()
+
+    # Mouvements antérieurs (ou simultanés) au dernier appliqué à leur actif : l'état ne peut pas être
+    # rembobiné, ces actifs repartent de zéro sur l'ensemble de leurs mouvements (point de reprise
+    # d'une version précédente sans horodatage par actif : le dernier horodatage global sert de repère)
+    legacy = checkpoint.state.get("ts")
+    last = legs['symbol'].map({symbol: state.get('ts', legacy) for symbol, state in assets.items()})
+    late = set(legs.loc[legs['ts'] <= pd.to_datetime(last), 'symbol'])
+    if late:
+        print(f"PnL : mouvement(s) tardif(s), recalcul complet de {', '.join(sorted(late))}")
+        history = load_legs(sink, all_rows(sink))
+        history = history[history['symbol'].isin(late)]
+        legs = pd.concat([legs[~legs['symbol'].isin(late)], history], ignore_index=True)
+        legs = legs.sort_values('ts', kind='stable').reset_index(drop=True)
+        for symbol in late:
+            assets[symbol] = new_state()
+    # Un actif dont des mouvements précèdent le dernier jour écrit est réécrit depuis le premier d'entre eux
+    starts = {symbol: min(start, ts.date()) for symbol, ts in legs.groupby('symbol')['ts'].min().items()}
+
+    for symbol in set(legs['symbol']) - set(assets):
+        assets[symbol] = new_state()
+    for state in assets.values():
+        state['initial_quantite'] = state['quantite']
+        state['initial_cout_moyen'] = state['cout_moyen']
+        state['initial_cout_fifo'] = float(sum(cost for _, cost in state['lots']))
+
+    # Mouvements traités par lots chronologiques, l'état de chaque actif étant reporté d'un lot à l'autre
+    results = {symbol: [] for symbol in assets}
+    for first in range(0, len(legs), batch_size):
+        batch = legs.iloc[first:first + batch_size]
+        for symbol, group in batch.groupby('symbol', sort=False):
+            assets[symbol], result = apply_legs(assets[symbol], group)
+            assets[symbol]['ts'] = group['ts'].iloc[-1].isoformat()
+            results[symbol].append(result)
+
+    frames = []
+    for symbol, state in assets.items():
+        daily = daily_rows(symbol, state, results[symbol], starts.get(symbol, start), end)
+        frames.append(daily)
+        last = daily.iloc[-1]
+        state.update({
+            'realise_fifo': float(last['pnl_realise_fifo_cumule']), 'realise_moyen': float(last['pnl_realise_moyen_cumule']),
+            'jour': end.isoformat(),
+            'realise_fifo_jour': float(last['pnl_realise_fifo']), 'realise_moyen_jour': float(last['pnl_realise_moyen']),
+        })
+        for key in ('initial_quantite', 'initial_cout_moyen', 'initial_cout_fifo'):
+            del state[key]
+
+    df = value_daily(sink, pd.concat(frames, ignore_index=True))
+    rows = sink.write(df, TABLE)
+
+    # Le point de reprise n'avance qu'une fois les lignes écrites
+    checkpoint.done = set()
+    checkpoint.state = {"date": end.isoformat(), "assets": assets, "marks": marks}
+    checkpoint.save()
+    print(f"PnL : {rows} ligne(s) écrites dans {TABLE} du {min([start, *starts.values()])} au {end}")
+    return rows
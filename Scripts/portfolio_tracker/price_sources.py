@@ -0,0 +1,130 @@
+"""
+Prix en dollars tirés des tickers des échanges, en complément de CoinGecko.
+
+Binance et MEXC renvoient le dernier prix de toutes leurs paires en un seul
+appel (``/api/v3/ticker/price``). Le prix en dollars de chaque actif est déduit,
+en une passe vectorisée, de sa paire contre une devise stable (``USDT``, ``USDC``,
+``FDUSD``, comptées pour 1 dollar) ou, à défaut, contre ``BTC`` ou ``ETH``
+(prix croisé par le cours de BTC ou ETH contre la devise stable).
+
+Seuls les tickers déclarés pour l'échange dans la section ``tickers`` de
+``asset_mapping.json`` sont conservés, sous le symbole canonique de leur id :
+un même ticker peut désigner des jetons différents selon l'échange, il n'est
+donc jamais rapproché du ticker CoinGecko. Les prix s'écrivent dans
+``crypto_price`` comme ceux de CoinGecko, avec la colonne ``source`` en plus :
+un ticker est un cours instantané, sa ligne est donc provisoire
+(``binance:spot``, voir ``schema.SPOT_SUFFIX``) et cède la place au prix
+d'ouverture du jour. L'ordre des sources est donné par ``price_sources``
+(``binance,mexc,coingecko`` par défaut) : un actif coté par plusieurs sources
+prend le prix de la première, et CoinGecko ne reçoit que les ids qu'aucun
+échange ne cote.
+"""
+import os
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from .fetch import FetchError, request_with_retry
+from .schema import SPOT_SUFFIX
+
+TICKER_URLS = {
+    "binance": "https://api.binance.com/api/v3/ticker/price",
+    "mexc": "https://api.mexc.com/api/v3/ticker/price",
+}
+
+DEFAULT_SOURCES = "binance,mexc,coingecko"
+
+# Devises de cotation, par ordre de préférence
+DEFAULT_STABLE_QUOTES = "USDT,USDC,FDUSD"
+DEFAULT_CROSS_QUOTES = "BTC,ETH"
+
+COLUMNS = ['date', 'symbol', 'prix', 'market_cap', 'total_volume', 'source']
+
+
+def env_list(name, default):
+    return [value.strip() for value in os.getenv(name, default).split(",") if value.strip()]
+
+
+def get_sources():
+    """Sources de prix, par ordre de priorité (variable ``price_sources``)."""
+    return env_list("price_sources", DEFAULT_SOURCES)
+
+
+def fetch_tickers(session, source, limiter=None):
+    """Toutes les paires d'un échange : DataFrame ``pair, price``."""
+    response = request_with_retry(session, "GET", TICKER_URLS[source], limiter)
+    if response.status_code != 200:
+        raise FetchError(f"{source} ticker/price: ERREUR {response.status_code}")
+    df = pd.DataFrame.from_records(response.json(), columns=['symbol', 'price'])
+    return pd.DataFrame({'pair': df['symbol'], 'price': pd.to_numeric(df['price'], errors='coerce')})
+
+
+def usd_prices(tickers, stable=None, cross=None):
+    """
+    Prix en dollars de chaque actif de base : DataFrame ``base, prix, quote``.
+
+    Chaque paire est découpée selon la plus longue devise de cotation reconnue ;
+    pour chaque actif, la paire retenue est celle de la devise préférée.
+    """
+    stable = stable or env_list("price_stable_quotes", DEFAULT_STABLE_QUOTES)
+    cross = cross or env_list("price_cross_quotes", DEFAULT_CROSS_QUOTES)
+    quotes = stable + cross
+    pairs = tickers['pair']
+    base = pd.Series(None, index=tickers.index, dtype=object)
+    quote = pd.Series(None, index=tickers.index, dtype=object)
+    for candidate in sorted(quotes, key=len, reverse=True):
+        mask = quote.isna() & pairs.str.endswith(candidate) & (pairs.str.len() > len(candidate))
+        quote[mask] = candidate
+        base[mask] = pairs[mask].str.slice(0, -len(candidate))
+    df = pd.DataFrame({'base': base, 'quote': quote, 'price': tickers['price']})
+    df = df[df['quote'].notna() & (df['price'] > 0)]
+    df['rank'] = df['quote'].map({q: rank for rank, q in enumerate(quotes)})
+
+    # Prix en dollars des devises de cotation : 1 pour les stables, cours direct pour les croisées
+    direct = df[df['quote'].isin(stable)].sort_values('rank', kind='stable').drop_duplicates('base')
+    quote_usd = {**direct.set_index('base')['price'].reindex(cross).dropna().to_dict(), **{q: 1.0 for q in stable}}
+
+    df['prix'] = df['price'] * df['quote'].map(quote_usd)
+    df = df.dropna(subset=['prix']).sort_values(['base', 'rank'], kind='stable').drop_duplicates('base')
+    return df[['base', 'prix', 'quote']].reset_index(drop=True)
+
+
+def exchange_prices(source, session, index, limiter=None, day=None):
+    """Prix des actifs suivis cotés par l'échange ``source``, au format de ``crypto_price``."""
+    df = usd_prices(fetch_tickers(session, source, limiter))
+    # Tickers non déclarés pour cet échange ignorés : leur prix viendra de CoinGecko
+    coin_ids = index.ticker_series(source, df['base'])
+    df = df[coin_ids.notna().to_numpy()].assign(symbol=coin_ids.dropna().map(index.symbols).to_numpy())
+    # Plusieurs tickers peuvent désigner le même id : on garde le premier
+    df = df.drop_duplicates('symbol')
+    return pd.DataFrame({
+        'date': day or datetime.now(timezone.utc).date(),
+        'symbol': df['symbol'].to_numpy(),
+        'prix': df['prix'].to_numpy(),
+        'market_cap': float('nan'),
+        'total_volume': float('nan'),
+        'source': source + SPOT_SUFFIX,
+    }, columns=COLUMNS)
+
+
+def collect_exchange_prices(sources, session, index, limiter=None):
+    """
+    Prix de tous les échanges de ``sources`` (dans l'ordre de priorité), un par
+    symbole. Un échange injoignable est signalé puis ignoré.
+    """
+    frames, covered = [], set()
+    for source in sources:
+        if source not in TICKER_URLS:
+            continue
+        try:
+            df = exchange_prices(source, session, index, limiter)
+        except (FetchError, OSError) as exc:
+            print(f"{source}: tickers indisponibles ({exc})")
+            continue
+        df = df[~df['symbol'].isin(covered)]
+        covered.update(df['symbol'])
+        print(f"{source}: {len(df)} prix tirés des tickers")
+        frames.append(df)
+    if not frames:
+        return pd.DataFrame(columns=COLUMNS)
+    return pd.concat(frames, ignore_index=True)
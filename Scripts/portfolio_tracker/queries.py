@@ -0,0 +1,126 @@
+"""
+API de requêtes sur le portefeuille, pour les tableaux de bord, carnets et alertes.
+
+- ``get_portfolio_value(start, end, by)`` : valeur par jour, totale ou répartie
+  par ``plateforme``, ``symbol``, ``type_position`` ou ``adresse`` ;
+- ``get_allocation(day)`` : répartition par symbole d'un jour (le dernier par défaut) ;
+- ``get_price_series(symbols, start, end)`` : prix quotidiens de ``crypto_price``.
+
+Les requêtes lisent les tables pré-agrégées de ``valuation`` (seules les
+colonnes et les jours utiles) au lieu de rejoindre les tables de soldes et de
+prix. Leurs résultats passent par ``query_cache`` : un rechargement de tableau
+de bord est servi depuis le cache tant qu'aucune collecte n'a réécrit un jour
+de sa plage.
+"""
+import threading
+
+from .query_cache import QueryCache
+from .sinks import get_sink
+from .valuation import TABLE, TABLE_PLATFORM, TABLE_SYMBOL
+
+PRICE_TABLE = "crypto_price"
+
+# Table lue selon la répartition demandée (None : valeur totale)
+BY_TABLES = {
+    None: TABLE_PLATFORM,
+    "plateforme": TABLE_PLATFORM,
+    "symbol": TABLE_SYMBOL,
+    "type_position": TABLE,
+    "adresse": TABLE,
+}
+
+_sink = None
+_cache = None
+_lock = threading.Lock()
+
+
+def default_sink():
+    """Destination partagée par les requêtes du processus (un seul moteur SQL)."""
+    global _sink
+    with _lock:
+        if _sink is None:
+            _sink = get_sink()
+        return _sink
+
+
+def default_cache():
+    global _cache
+    with _lock:
+        if _cache is None:
+            _cache = QueryCache()
+        return _cache
+
+
+def sink_id(sink):
+    """Identifiant de la base lue, pour ne pas mélanger les résultats de deux destinations."""
+    engine = getattr(sink, "engine", None)
+    if engine is not None:
+        return engine.url.render_as_string(hide_password=True)
+    return str(getattr(sink, "root", sink.name))
+
+# --------------------------------------------------------------------------------
+
+# REQUÊTES
+
+
+def get_portfolio_value(start=None, end=None, by=None, sink=None, cache=None):
+    """
+    Valeur du portefeuille par jour entre ``start`` et ``end`` (bornes incluses).
+
+    Sans ``by``, DataFrame indexé par date avec la seule colonne ``valeur`` ;
+    sinon une colonne par plateforme, symbole, type de position ou adresse.
+    """
+    if by not in BY_TABLES:
+        raise ValueError(f"répartition inconnue : {by} (parmi {', '.join(str(key) for key in BY_TABLES)})")
+    sink, cache = sink or default_sink(), cache or default_cache()
+    table = BY_TABLES[by]
+
+    def compute():
+        columns = ['date', 'valeur'] + ([by] if by else [])
+        df = sink.read(table, columns, start=start, end=end)
+        if by is None:
+            return df.groupby('date')[['valeur']].sum(min_count=1).sort_index()
+        return df.pivot_table(index='date', columns=by, values='valeur', aggfunc='sum').sort_index()
+
+    params = {"sink": sink_id(sink), "start": start, "end": end, "by": by}
+    return cache.get("portfolio_value", params, [table], start, end, compute)
+
+
+def last_date(table, sink=None, cache=None):
+    """Dernier jour présent dans ``table`` (mis en cache comme les autres requêtes)."""
+    sink, cache = sink or default_sink(), cache or default_cache()
+    return cache.get("last_date", {"sink": sink_id(sink), "table": table}, [table], None, None,
+                     lambda: sink.max_date(table))
+
+
+def get_allocation(day=None, sink=None, cache=None):
+    """
+    Répartition du portefeuille par symbole à la date ``day`` (dernière date
+    valorisée par défaut) : montant, prix, valeur et part de chaque symbole.
+    """
+    sink, cache = sink or default_sink(), cache or default_cache()
+    day = day or last_date(TABLE_SYMBOL, sink, cache)
+    if day is None:
+        return None
+
+    def compute():
+        df = sink.read(TABLE_SYMBOL, ['symbol', 'montant', 'prix', 'valeur'], start=day, end=day)
+        df = df.dropna(subset=['valeur']).sort_values('valeur', ascending=False, ignore_index=True)
+        df['part'] = df['valeur'] / df['valeur'].sum()
+        return df
+
+    return cache.get("allocation", {"sink": sink_id(sink), "day": day}, [TABLE_SYMBOL], day, day, compute)
+
+
+def get_price_series(symbols, start=None, end=None, sink=None, cache=None):
+    """Prix quotidiens de ``symbols`` entre ``start`` et ``end`` : DataFrame date × symbole."""
+    sink, cache = sink or default_sink(), cache or default_cache()
+    symbols = sorted(set([symbols] if isinstance(symbols, str) else symbols))
+
+    def compute():
+        df = sink.read(PRICE_TABLE, ['date', 'symbol', 'prix'], start=start, end=end, filters={'symbol': symbols})
+        series = df.pivot_table(index='date', columns='symbol', values='prix', aggfunc='last')
+        return series.reindex(columns=symbols).sort_index()
+
+    params = {"sink": sink_id(sink), "symbols": symbols, "start": start, "end": end}
+    return cache.get("price_series", params, [PRICE_TABLE], start, end, compute)
@@ -0,0 +1,176 @@
+"""
+Cache des résultats de ``queries``, invalidé par jour écrit.
+
+Chaque écriture d'une destination (``sinks``, ``light``) appelle
+``record_write(table, dates)`` : un numéro de version (horodatage en
+nanosecondes) est enregistré pour chaque (table, jour) écrit, dans une base
+SQLite du dossier de cache partagée par tous les processus de la machine.
+
+La version d'une requête est la plus grande version des (table, jour) qu'elle
+lit, entre ses bornes de dates. Un résultat est rangé sous la clé
+(requête, paramètres, version) : une collecte qui écrit le jour J n'invalide que
+les requêtes dont la plage contient J, les autres restent des succès de cache.
+
+Les résultats sont gardés en mémoire (LRU de ``query_cache_size`` entrées, 256
+par défaut) et, avec ``query_cache_persist=1``, enregistrés sur disque dans la
+même base pour survivre au processus. Les écritures faites en dehors du paquet
+ne sont pas vues : ``query_cache_ttl_hours`` (24 par défaut) borne l'âge d'un
+résultat.
+"""
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from .config import cache_path
+
+DEFAULT_SIZE = 256
+DEFAULT_TTL_HOURS = 24
+
+CACHE_NAME = "query_cache.sqlite"
+
+
+def connect(path=None):
+    conn = sqlite3.connect(path or cache_path(CACHE_NAME), timeout=30)
+    conn.execute("CREATE TABLE IF NOT EXISTS versions "
+                 "(table_name TEXT NOT NULL, date TEXT NOT NULL, version INTEGER NOT NULL, PRIMARY KEY (table_name, date))")
+    conn.execute("CREATE TABLE IF NOT EXISTS results "
+                 "(key TEXT PRIMARY KEY, version INTEGER NOT NULL, computed_at REAL NOT NULL, payload BLOB NOT NULL)")
+    return conn
+
+
+def iso(day):
+    """Jour au format AAAA-MM-JJ (date, datetime, Timestamp ou chaîne)."""
+    return str(day)[:10]
+
+# --------------------------------------------------------------------------------
+
+# VERSIONS DES DONNÉES, PAR TABLE ET PAR JOUR
+
+
+def record_write(table, dates, path=None):
+    """Nouvelle version des jours ``dates`` de ``table`` ; une erreur du cache n'interrompt pas l'écriture."""
+    days = sorted({iso(day) for day in dates if day is not None and day == day})
+    if not days:
+        return
+    version = time.time_ns()
+    try:
+        conn = connect(path)
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT INTO versions (table_name, date, version) VALUES (?, ?, ?) "
+                    "ON CONFLICT (table_name, date) DO UPDATE SET version = excluded.version",
+                    [(table, day, version) for day in days])
+        finally:
+            conn.close()
+    except sqlite3.Error as exc:
+        print(f"{table}: version du cache de requêtes non enregistrée ({exc})")
+
+
+def data_version(conn, tables, start=None, end=None):
+    """Plus grande version des jours de ``tables`` compris entre ``start`` et ``end`` (bornes incluses)."""
+    conditions = [f"table_name IN ({', '.join('?' * len(tables))})"]
+    params = list(tables)
+    if start is not None:
+        conditions.append("date >= ?")
+        params.append(iso(start))
+    if end is not None:
+        conditions.append("date <= ?")
+        params.append(iso(end))
+    row = conn.execute(f"SELECT MAX(version) FROM versions WHERE {' AND '.join(conditions)}", params).fetchone()
+    return row[0] or 0
+
+# --------------------------------------------------------------------------------
+
+# CACHE DES RÉSULTATS
+
+
+class QueryCache:
+    """LRU en mémoire des résultats de requêtes, éventuellement doublé d'une copie sur disque."""
+
+    def __init__(self, size=None, persist=None, ttl_hours=None, path=None):
+        self.size = size or int(os.getenv("query_cache_size", DEFAULT_SIZE))
+        if persist is None:
+            persist = os.getenv("query_cache_persist", "0").lower() in ("1", "true", "yes")
+        self.persist = persist
+        self.ttl = 3600 * (ttl_hours if ttl_hours is not None
+                           else float(os.getenv("query_cache_ttl_hours", DEFAULT_TTL_HOURS)))
+        self.path = path or cache_path(CACHE_NAME)
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def key(self, name, params):
+        return hashlib.sha1(json.dumps([name, params], sort_keys=True, default=str).encode()).hexdigest()
+
+    def get(self, name, params, tables, start, end, compute):
+        """
+        Résultat de ``compute()`` pour la requête ``name`` : en cache tant qu'aucun
+        jour de ``tables`` entre ``start`` et ``end`` n'a été réécrit.
+        """
+        key = self.key(name, params)
+        conn = connect(self.path)
+        try:
+            version = data_version(conn, tables, start, end)
+            found, value = self.lookup(conn, key, version)
+            if found:
+                self.hits += 1
+            else:
+                self.misses += 1
+                value = compute()
+                self.store(conn, key, version, value)
+            # Copie rendue à l'appelant : le résultat en cache ne peut pas être modifié
+            return value.copy() if hasattr(value, "copy") else value
+        finally:
+            conn.close()
+
+    def lookup(self, conn, key, version):
+        """``(trouvé, résultat)`` en mémoire, puis sur disque si la persistance est active."""
+        now = time.time()
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] == version and now - entry[1] <= self.ttl:
+                self.entries.move_to_end(key)
+                return True, entry[2]
+        if not self.persist:
+            return False, None
+        row = conn.execute("SELECT computed_at, payload FROM results WHERE key = ? AND version = ?",
+                           (key, version)).fetchone()
+        if row is None or now - row[0] > self.ttl:
+            return False, None
+        value = pickle.loads(row[1])
+        self.remember(key, version, row[0], value)
+        return True, value
+
+    def remember(self, key, version, computed_at, value):
+        with self._lock:
+            self.entries[key] = (version, computed_at, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    def store(self, conn, key, version, value):
+        computed_at = time.time()
+        self.remember(key, version, computed_at, value)
+        if self.persist:
+            # Une seule version par requête sur disque : la nouvelle remplace l'ancienne
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO results (key, version, computed_at, payload) VALUES (?, ?, ?, ?)",
+                             (key, version, computed_at, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)))
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+        if self.persist:
+            conn = connect(self.path)
+            try:
+                with conn:
+                    conn.execute("DELETE FROM results")
+            finally:
+                conn.close()
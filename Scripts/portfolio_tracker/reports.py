@@ -0,0 +1,31 @@
+"""
+Lectures analytiques sur les tables de valorisation.
+
+Les requêtes ne portent que sur les quelques colonnes utiles des tables
+pré-agrégées : avec la destination ``parquet``, DuckDB ne lit que ces colonnes
+et les partitions des jours demandés au lieu de parcourir toute la table.
+"""
+from .sinks import get_sink
+from .valuation import TABLE_PLATFORM, TABLE_SYMBOL
+
+
+def portfolio_history(sink=None, start=None, end=None):
+    """Valeur totale du portefeuille par jour, avec le détail par plateforme en colonnes."""
+    sink = sink or get_sink()
+    df = sink.read(TABLE_PLATFORM, ['date', 'plateforme', 'valeur'], start=start, end=end)
+    history = df.pivot_table(index='date', columns='plateforme', values='valeur', aggfunc='sum')
+    history['total'] = history.sum(axis=1, min_count=1)
+    return history.sort_index()
+
+
+def symbol_allocation(sink=None, day=None):
+    """Répartition du portefeuille par symbole à la date ``day`` (dernière date valorisée par défaut)."""
+    sink = sink or get_sink()
+    day = day or sink.max_date(TABLE_SYMBOL)
+    if day is None:
+        return None
+    return sink.query(
+        f"SELECT symbol, montant, prix, valeur, valeur / SUM(valeur) OVER () AS part "
+        f"FROM {TABLE_SYMBOL} WHERE date = :day AND valeur IS NOT NULL ORDER BY valeur DESC",
+        {"day": day},
+    )
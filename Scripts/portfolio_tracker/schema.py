@@ -0,0 +1,95 @@
+"""
+Schéma des tables, sans dépendance : clés naturelles, colonnes additionnées
+et règles de type de position.
+
+Partagé par ``db`` (écriture par DataFrame), ``classification`` (règles
+vectorisées) et ``light`` (chemins légers, sans pandas ni SQLAlchemy).
+"""
+import re
+
+# Clé naturelle des tables de soldes : une ligne par position et par jour
+BALANCE_KEY = ['date', 'symbol', 'plateforme', 'adresse', 'type_position', 'protocole']
+
+# Clé naturelle des tables de transactions : identifiant de l'opération chez sa source
+TRANSACTION_KEY = ['date', 'plateforme', 'adresse', 'symbol', 'transaction_id']
+
+NATURAL_KEYS = {
+    "crypto_price": ['date', 'symbol'],
+    "binance_soldewallet": BALANCE_KEY,
+    "mexc_soldewallet": BALANCE_KEY,
+    "evm_soldewallet": BALANCE_KEY,
+    "starknet_soldewallet": BALANCE_KEY,
+    "starknet_soldewallet_dataviz": BALANCE_KEY,
+    "portfolio_valuation_daily": BALANCE_KEY,
+    "portfolio_valuation_platform_daily": ['date', 'plateforme'],
+    "portfolio_valuation_symbol_daily": ['date', 'symbol'],
+    "binance_trades": TRANSACTION_KEY,
+    "mexc_trades": TRANSACTION_KEY,
+    "evm_transactions": TRANSACTION_KEY,
+    "pnl_daily": ['date', 'symbol'],
+}
+
+# Partitions intrajournalières, une table par jour (ex. ``intraday_balance_20240101``) :
+# clé d'un relevé horodaté, la date étant celle de la partition
+INTRADAY_KEYS = {
+    "intraday_balance": ['ts', 'plateforme', 'symbol'],
+    "intraday_price": ['ts', 'symbol'],
+}
+
+
+def natural_key(table):
+    """Clé naturelle d'une table, partitions intrajournalières comprises."""
+    if table in NATURAL_KEYS:
+        return NATURAL_KEYS[table]
+    prefix, _, day = table.rpartition("_")
+    if prefix in INTRADAY_KEYS and day.isdigit():
+        return INTRADAY_KEYS[prefix]
+    raise KeyError(f"{table}: clé naturelle inconnue")
+
+# Suffixe de la colonne ``source`` de ``crypto_price`` pour un cours instantané (``/coins/markets``,
+# tickers des échanges) : ligne provisoire, remplacée par le prix d'ouverture du jour
+SPOT_SUFFIX = ":spot"
+
+
+def is_spot(source):
+    """Vrai si ``source`` désigne un cours instantané, donc un prix provisoire."""
+    return isinstance(source, str) and source.endswith(SPOT_SUFFIX)
+
+# Colonnes additionnées quand plusieurs lignes d'un même lot partagent la clé
+# (ex. BTC et LDBTC sur Binance, qui deviennent tous deux BTC)
+SUM_COLUMNS = {
+    "binance_soldewallet": ['montant'],
+    "mexc_soldewallet": ['montant'],
+    "evm_soldewallet": ['montant'],
+    "starknet_soldewallet": ['montant'],
+    "starknet_soldewallet_dataviz": ['montant'],
+    "portfolio_valuation_daily": ['montant', 'valeur'],
+}
+
+# Colonnes des tables de soldes, dans l'ordre d'écriture
+BALANCE_COLUMNS = ['date', 'symbol', 'plateforme', 'montant', 'type_position', 'protocole', 'adresse']
+
+# Jeton de staking : préfixe contenant une minuscule suivi de STRK (ex. xSTRK, nstSTRK)
+STAKED_PATTERN = r'[a-z].*STRK$'
+
+# Jeton de dépôt : préfixe contenant une minuscule suivi de ETH (ex. ezETH, wstETH)
+DEPOSIT_PATTERN = r'[a-z].*ETH$'
+
+
+def position_type(symbol, montant):
+    """
+    Type de position : 'staked', 'deposit', 'loan' (montant négatif) ou 'wallet'.
+
+    Seule définition des règles : ``classification`` l'applique aux couples
+    (symbole, signe du montant) distincts d'une ``Series``.
+    """
+    if isinstance(symbol, str) and re.search(STAKED_PATTERN, symbol):
+        return 'staked'
+    if isinstance(symbol, str) and re.search(DEPOSIT_PATTERN, symbol):
+        return 'deposit'
+    return 'loan' if montant < 0 else 'wallet'
+
+
+def signed_amount(montant, type_position):
+    """Montant enregistré : négatif pour une position de type 'loan'."""
+    return -montant if type_position == 'loan' else montant
@@ -0,0 +1,264 @@
+"""
+Destinations d'écriture (« sinks ») des collecteurs et lectures associées.
+
+Deux implémentations interchangeables, choisies par la variable ``portfolio_sink`` :
+
+- ``mysql`` (défaut) : base SQLAlchemy de ``db.get_engine`` (MySQL, ou toute
+  URL ``db_url``), écriture par ``db.upsert`` ;
+- ``parquet`` : stockage local en colonnes, un fichier Parquet par table et
+  par jour (``<portfolio_data_dir>/parquet/<table>/date=AAAA-MM-JJ/data.parquet``),
+  lu avec DuckDB. Aucune base n'est nécessaire pour développer ou tester.
+
+``mysql,parquet`` écrit dans les deux et lit dans le premier.
+
+Toutes les implémentations exposent la même interface :
+
+- ``write(df, table)`` : écriture idempotente sur la clé naturelle de la table ;
+- ``read(table, columns, start, end, filters)`` : lecture des seules colonnes
+  demandées, filtrée par date (bornes incluses) et par listes de valeurs ;
+- ``query(sql, params)`` : requête SQL (paramètres ``:nom``) sur les tables ;
+- ``has_table``, ``tables(prefix)`` (tables existantes), ``drop``, ``max_date`` et ``close``.
+
+Chaque écriture signale les jours écrits au cache de ``queries`` (``query_cache``).
+"""
+import os
+import re
+import shutil
+import threading
+
+import pandas as pd
+from sqlalchemy import bindparam, inspect, text
+
+from .config import data_path
+from .db import SUM_COLUMNS, get_engine, prepare_frame, upsert
+from .schema import natural_key
+from .metrics import stage
+from .query_cache import record_write
+
+
+def record_dates(df, table):
+    """Signale au cache de ``queries`` les jours de ``table`` qui viennent d'être écrits."""
+    if 'date' in df.columns and not df.empty:
+        record_write(table, df['date'].unique())
+
+
+def normalise_dates(df):
+    """Colonne ``date`` en objets ``datetime.date``, quel que soit le moteur."""
+    if 'date' in df.columns:
+        df['date'] = pd.to_datetime(df['date']).dt.date
+    return df
+
+# --------------------------------------------------------------------------------
+
+# BASE SQL (MYSQL)
+
+
+class SqlSink:
+    name = "mysql"
+
+    def __init__(self, engine=None):
+        self.engine = engine or get_engine()
+
+    def write(self, df, table):
+        with stage(f"write_{self.name}"):
+            rows = upsert(df, table, self.engine)
+        record_dates(df, table)
+        return rows
+
+    def has_table(self, table):
+        return inspect(self.engine).has_table(table)
+
+    def tables(self, prefix=""):
+        return sorted(table for table in inspect(self.engine).get_table_names() if table.startswith(prefix))
+
+    def drop(self, table):
+        with self.engine.begin() as conn:
+            conn.execute(text(f"DROP TABLE IF EXISTS {self.engine.dialect.identifier_preparer.quote(table)}"))
+
+    def read(self, table, columns=None, start=None, end=None, filters=None):
+        if not self.has_table(table):
+            return pd.DataFrame(columns=columns)
+        conditions, params, expanding = [], {}, []
+        if start is not None:
+            conditions.append("date >= :start")
+            params["start"] = start
+        if end is not None:
+            conditions.append("date <= :end")
+            params["end"] = end
+        for column, values in (filters or {}).items():
+            conditions.append(f"{column} IN :{column}")
+            params[column] = list(values)
+            expanding.append(column)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        query = text(f"SELECT {', '.join(columns) if columns else '*'} FROM {table}{where}")
+        if expanding:
+            query = query.bindparams(*(bindparam(column, expanding=True) for column in expanding))
+        return normalise_dates(pd.read_sql(query, self.engine, params=params))
+
+    def query(self, sql, params=None):
+        return normalise_dates(pd.read_sql(text(sql), self.engine, params=params))
+
+    def max_date(self, table):
+        if not self.has_table(table):
+            return None
+        with self.engine.connect() as conn:
+            value = conn.execute(text(f"SELECT MAX(date) FROM {table}")).scalar()
+        # SQLite stocke les dates en texte ISO : même type que sous MySQL
+        return pd.Timestamp(value).date() if value is not None else None
+
+    def close(self):
+        self.engine.dispose()
+
+# --------------------------------------------------------------------------------
+
+# STOCKAGE LOCAL EN COLONNES (PARQUET + DUCKDB)
+
+
+class ParquetSink:
+    """
+    Une partition par table et par jour. L'écriture d'un jour relit sa seule
+    partition, remplace les lignes de même clé et réécrit le fichier de façon
+    atomique ; les lectures ne parcourent que les colonnes et les jours demandés.
+    """
+    name = "parquet"
+
+    def __init__(self, root=None):
+        self.root = root or os.getenv("parquet_dir") or data_path("parquet")
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def table_dir(self, table):
+        return os.path.join(self.root, table)
+
+    def partition_file(self, table, day):
+        return os.path.join(self.table_dir(table), f"date={day.isoformat()}", "data.parquet")
+
+    def table_lock(self, table):
+        with self._lock:
+            return self._locks.setdefault(table, threading.Lock())
+
+    def write(self, df, table):
+        if df.empty:
+            return 0
+        if 'date' not in df.columns:
+            raise ValueError(f"{table}: une colonne 'date' est nécessaire au partitionnement")
+        key = natural_key(table)
+        df = prepare_frame(df, key, SUM_COLUMNS.get(table))
+        with self.table_lock(table), stage(f"write_{self.name}"):
+            for day, group in df.groupby('date', sort=True):
+                path = self.partition_file(table, day)
+                group = group.drop(columns=['date'])
+                if os.path.exists(path):
+                    existing = pd.read_parquet(path)
+                    group = pd.concat([existing, group], ignore_index=True)
+                    group = group.drop_duplicates(subset=[column for column in key if column != 'date'], keep='last')
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp = f"{path}.tmp"
+                group.to_parquet(tmp, index=False)
+                os.replace(tmp, path)
+        record_dates(df, table)
+        return len(df)
+
+    def has_table(self, table):
+        return os.path.isdir(self.table_dir(table)) and bool(self.partitions(table))
+
+    def tables(self, prefix=""):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(table for table in os.listdir(self.root) if table.startswith(prefix) and self.has_table(table))
+
+    def partitions(self, table):
+        """Jours disponibles, lus dans les noms de dossiers (sans ouvrir les fichiers)."""
+        if not os.path.isdir(self.table_dir(table)):
+            return []
+        return sorted(name[len("date="):] for name in os.listdir(self.table_dir(table))
+                      if name.startswith("date=") and os.path.exists(os.path.join(self.table_dir(table), name, "data.parquet")))
+
+    def scan(self, table):
+        pattern = os.path.join(self.table_dir(table), "*", "data.parquet")
+        return f"read_parquet('{pattern}', hive_partitioning = true, union_by_name = true)"
+
+    def connect(self):
+        import duckdb
+        return duckdb.connect()
+
+    def read(self, table, columns=None, start=None, end=None, filters=None):
+        if not self.has_table(table):
+            return pd.DataFrame(columns=columns)
+        conditions, params = [], {}
+        if start is not None:
+            conditions.append("date >= $start")
+            params["start"] = start
+        if end is not None:
+            conditions.append("date <= $end")
+            params["end"] = end
+        for column, values in (filters or {}).items():
+            conditions.append(f"list_contains(${column}, {column})")
+            params[column] = list(values)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        sql = f"SELECT {', '.join(columns) if columns else '*'} FROM {self.scan(table)}{where}"
+        with self.connect() as conn:
+            return normalise_dates(conn.execute(sql, params).df())
+
+    def query(self, sql, params=None):
+        """Requête SQL où chaque table est une vue sur ses fichiers Parquet."""
+        with self.connect() as conn:
+            for table in os.listdir(self.root) if os.path.isdir(self.root) else []:
+                if self.has_table(table) and re.search(rf"\b{table}\b", sql):
+                    conn.execute(f"CREATE VIEW {table} AS SELECT * FROM {self.scan(table)}")
+            sql = re.sub(r"(?<!:):(\w+)", r"$\1", sql)
+            return normalise_dates(conn.execute(sql, params or {}).df())
+
+    def max_date(self, table):
+        partitions = self.partitions(table)
+        return pd.Timestamp(partitions[-1]).date() if partitions else None
+
+    def drop(self, table):
+        record_write(table, self.partitions(table))
+        shutil.rmtree(self.table_dir(table), ignore_errors=True)
+
+    def close(self):
+        pass
+
+# --------------------------------------------------------------------------------
+
+# ÉCRITURE DANS PLUSIEURS DESTINATIONS
+
+
+class MultiSink:
+    """Écrit dans toutes les destinations et lit dans la première."""
+
+    def __init__(self, sinks):
+        self.sinks = sinks
+        self.name = ",".join(sink.name for sink in sinks)
+
+    def write(self, df, table):
+        rows = 0
+        for sink in self.sinks:
+            rows = sink.write(df, table)
+        return rows
+
+    def drop(self, table):
+        for sink in self.sinks:
+            sink.drop(table)
+
+    def __getattr__(self, attribute):
+        return getattr(self.sinks[0], attribute)
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+
+
+def get_sink(names=None, **engine_kwargs):
+    """Destination configurée par ``portfolio_sink`` (``mysql``, ``parquet`` ou ``mysql,parquet``)."""
+    names = names or os.getenv("portfolio_sink", "mysql")
+    sinks = []
+    for name in (part.strip() for part in names.split(",")):
+        if name == "mysql":
+            sinks.append(SqlSink(get_engine(**engine_kwargs)))
+        elif name == "parquet":
+            sinks.append(ParquetSink())
+        else:
+            raise ValueError(f"destination inconnue : {name}")
+    return sinks[0] if len(sinks) == 1 else MultiSink(sinks)
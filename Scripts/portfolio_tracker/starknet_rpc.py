@@ -0,0 +1,117 @@
+"""
+Lecture des soldes Starknet par JSON-RPC, sans navigateur.
+
+Les soldes ERC-20 (et les jetons de staking/dépôt comme xSTRK ou wstETH) de
+toutes les adresses sont lus avec des appels ``starknet_call`` envoyés par
+lots JSON-RPC : une seule requête HTTP couvre jusqu'à ``batch_size`` couples
+(jeton, adresse).
+"""
+import json
+import os
+
+import requests
+
+from .fetch import FetchError, TokenBucket, request_with_retry
+
+DEFAULT_RPC_URL = "https://rpc.starknet.lava.build"
+
+# Sélecteurs des points d'entrée (starknet_keccak du nom de la fonction)
+SELECTORS = {
+    "balanceOf": "0x2e4263afad30923c891518314c3c95dbe830a16874e8abc5777a9a20b54c76e",
+    "balance_of": "0x35a73cd311a05d46deda634c5ee045db92f811b4e74bca4437fcb5302b7af33",
+}
+
+# Jetons lus par défaut ; la liste peut être remplacée par un fichier JSON (``starknet_tokens_file``)
+# contenant des objets {"symbol", "address", "decimals", "entry_point"}
+DEFAULT_TOKENS = [
+    {"symbol": "ETH", "address": "0x049d36570d4e46f48e99674bd3fcc84644ddd6b96f7c741b1562b82f9e004dc7", "decimals": 18},
+    {"symbol": "STRK", "address": "0x04718f5a0fc34cc1af16a1cdee98ffb20c31f5cd61d6ab07201858f4287c938d", "decimals": 18},
+    {"symbol": "USDC", "address": "0x053c91253bc9682c04929ca02ed00b3e423f6710d2ee7e0d5ebb06f3ecf368a8", "decimals": 6},
+    {"symbol": "USDT", "address": "0x068f5c6a61780768455de69077e07e89787839bf8166decfbf92b645209c0fb8", "decimals": 6},
+    {"symbol": "WBTC", "address": "0x03fe2b97c1fd336e750087d68b9b867997fd64a2661ff3ca5a7c771641e8e7ac", "decimals": 8},
+    {"symbol": "wstETH", "address": "0x042b8f0484674ca266ac5d08e4ac6a3fe65bd3129795def2dca5c34ecc5f96d2", "decimals": 18},
+    {"symbol": "xSTRK", "address": "0x028d709c875c0ceac3dce7065bec5328186dc89fe254527084d1689910954b0a", "decimals": 18},
+]
+
+DEFAULT_BATCH_SIZE = 50
+
+
+def load_tokens(path=None):
+    path = path or os.getenv("starknet_tokens_file")
+    if not path:
+        return DEFAULT_TOKENS
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def get_addresses():
+    """
+    Adresses Starknet à suivre : ``starknet_adresses`` (séparées par des virgules),
+    à défaut les variables historiques ``argent_adress`` et ``braavos_adress``.
+    """
+    addresses = os.getenv("starknet_adresses")
+    if addresses:
+        return [address.strip() for address in addresses.split(",") if address.strip()]
+    return [address for address in (os.getenv("argent_adress"), os.getenv("braavos_adress")) if address]
+
+
+def decode_uint256(result):
+    """Un ``u256`` Cairo est renvoyé en deux felts (partie basse, partie haute)."""
+    values = [int(value, 16) for value in result]
+    if len(values) >= 2:
+        return values[0] + (values[1] << 128)
+    return values[0] if values else 0
+
+
+def balance_call(request_id, token, address):
+    selector = SELECTORS[token.get("entry_point", "balanceOf")]
+    return {
+        "jsonrpc": "2.0",
+        "id": request_id,
+        "method": "starknet_call",
+        "params": {
+            "request": {
+                "contract_address": token["address"],
+                "entry_point_selector": selector,
+                "calldata": [address],
+            },
+            "block_id": "latest",
+        },
+    }
+
+
+def fetch_balances(addresses, tokens=None, session=None, rpc_url=None, limiter=None, batch_size=None):
+    """
+    Lit le solde de chaque jeton pour chaque adresse.
+
+    Renvoie une liste de dictionnaires ``{symbol, montant, adresse}`` limitée
+    aux soldes non nuls. Un appel en erreur (ex. contrat absent) est signalé
+    puis ignoré sans faire échouer le lot.
+    """
+    tokens = tokens or load_tokens()
+    session = session or requests.Session()
+    rpc_url = rpc_url or os.getenv("starknet_rpc_url", DEFAULT_RPC_URL)
+    batch_size = batch_size or int(os.getenv("starknet_rpc_batch_size", DEFAULT_BATCH_SIZE))
+    if limiter is None:
+        limiter = TokenBucket(float(os.getenv("starknet_rpc_rate_per_minute", 120)))
+
+    pairs = [(token, address) for address in addresses for token in tokens]
+    rows = []
+    for start in range(0, len(pairs), batch_size):
+        chunk = pairs[start:start + batch_size]
+        payload = [balance_call(start + i, token, address) for i, (token, address) in enumerate(chunk)]
+        response = request_with_retry(session, "POST", rpc_url, limiter, json=payload)
+        if response.status_code != 200:
+            raise FetchError(f"starknet RPC: ERREUR {response.status_code}")
+        replies = response.json()
+        if isinstance(replies, dict):
+            raise FetchError(f"starknet RPC: {replies.get('error')}")
+        for reply in sorted(replies, key=lambda reply: reply["id"]):
+            token, address = pairs[reply["id"]]
+            if "error" in reply:
+                print(f"{token['symbol']} ({address}): ERREUR {reply['error']}")
+                continue
+            raw = decode_uint256(reply["result"])
+            if raw:
+                rows.append({"symbol": token["symbol"], "montant": raw / 10 ** token["decimals"], "adresse": address})
+    return rows
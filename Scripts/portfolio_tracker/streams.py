@@ -0,0 +1,306 @@
+"""
+Suivi en continu des soldes Binance et MEXC par les flux utilisateur WebSocket.
+
+Pour chaque plateforme, un service ``asyncio`` :
+
+1. relève le compte complet une seule fois par l'API REST ;
+2. ouvre un flux utilisateur (``listenKey``), prolongé toutes les
+   ``stream_keepalive_interval`` secondes (30 minutes par défaut) ;
+3. applique en mémoire les évènements de solde, qui ne portent que sur les
+   actifs modifiés (``outboundAccountPosition`` chez Binance,
+   ``spot@private.account.v3.api`` chez MEXC) ;
+4. écrit par lots, toutes les ``stream_flush_interval`` secondes (10 par
+   défaut), les seules positions modifiées dans les tables quotidiennes de soldes.
+
+Les positions sont transformées comme par les collecteurs (poussière filtrée,
+symboles canoniques), puis seules celles dont le symbole a changé sont écrites ;
+une position devenue nulle est écrite à 0. La première écriture de chaque jour
+est complète. Après une coupure, le flux est rouvert à partir d'un nouveau
+relevé REST : un évènement perdu ne peut pas fausser l'état.
+"""
+import asyncio
+import json
+import os
+from datetime import date
+
+import pandas as pd
+import websockets
+
+from .asset_mapping import get_index
+from .sinks import get_sink
+
+DEFAULT_FLUSH_INTERVAL = 10
+DEFAULT_KEEPALIVE_INTERVAL = 30 * 60
+DEFAULT_RECONNECT_DELAY = 5
+
+COLUMNS = ['date', 'symbol', 'plateforme', 'montant', 'type_position', 'protocole', 'adresse']
+
+
+class StreamExpired(Exception):
+    """Le flux a été fermé par la plateforme (``listenKey`` expirée) : il faut le rouvrir."""
+
+
+class BalanceStream:
+    """
+    Soldes d'une plateforme tenus à jour par son flux utilisateur.
+
+    Les sous-classes fournissent le relevé REST, la gestion de la ``listenKey``,
+    l'URL du flux et la lecture des évènements.
+    """
+
+    name = None
+    platform = None
+    table = None
+    # Message applicatif envoyé à chaque écriture pour garder la connexion active
+    heartbeat = None
+
+    def __init__(self, sink, flush_interval=None, keepalive_interval=None):
+        self.sink = sink
+        self.flush_interval = flush_interval or float(os.getenv("stream_flush_interval", DEFAULT_FLUSH_INTERVAL))
+        self.keepalive_interval = keepalive_interval or float(
+            os.getenv("stream_keepalive_interval", DEFAULT_KEEPALIVE_INTERVAL))
+        self.balances = {}
+        self.changed = set()
+        self.flushed_day = None
+
+    # À redéfinir par plateforme
+
+    def snapshot(self):
+        """Soldes complets ``[{"asset", "free", "locked"}]`` lus par l'API REST."""
+        raise NotImplementedError
+
+    def open_listen_key(self):
+        raise NotImplementedError
+
+    def keepalive(self, listen_key):
+        raise NotImplementedError
+
+    def url(self, listen_key):
+        raise NotImplementedError
+
+    def subscriptions(self):
+        """Messages à envoyer une fois connecté."""
+        return []
+
+    def updates(self, message):
+        """Soldes ``(actif, disponible, bloqué)`` contenus dans un évènement."""
+        raise NotImplementedError
+
+    def transform(self, account):
+        """DataFrame au format de la table quotidienne, comme le collecteur REST."""
+        raise NotImplementedError
+
+    def symbol(self, asset):
+        """Symbole sous lequel l'actif est écrit par ``transform``."""
+        return asset
+
+    # --------------------------------------------------------------------------------
+
+    # ÉTAT EN MÉMOIRE
+
+    def load_snapshot(self, balances):
+        self.balances = {balance["asset"]: (float(balance["free"]), float(balance["locked"])) for balance in balances}
+        self.changed.clear()
+        # Un nouveau relevé remplace tout l'état : la prochaine écriture est complète
+        self.flushed_day = None
+
+    def apply(self, message):
+        for asset, free, locked in self.updates(message):
+            if self.balances.get(asset) != (free, locked):
+                self.balances[asset] = (free, locked)
+                self.changed.add(asset)
+
+    def frame(self, today=None):
+        """Positions à écrire : toutes au premier passage du jour, sinon celles des actifs modifiés."""
+        today = today or date.today()
+        account = {"balances": [{"asset": asset, "free": free, "locked": locked}
+                                for asset, (free, locked) in self.balances.items()]}
+        df = self.transform(account)
+        if self.flushed_day == today:
+            symbols = {self.symbol(asset) for asset in self.changed}
+            df = df[df['symbol'].isin(symbols)]
+            # Positions devenues nulles (ou poussière) : écrites à 0 pour remplacer la ligne du jour
+            gone = sorted(symbols - set(df['symbol']))
+            if gone:
+                zeros = pd.DataFrame({'date': today, 'symbol': gone, 'plateforme': self.platform, 'montant': 0.0,
+                                      'type_position': 'wallet', 'protocole': None, 'adresse': None}, columns=COLUMNS)
+                df = pd.concat([df, zeros], ignore_index=True)
+        return df
+
+    def flush(self, today=None):
+        """Écrit les positions modifiées ; renvoie le nombre de lignes écrites."""
+        today = today or date.today()
+        if not self.changed and self.flushed_day == today:
+            return 0
+        df = self.frame(today)
+        rows = self.sink.write(df, self.table) if not df.empty else 0
+        self.changed.clear()
+        self.flushed_day = today
+        print(f"{self.name}: {rows} position(s) écrite(s)")
+        return rows
+
+    # --------------------------------------------------------------------------------
+
+    # BOUCLE DU FLUX
+
+    async def session(self, stop):
+        """Un relevé REST puis la lecture du flux jusqu'à ``stop`` ou une coupure."""
+        self.load_snapshot(await asyncio.to_thread(self.snapshot))
+        listen_key = await asyncio.to_thread(self.open_listen_key)
+        loop = asyncio.get_running_loop()
+        try:
+            async with websockets.connect(self.url(listen_key)) as ws:
+                for message in self.subscriptions():
+                    await ws.send(json.dumps(message))
+                await asyncio.to_thread(self.flush)
+                next_flush = loop.time() + self.flush_interval
+                next_keepalive = loop.time() + self.keepalive_interval
+                while not stop.is_set():
+                    try:
+                        raw = await asyncio.wait_for(ws.recv(), max(0.0, min(next_flush, next_keepalive) - loop.time()))
+                    except asyncio.TimeoutError:
+                        pass
+                    else:
+                        self.apply(json.loads(raw))
+                    now = loop.time()
+                    if now >= next_flush:
+                        await asyncio.to_thread(self.flush)
+                        if self.heartbeat is not None:
+                            await ws.send(json.dumps(self.heartbeat))
+                        next_flush = now + self.flush_interval
+                    if now >= next_keepalive:
+                        await asyncio.to_thread(self.keepalive, listen_key)
+                        next_keepalive = now + self.keepalive_interval
+        finally:
+            # Ne pas perdre les dernières modifications à l'arrêt ou à la coupure
+            if self.changed:
+                self.flush()
+
+    async def run(self, stop):
+        """Relance la session après chaque coupure, jusqu'à ``stop``."""
+        delay = float(os.getenv("stream_reconnect_delay", DEFAULT_RECONNECT_DELAY))
+        while not stop.is_set():
+            try:
+                await self.session(stop)
+            except (OSError, StreamExpired, websockets.ConnectionClosed) as exc:
+                print(f"{self.name}: flux interrompu ({exc!r}), reconnexion dans {delay:g}s")
+            except Exception as exc:
+                print(f"{self.name}: ERREUR ({exc!r}), reconnexion dans {delay:g}s")
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+# --------------------------------------------------------------------------------
+
+# BINANCE
+
+
+class BinanceStream(BalanceStream):
+    name = "binance"
+    platform = "Binance"
+    table = "binance_soldewallet"
+
+    def __init__(self, sink, flush_interval=None, keepalive_interval=None):
+        super().__init__(sink, flush_interval, keepalive_interval)
+        from .collectors import binance_wallet
+        self.collector = binance_wallet
+        self.client = None
+
+    def snapshot(self):
+        self.client = self.collector.get_client()
+        return self.collector.fetch(self.client)["balances"]
+
+    def open_listen_key(self):
+        return self.client.stream_get_listen_key()
+
+    def keepalive(self, listen_key):
+        self.client.stream_keepalive(listen_key)
+
+    def url(self, listen_key):
+        return f"{os.getenv('binance_ws_url', 'wss://stream.binance.com:9443/ws')}/{listen_key}"
+
+    def updates(self, message):
+        # balanceUpdate (dépôts, retraits) est toujours suivi d'un outboundAccountPosition
+        # qui donne le nouveau solde : seul ce dernier est appliqué, sans double comptage
+        if message.get("e") == "listenKeyExpired":
+            raise StreamExpired("listenKey expirée")
+        if message.get("e") != "outboundAccountPosition":
+            return []
+        return [(balance["a"], float(balance["f"]), float(balance["l"])) for balance in message["B"]]
+
+    def transform(self, account):
+        return self.collector.transform(account, self.sink)
+
+    def symbol(self, asset):
+        return get_index().canonical_symbol('binance', asset)
+
+# --------------------------------------------------------------------------------
+
+# MEXC
+
+
+class MexcStream(BalanceStream):
+    name = "mexc"
+    platform = "MEXC"
+    table = "mexc_soldewallet"
+    channel = "spot@private.account.v3.api"
+    heartbeat = {"method": "PING"}
+
+    def __init__(self, sink, flush_interval=None, keepalive_interval=None):
+        super().__init__(sink, flush_interval, keepalive_interval)
+        from .collectors import mexc_wallet
+        self.collector = mexc_wallet
+
+    def snapshot(self):
+        return self.collector.fetch()["balances"]
+
+    def open_listen_key(self):
+        return self.collector.signed_request("POST", "/api/v3/userDataStream")["listenKey"]
+
+    def keepalive(self, listen_key):
+        self.collector.signed_request("PUT", "/api/v3/userDataStream", {"listenKey": listen_key})
+
+    def url(self, listen_key):
+        return f"{os.getenv('mexc_ws_url', 'wss://wbs.mexc.com/ws')}?listenKey={listen_key}"
+
+    def subscriptions(self):
+        return [{"method": "SUBSCRIPTION", "params": [self.channel]}]
+
+    def updates(self, message):
+        # Les accusés de réception et les PONG n'ont pas de canal
+        if message.get("c") != self.channel:
+            return []
+        data = message["d"]
+        return [(data["a"], float(data["f"]), float(data["l"]))]
+
+    def transform(self, account):
+        return self.collector.transform(account, self.sink)
+
+    def symbol(self, asset):
+        return get_index().canonical_symbol('mexc', asset)
+
+# --------------------------------------------------------------------------------
+
+# LANCEMENT DU SERVICE
+
+
+STREAMS = {"binance": BinanceStream, "mexc": MexcStream}
+
+
+def run_streams(names=None, sink=None, flush_interval=None):
+    """Suit les soldes des plateformes ``names`` (toutes par défaut) jusqu'à interruption (Ctrl+C)."""
+    sink = sink or get_sink()
+    streams = [STREAMS[name](sink, flush_interval) for name in (names or STREAMS)]
+
+    async def main():
+        stop = asyncio.Event()
+        await asyncio.gather(*(stream.run(stop) for stream in streams))
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("Arrêt des flux de soldes")
+    finally:
+        sink.close()
+    return 0
@@ -0,0 +1,144 @@
+"""
+Serveurs HTTP locaux qui imitent les API externes, pour tester les collecteurs
+sans réseau :
+
+    with StubStarknetRpc({(token, address): 10 ** 18}) as rpc_url:
+        fetch_balances([address], rpc_url=rpc_url)
+
+    with StubUserDataStream() as ws_url:
+        ...  # stub.push({...}) envoie un évènement aux clients connectés
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubServer:
+    """Serveur lancé dans un thread le temps d'un bloc ``with`` ; renvoie son URL."""
+
+    def handle(self, method, path, body):
+        """Renvoie ``(status, objet JSON)`` pour une requête ; à redéfinir."""
+        raise NotImplementedError
+
+    def __enter__(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def respond(self, method):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length)) if length else None
+                status, payload = stub.handle(method, self.path, body)
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self.respond("GET")
+
+            def do_POST(self):
+                self.respond("POST")
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return f"http://127.0.0.1:{self.server.server_port}"
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class StubStarknetRpc(StubServer):
+    """
+    Nœud Starknet minimal : répond aux lots ``starknet_call`` de ``balanceOf``.
+
+    ``balances`` associe ``(contrat, adresse)`` à un solde brut (entier) ; les
+    contrats listés dans ``missing_contracts`` renvoient l'erreur « Contract not found ».
+    """
+
+    def __init__(self, balances, missing_contracts=()):
+        self.balances = {(int(token, 16), int(address, 16)): value for (token, address), value in balances.items()}
+        self.missing_contracts = {int(contract, 16) for contract in missing_contracts}
+        self.requests = 0
+
+    def call(self, request):
+        params = request["params"]["request"]
+        contract = int(params["contract_address"], 16)
+        if contract in self.missing_contracts:
+            return {"jsonrpc": "2.0", "id": request["id"], "error": {"code": 20, "message": "Contract not found"}}
+        value = self.balances.get((contract, int(params["calldata"][0], 16)), 0)
+        low, high = value & (2 ** 128 - 1), value >> 128
+        return {"jsonrpc": "2.0", "id": request["id"], "result": [hex(low), hex(high)]}
+
+    def handle(self, method, path, body):
+        self.requests += 1
+        if isinstance(body, list):
+            return 200, [self.call(request) for request in body]
+        return 200, self.call(body)
+
+
+class StubUserDataStream:
+    """
+    Serveur WebSocket minimal pour les flux utilisateur (``streams``) ; renvoie son URL.
+
+    ``push(évènement)`` envoie un message JSON à tous les clients connectés ;
+    les messages reçus (abonnements, PING) sont conservés dans ``received`` et
+    les PING reçoivent un PONG au format MEXC.
+    """
+
+    def __init__(self):
+        self.connections = []
+        self.paths = []
+        self.received = []
+        self.lock = threading.Lock()
+
+    def handler(self, connection):
+        from websockets.exceptions import ConnectionClosed
+        with self.lock:
+            self.connections.append(connection)
+            self.paths.append(connection.request.path)
+        try:
+            for message in connection:
+                message = json.loads(message)
+                self.received.append(message)
+                if message.get("method") == "PING":
+                    connection.send(json.dumps({"id": 0, "code": 0, "msg": "PONG"}))
+        except ConnectionClosed:
+            pass
+
+    def push(self, event):
+        from websockets.exceptions import ConnectionClosed
+        with self.lock:
+            connections = list(self.connections)
+        for connection in connections:
+            # Un client déjà déconnecté est simplement ignoré
+            try:
+                connection.send(json.dumps(event))
+            except ConnectionClosed:
+                with self.lock:
+                    if connection in self.connections:
+                        self.connections.remove(connection)
+
+    def disconnect(self):
+        """Ferme les connexions ouvertes, pour simuler une coupure."""
+        with self.lock:
+            connections, self.connections = self.connections, []
+        for connection in connections:
+            connection.close()
+
+    def __enter__(self):
+        # Import à la demande : websockets n'est nécessaire que pour ce serveur
+        from websockets.sync.server import serve
+        self.server = serve(self.handler, "127.0.0.1", 0)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return f"ws://127.0.0.1:{self.server.socket.getsockname()[1]}"
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
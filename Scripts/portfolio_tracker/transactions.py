@@ -0,0 +1,65 @@
+"""
+Éléments communs aux collecteurs d'historique de transactions.
+
+Les tables ``binance_trades``, ``mexc_trades`` et ``evm_transactions`` partagent
+le même format, une ligne par mouvement d'actif :
+
+- ``date``, ``ts`` : jour et horodatage (UTC) de l'opération ;
+- ``plateforme``, ``adresse`` : compte ou portefeuille concerné ;
+- ``symbol`` : paire échangée (BTCUSDT) ou actif transféré (ETH) ;
+- ``transaction_id`` : identifiant de l'opération chez sa source ;
+- ``type`` : BUY / SELL pour un échange, type d'opération Zerion sinon ;
+- ``montant``, ``prix``, ``montant_quote`` : quantité (positive pour un trade,
+  dont le sens est donné par ``type`` ; négative pour un transfert sortant),
+  prix unitaire et contre-valeur ;
+- ``frais``, ``frais_symbol`` : frais payés et actif dans lequel ils l'ont été.
+
+Chaque collecteur conserve un curseur par compte et par symbole (dernier
+identifiant ou horodatage vu) dans un point de reprise local : un lancement ne
+télécharge que les opérations postérieures, page par page. Le curseur n'avance
+qu'une fois les lignes écrites.
+"""
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from .checkpoint import Checkpoint
+
+COLUMNS = ['date', 'ts', 'plateforme', 'adresse', 'symbol', 'transaction_id', 'type',
+           'montant', 'prix', 'montant_quote', 'frais', 'frais_symbol']
+
+
+def from_millis(timestamp):
+    """Horodatage en millisecondes → datetime UTC naïf."""
+    return datetime.fromtimestamp(int(timestamp) / 1000, tz=timezone.utc).replace(tzinfo=None)
+
+
+def to_frame(rows):
+    """DataFrame au format commun à partir de tuples ordonnés comme ``COLUMNS`` (sans ``date``)."""
+    df = pd.DataFrame.from_records(rows, columns=COLUMNS[1:])
+    df['ts'] = pd.to_datetime(df['ts'])
+    df.insert(0, 'date', df['ts'].dt.date)
+    return df
+
+
+class Cursors:
+    """Curseurs ``{compte|symbole: valeur}`` d'un collecteur, persistés dans le cache local."""
+
+    def __init__(self, name):
+        self.checkpoint = Checkpoint(name)
+
+    @staticmethod
+    def key(account, symbol):
+        return f"{account}|{symbol}"
+
+    def get(self, account, symbol, default=None):
+        return self.checkpoint.state.get(self.key(account, symbol), default)
+
+    def set(self, account, symbol, value):
+        self.checkpoint.state[self.key(account, symbol)] = value
+        self.checkpoint.save()
+
+    def symbols(self, account):
+        """Symboles déjà suivis pour ``account`` (ex. paires qui n'ont plus de solde)."""
+        prefix = f"{account}|"
+        return [key[len(prefix):] for key in self.checkpoint.state if key.startswith(prefix)]
@@ -0,0 +1,129 @@
+"""
+Valorisation quotidienne du portefeuille, calculée après les collecteurs.
+
+Chaque position des tables de soldes est valorisée au prix du jour de
+``crypto_price`` (``valeur = montant * prix``) dans ``portfolio_valuation_daily``,
+avec deux tables de totaux pré-agrégés pour les tableaux de bord :
+
+- ``portfolio_valuation_platform_daily`` : valeur par plateforme et par jour ;
+- ``portfolio_valuation_symbol_daily`` : montant et valeur par symbole et par jour.
+
+Seules les dates postérieures ou égales à la dernière date déjà valorisée
+sont traitées : le dernier jour est revalorisé pour prendre en compte une
+relance des collecteurs le même jour. Les jours valorisés sur un cours
+provisoire (``schema.SPOT_SUFFIX``) sont notés dans un point de reprise et
+revalorisés à chaque passage, jusqu'à ce que leur prix d'ouverture soit connu.
+"""
+from datetime import date
+
+import pandas as pd
+
+from .asset_mapping import get_index, source_for_platform
+from .checkpoint import Checkpoint
+from .db import ensure_index
+from .schema import is_spot
+from .sinks import get_sink
+
+TABLE = "portfolio_valuation_daily"
+TABLE_PLATFORM = "portfolio_valuation_platform_daily"
+TABLE_SYMBOL = "portfolio_valuation_symbol_daily"
+
+# Tables de soldes valorisées (la version « dataviz » de Starknet porte les symboles joignables aux prix)
+BALANCE_TABLES = ["binance_soldewallet", "mexc_soldewallet", "evm_soldewallet", "starknet_soldewallet_dataviz"]
+
+COLUMNS = ['date', 'symbol', 'plateforme', 'adresse', 'type_position', 'protocole', 'montant', 'prix', 'valeur']
+
+CHECKPOINT_NAME = "valuation_checkpoint.json"
+
+
+def last_valued_date(sink):
+    return sink.max_date(TABLE)
+
+
+def load_positions(sink, since=None):
+    """Positions des tables de soldes depuis ``since`` (inclus), avec leur symbole canonique."""
+    columns = COLUMNS[:-2]
+    frames = [sink.read(table, columns, start=since) for table in BALANCE_TABLES if sink.has_table(table)]
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    df = pd.concat(frames, ignore_index=True)
+    if df.empty:
+        return df
+
+    # Résolution par l'index des actifs, une recherche par couple (source, symbole) distinct
+    index = get_index()
+    sources = df['plateforme'].map(source_for_platform)
+    for source in sources.unique():
+        mask = sources == source
+        df.loc[mask, 'symbol'] = index.canonical_series(source, df.loc[mask, 'symbol']).to_numpy()
+    return df
+
+
+def load_prices(sink, symbols, since=None):
+    """
+    Prix de ``crypto_price`` des seuls ``symbols`` depuis ``since`` (inclus),
+    une ligne par (date, symbole).
+
+    Sous SQL, la lecture passe par l'index (symbol, date), créé s'il manque.
+    """
+    engine = getattr(sink, "engine", None)
+    if engine is not None and sink.has_table("crypto_price"):
+        ensure_index(engine, "crypto_price", ['symbol', 'date'])
+    df = sink.read("crypto_price", ['date', 'symbol', 'prix', 'source'], start=since, filters={'symbol': sorted(symbols)})
+    return df.drop_duplicates(subset=['date', 'symbol'], keep='last')
+
+
+def join_prices(positions, prices):
+    """Prix du jour de chaque position ; ``validate`` garantit qu'aucune ligne n'est dupliquée."""
+    return positions.merge(prices, on=['date', 'symbol'], how='left', validate='many_to_one')
+
+
+def value_positions(df):
+    df = df.copy()
+    df['valeur'] = df['montant'] * df['prix']
+    return df.reindex(COLUMNS, axis=1)
+
+
+def aggregate(df):
+    """Totaux par plateforme et par symbole ; une position sans prix ne compte pas dans la valeur."""
+    by_platform = df.groupby(['date', 'plateforme'])['valeur'].sum(min_count=1).reset_index()
+    grouped = df.groupby(['date', 'symbol'])
+    by_symbol = grouped[['montant', 'valeur']].sum(min_count=1).join(grouped['prix'].first()).reset_index()
+    return by_platform, by_symbol.reindex(['date', 'symbol', 'montant', 'prix', 'valeur'], axis=1)
+
+
+def run_valuation(sink=None, since=None):
+    """Valorise les dates nouvelles depuis le dernier passage et renvoie le nombre de positions écrites."""
+    sink = sink or get_sink()
+    checkpoint = Checkpoint(CHECKPOINT_NAME)
+    since = since or last_valued_date(sink)
+    since = pd.Timestamp(since).date() if since is not None else None
+    # Jours valorisés sur un cours provisoire : repris tant que leur prix d'ouverture manque
+    provisional = sorted(date.fromisoformat(day) for day in checkpoint.done)
+    if since is not None and provisional:
+        since = min(since, provisional[0])
+    df = load_positions(sink, since)
+    if df.empty:
+        print("Valorisation : aucune nouvelle position")
+        return 0
+
+    prices = load_prices(sink, df['symbol'].dropna().unique(), since)
+    df = join_prices(df, prices)
+    spot_days = set(df.loc[df['source'].map(is_spot), 'date'])
+    df = value_positions(df)
+    by_platform, by_symbol = aggregate(df)
+    missing = sorted(df.loc[df['prix'].isna(), 'symbol'].dropna().unique())
+    if missing:
+        print(f"Valorisation : pas de prix pour {', '.join(missing)}")
+
+    rows = sink.write(df, TABLE)
+    sink.write(by_platform, TABLE_PLATFORM)
+    sink.write(by_symbol, TABLE_SYMBOL)
+
+    # Le point de reprise n'est mis à jour qu'une fois les lignes écrites
+    checkpoint.done = {day for day in checkpoint.done if since is not None and day < since.isoformat()}
+    checkpoint.add(day.isoformat() for day in spot_days)
+    checkpoint.save()
+    print(f"Valorisation : {rows} positions du {df['date'].min()} au {df['date'].max()}")
+    return rows
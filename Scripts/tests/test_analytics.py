@@ -0,0 +1,57 @@
+"""
+Ajout d'un jour à ``PriceMatrix`` et ``Analytics`` : même état qu'un chargement complet.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from portfolio_tracker.analytics import Analytics, PriceMatrix
+
+
+def history(days=60, seed=0):
+    """Prix synthétiques ; SOL n'est coté qu'à partir du 41e jour et ETH manque un jour sur sept."""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2024-01-01", periods=days).date
+    rows = []
+    for position, day in enumerate(dates):
+        for symbol, start in (('BTC', 40000.0), ('ETH', 2000.0), ('SOL', 100.0)):
+            if (symbol == 'SOL' and position < 40) or (symbol == 'ETH' and position % 7 == 3):
+                continue
+            rows.append((day, symbol, start * float(np.exp(rng.normal(0, 0.03) + 0.001 * position))))
+    return pd.DataFrame(rows, columns=['date', 'symbol', 'prix'])
+
+
+def split(df, days):
+    """Matrice des premiers jours, puis ajout des ``days`` derniers un par un."""
+    dates = sorted(df['date'].unique())
+    loaded = df[df['date'] < dates[-days]]
+    appended = df[df['date'] >= dates[-days]].groupby('date')
+    return loaded, [(day, group.set_index('symbol')['prix']) for day, group in appended]
+
+
+def test_append_matches_a_full_load():
+    df = history()
+    loaded, appended = split(df, 30)
+    matrix = PriceMatrix.from_frame(loaded)
+    for day, prices in appended:
+        matrix.append(day, prices)
+    full = PriceMatrix.from_frame(df)
+    pd.testing.assert_frame_equal(matrix.to_frame(), full.to_frame())
+
+
+def test_append_rejects_a_day_already_loaded():
+    matrix = PriceMatrix.from_frame(history(5))
+    with pytest.raises(ValueError, match="postérieur"):
+        matrix.append(matrix.dates[-1], {'BTC': 1.0})
+
+
+@pytest.mark.parametrize("corr_window", [None, 15])
+def test_incremental_indicators_match_a_rebuild(corr_window):
+    df = history()
+    loaded, appended = split(df, 30)
+    analytics = Analytics(PriceMatrix.from_frame(loaded), volatility_window=10, corr_window=corr_window, min_periods=5)
+    for day, prices in appended:
+        analytics.append(day, prices)
+    rebuilt = Analytics(PriceMatrix.from_frame(df), volatility_window=10, corr_window=corr_window, min_periods=5)
+    pd.testing.assert_frame_equal(analytics.summary(), rebuilt.summary(), rtol=1e-6)
+    pd.testing.assert_frame_equal(analytics.correlation(), rebuilt.correlation(), rtol=1e-6)
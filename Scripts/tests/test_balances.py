@@ -0,0 +1,58 @@
+"""
+Filtrage des soldes d'échange : soldes nuls et poussière ignorés avant le DataFrame.
+"""
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from portfolio_tracker import asset_mapping
+from portfolio_tracker.balances import filter_balances
+from portfolio_tracker.benchmarks import fixtures
+from portfolio_tracker.benchmarks.replay import replay
+from portfolio_tracker.sinks import ParquetSink
+
+BALANCES = [
+    {"asset": "BTC", "free": "0.00000100", "locked": "1.0"},
+    {"asset": "LDBTC", "free": "0.01000000", "locked": "0"},
+    {"asset": "ETH", "free": "0.00000000", "locked": "2.5"},
+    {"asset": "USDT", "free": "0.40000000", "locked": "0"},
+    {"asset": "XYZ", "free": "5.00000000", "locked": "0"},
+]
+
+
+@pytest.fixture(autouse=True)
+def index(tmp_path, monkeypatch):
+    monkeypatch.setenv("portfolio_cache_dir", str(tmp_path))
+    monkeypatch.setattr(asset_mapping, "_index", None)
+    for variable in ("dust_min_amount", "dust_min_usd"):
+        monkeypatch.delenv(variable, raising=False)
+    with replay(fixtures.coingecko_routes(asset_mapping.Liste)):
+        yield
+
+
+def prices(symbols):
+    return {symbol: price for symbol, price in {'BTC': 40000.0, 'USDT': 1.0}.items() if symbol in symbols}
+
+
+def test_zero_balances_are_skipped_and_locked_is_ignored():
+    kept = filter_balances(BALANCES, 'binance', price_lookup=prices)
+    assert kept == [('BTC', 1e-06), ('LDBTC', 0.01), ('USDT', 0.4), ('XYZ', 5.0)]
+
+
+def test_dust_threshold_uses_the_canonical_price(monkeypatch):
+    monkeypatch.setenv("dust_min_usd", "1")
+    # BTC vaut 0,04 $ et USDT 0,40 $ : ignorés ; LDBTC est valorisé au prix de BTC ; XYZ, sans prix, est conservé
+    assert filter_balances(BALANCES, 'binance', price_lookup=prices) == [('LDBTC', 0.01), ('XYZ', 5.0)]
+
+
+def test_amount_threshold():
+    kept = filter_balances(BALANCES, 'mexc', min_amount=0.1, price_lookup=prices)
+    assert kept == [('USDT', 0.4), ('XYZ', 5.0)]
+
+
+def test_dust_threshold_reads_the_latest_price(tmp_path):
+    sink = ParquetSink(str(tmp_path / "parquet"))
+    sink.write(pd.DataFrame({'date': [date(2024, 1, 1), date(2024, 1, 2)], 'symbol': 'USDT', 'prix': [10.0, 1.0]}),
+               "crypto_price")
+    assert filter_balances(BALANCES[3:4], 'mexc', sink=sink, min_usd=1) == []
@@ -0,0 +1,18 @@
+"""
+Règles de type de position : la version vectorisée suit la règle scalaire de ``schema``.
+"""
+import numpy as np
+import pandas as pd
+
+from portfolio_tracker.classification import classify_positions, sign_loans
+from portfolio_tracker.schema import position_type, signed_amount
+
+
+def test_vectorised_rules_match_the_scalar_rules():
+    symbols = ['ETH', 'xSTRK', 'nstSTRK', 'ezETH', 'wstETH', 'USDC', None, 'ETH', 'xSTRK']
+    montants = [1.0, 2.0, -1.0, -3.0, 0.5, -2.0, -1.0, np.nan, 0.0]
+    types = classify_positions(pd.Series(symbols), montants)
+    assert types.tolist() == [position_type(symbol, montant) for symbol, montant in zip(symbols, montants)]
+    assert types.tolist() == ['wallet', 'staked', 'staked', 'deposit', 'deposit', 'loan', 'loan', 'wallet', 'staked']
+    np.testing.assert_array_equal(sign_loans(pd.Series(montants), types),
+                                  [signed_amount(montant, kind) for montant, kind in zip(montants, types)])
@@ -0,0 +1,67 @@
+"""
+Création de table, upsert et migration de l'index unique, sur SQLite.
+"""
+from datetime import date
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, inspect, text
+
+from portfolio_tracker.db import migrate_unique_key, upsert
+from portfolio_tracker.sinks import SqlSink
+
+KEY = ['date', 'plateforme', 'adresse', 'symbol', 'transaction_id']
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'db.sqlite'}")
+    yield engine
+    engine.dispose()
+
+
+def trades(rows):
+    df = pd.DataFrame(rows, columns=['date', 'ts', 'plateforme', 'adresse', 'symbol', 'transaction_id', 'montant'])
+    return df.assign(ts=pd.to_datetime(df['ts']))
+
+
+def test_created_table_has_typed_columns(engine):
+    upsert(trades([(date(2024, 1, 2), '2024-01-02 10:00', 'Binance', None, 'BTCUSDT', '1', 0.5)]),
+           "binance_trades", engine)
+    types = {column['name']: str(column['type']) for column in inspect(engine).get_columns("binance_trades")}
+    assert types['date'] == 'DATE'
+    assert types['ts'] == 'DATETIME'
+    assert types['montant'] == 'FLOAT'
+    assert types['symbol'] == 'VARCHAR(100)'
+
+
+def test_upsert_replaces_rows_sharing_the_key(engine):
+    sink = SqlSink(engine)
+    sink.write(trades([(date(2024, 1, 2), '2024-01-02 10:00', 'Binance', None, 'BTCUSDT', '1', 0.5),
+                       (date(2024, 1, 9), '2024-01-09 10:00', 'Binance', None, 'BTCUSDT', '2', 1.0)]), "binance_trades")
+    sink.write(trades([(date(2024, 1, 2), '2024-01-02 10:00', 'Binance', None, 'BTCUSDT', '1', 0.7)]), "binance_trades")
+    df = sink.read("binance_trades", start=date(2024, 1, 1), end=date(2024, 1, 5))
+    assert df['montant'].tolist() == [0.7]
+    assert sink.max_date("binance_trades") == date(2024, 1, 9)
+
+
+def test_migration_keeps_the_newest_row(engine):
+    # Table historique alimentée en mode append : doublons, clé NULL, aucun index unique
+    legacy = trades([(date(2024, 1, 2), '2024-01-02 10:00', 'Binance', None, 'BTCUSDT', '1', 0.5),
+                     (date(2024, 1, 2), '2024-01-02 10:00', 'Binance', None, 'BTCUSDT', '1', 0.6),
+                     (date(2024, 1, 3), '2024-01-03 10:00', 'Binance', None, 'ETHUSDT', '2', 2.0)])
+    legacy.to_sql("binance_trades", engine, index=False)
+    update = trades([(date(2024, 1, 2), '2024-01-02 10:00', 'Binance', None, 'BTCUSDT', '1', 0.9)])
+    with pytest.raises(RuntimeError, match="migrate"):
+        upsert(update, "binance_trades", engine)
+
+    assert migrate_unique_key(engine, "binance_trades", KEY) == (3, 2)
+    assert migrate_unique_key(engine, "binance_trades", KEY) is None
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT symbol, adresse, montant FROM binance_trades ORDER BY symbol")).all()
+    assert [tuple(row) for row in rows] == [('BTCUSDT', '', 0.6), ('ETHUSDT', '', 2.0)]
+
+    upsert(update, "binance_trades", engine)
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*), MAX(montant) FROM binance_trades")).one() == (2, 2.0)
+        assert conn.execute(text("SELECT montant FROM binance_trades WHERE symbol = 'BTCUSDT'")).scalar() == 0.9
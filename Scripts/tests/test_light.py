@@ -0,0 +1,64 @@
+"""
+Chemin léger : upsert des tuples de ``RowSink`` sur la clé naturelle, en SQLite.
+"""
+from datetime import date
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+
+from portfolio_tracker.light import RowSink
+from portfolio_tracker.query_cache import connect, data_version
+from portfolio_tracker.schema import BALANCE_COLUMNS
+from portfolio_tracker.sinks import SqlSink
+
+TABLE = "binance_soldewallet"
+DAY = date(2024, 1, 2)
+
+
+@pytest.fixture
+def url(tmp_path, monkeypatch):
+    monkeypatch.setenv("portfolio_cache_dir", str(tmp_path / "cache"))
+    url = f"sqlite:///{tmp_path / 'db.sqlite'}"
+    # Table créée par le collecteur complet, comme en production
+    engine = create_engine(url)
+    SqlSink(engine).write(pd.DataFrame([(DAY, 'ETH', 'Binance', 1.0, 'wallet', None, None)],
+                                       columns=BALANCE_COLUMNS), TABLE)
+    engine.dispose()
+    return url
+
+
+def balances(url):
+    sink = SqlSink(create_engine(url))
+    try:
+        return sink.read(TABLE).sort_values('symbol')[['symbol', 'montant']].values.tolist()
+    finally:
+        sink.close()
+
+
+def test_rows_are_upserted_on_the_natural_key(url):
+    sink = RowSink(url)
+    # BTC et LDBTC, devenus tous deux BTC, partagent la clé : leurs montants sont additionnés
+    assert sink.write(TABLE, BALANCE_COLUMNS, [(DAY, 'BTC', 'Binance', 0.5, 'wallet', None, None),
+                                               (DAY, 'BTC', 'Binance', 0.25, 'wallet', None, None),
+                                               (DAY, 'ETH', 'Binance', 2.0, 'wallet', None, None)]) == 2
+    sink.write(TABLE, BALANCE_COLUMNS, [(DAY, 'BTC', 'Binance', 1.0, 'wallet', None, None)])
+    sink.close()
+    assert balances(url) == [['BTC', 1.0], ['ETH', 2.0]]
+
+
+def test_writes_invalidate_the_query_cache(url):
+    conn = connect()
+    before = data_version(conn, [TABLE], DAY, DAY)
+    sink = RowSink(url)
+    sink.write(TABLE, BALANCE_COLUMNS, [(DAY, 'BTC', 'Binance', 0.5, 'wallet', None, None)])
+    sink.close()
+    assert data_version(conn, [TABLE], DAY, DAY) > before
+    conn.close()
+
+
+def test_missing_table_is_left_to_the_full_collector(url):
+    sink = RowSink(url)
+    with pytest.raises(RuntimeError, match="table absente"):
+        sink.write("mexc_soldewallet", BALANCE_COLUMNS, [(DAY, 'BTC', 'MEXC', 0.5, 'wallet', None, None)])
+    sink.close()
@@ -0,0 +1,45 @@
+"""
+Mesures des collecteurs : attribuées au collecteur du bloc, mémoire publiée pour le processus.
+"""
+import threading
+
+import pytest
+
+from portfolio_tracker.metrics import REGISTRY, collector, peak_memory_mb, record_rows, stage
+
+
+@pytest.fixture(autouse=True)
+def registry():
+    REGISTRY.reset()
+    yield REGISTRY
+    REGISTRY.reset()
+
+
+def test_measures_are_attributed_to_their_collector():
+    def run(name, rows):
+        with collector(name):
+            with stage("fetch"):
+                pass
+            record_rows(rows)
+
+    threads = [threading.Thread(target=run, args=(name, rows)) for name, rows in (("binance", 3), ("mexc", 5))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    snapshot = REGISTRY.snapshot()
+    assert {name: metrics["counters"]["rows_written"] for name, metrics in snapshot.items()} == {"binance": 3, "mexc": 5}
+    assert set(snapshot["mexc"]["stages"]) == {"fetch", "total"}
+    assert all("peak_memory_mb" not in metrics for metrics in snapshot.values())
+
+
+def test_peak_memory_is_exposed_once_for_the_process():
+    with collector("binance"):
+        pass
+    lines = [line for line in REGISTRY.prometheus().splitlines() if "memory" in line and not line.startswith("#")]
+    if peak_memory_mb() is None:
+        assert lines == []
+    else:
+        # Une seule valeur, sans étiquette de collecteur
+        [line] = lines
+        assert line.startswith("portfolio_process_peak_memory_megabytes ")
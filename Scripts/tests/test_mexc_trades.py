@@ -0,0 +1,75 @@
+"""
+Historique des trades MEXC : le premier lancement lit toute la période, fenêtre par fenêtre.
+"""
+import time
+
+import pytest
+
+from portfolio_tracker.benchmarks.replay import replay
+from portfolio_tracker.collectors import mexc_trades
+from portfolio_tracker.sinks import ParquetSink
+
+HOUR = 3600 * 1000
+
+
+def trade(i, at):
+    return {"symbol": "BTCUSDT", "id": i, "time": at, "isBuyer": i % 2 == 0, "qty": "0.01", "price": "40000",
+            "quoteQty": "400", "commission": "0.4", "commissionAsset": "USDT"}
+
+
+class StubMyTrades:
+    """``myTrades`` comme l'API : sans ``startTime`` les derniers trades seulement, fenêtre de 24 h au plus."""
+
+    def __init__(self, trades):
+        self.trades = trades
+
+    def __call__(self, match, query, body):
+        limit = int(query["limit"])
+        if "startTime" not in query:
+            return 200, self.trades[-limit:]
+        start, end = int(query["startTime"]), int(query["endTime"])
+        if end - start > 24 * HOUR:
+            return 400, {"code": 700004, "msg": "startTime and endTime must be within 24 hours"}
+        return 200, [trade for trade in self.trades if start <= trade["time"] <= end][:limit]
+
+    def routes(self):
+        return [
+            ("GET", r"api\.mexc\.com/api/v3/account",
+             lambda match, query, body: (200, {"balances": [{"asset": "BTC", "free": "1", "locked": "0"}]})),
+            ("GET", r"api\.mexc\.com/api/v3/exchangeInfo",
+             lambda match, query, body: (200, {"symbols": [{"symbol": "BTCUSDT"}]})),
+            ("GET", r"api\.mexc\.com/api/v3/myTrades", self),
+        ]
+
+
+@pytest.fixture
+def sink(tmp_path, monkeypatch):
+    monkeypatch.setenv("portfolio_cache_dir", str(tmp_path / "cache"))
+    monkeypatch.setenv("mexc_api_key", "key")
+    monkeypatch.setenv("mexc_secret_key", "secret")
+    monkeypatch.setenv("mexc_rate_per_minute", "60000")
+    for variable in ("mexc_trades_start", "mexc_trades_history_days", "mexc_trades_window_hours", "mexc_trade_pairs"):
+        monkeypatch.delenv(variable, raising=False)
+    return ParquetSink(str(tmp_path / "parquet"))
+
+
+def test_first_run_reads_the_whole_history(sink):
+    # 300 trades sur les 10 derniers jours, dont plus de 100 dans une même heure
+    now = int(time.time() * 1000)
+    times = sorted([now - 10 * 24 * HOUR + i * 3 * HOUR for i in range(80)] + [now - 2 * HOUR + i for i in range(220)])
+    stub = StubMyTrades([trade(i, at) for i, at in enumerate(times)])
+    with replay(stub.routes()):
+        assert mexc_trades.run(sink) == 300
+        # Deuxième lancement : rien de nouveau, puis un trade arrivé entre-temps
+        assert mexc_trades.run(sink) == 0
+        stub.trades.append(trade(300, int(time.time() * 1000) + 1))
+        assert mexc_trades.run(sink) == 1
+    assert sorted(sink.read(mexc_trades.TABLE, ['transaction_id'])['transaction_id'].astype(int)) == list(range(301))
+
+
+def test_history_start_is_configurable(sink, monkeypatch):
+    monkeypatch.setenv("mexc_trades_start", "2024-01-01")
+    assert mexc_trades.history_start(0) == 1704067200000
+    monkeypatch.delenv("mexc_trades_start")
+    monkeypatch.setenv("mexc_trades_history_days", "1")
+    assert mexc_trades.history_start(48 * HOUR) == 24 * HOUR
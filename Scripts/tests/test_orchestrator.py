@@ -0,0 +1,28 @@
+"""
+Lancement par défaut : les sources de trades non configurées sont ignorées, pas en échec.
+"""
+from types import SimpleNamespace
+
+import pytest
+
+from portfolio_tracker import collectors, orchestrator
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    monkeypatch.setattr(collectors, "COLLECTORS", {"prices": "prices", "mexc_trades": "mexc_trades"})
+    monkeypatch.setattr(collectors, "load", lambda name: SimpleNamespace(run=lambda sink: 3))
+    for variable in ("mexc_api_key", "mexc_secret_key"):
+        monkeypatch.delenv(variable, raising=False)
+
+
+def test_unconfigured_collectors_are_skipped(fake):
+    results = {result['collector']: result for result in orchestrator.run_all(sink=SimpleNamespace(close=lambda: None), valuation=False)}
+    assert results['prices']['status'] == "OK"
+    assert results['mexc_trades']['status'] == "IGNORÉ"
+    assert "mexc_api_key" in results['mexc_trades']['error']
+
+
+def test_explicit_collectors_always_run(fake):
+    [result] = orchestrator.run_all(["mexc_trades"], sink=SimpleNamespace(close=lambda: None), valuation=False)
+    assert result['status'] == "OK"
@@ -0,0 +1,143 @@
+"""
+Moteur de lots de ``pnl`` comparé à une boucle naïve, trade par trade.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from portfolio_tracker.pnl import apply_legs, new_state
+
+COLUMNS = ['quantite', 'cout_moyen', 'cout_fifo', 'pnl_realise_moyen', 'pnl_realise_fifo']
+
+
+def naive(delta, value):
+    """Référence : une file de lots FIFO et un coût moyen mis à jour mouvement par mouvement."""
+    lots, qty, cost, rows = [], 0.0, 0.0, []
+    for d, v in zip(delta, value):
+        realised_avg = realised_fifo = 0.0
+        if d > 0:
+            lots.append([d, v])
+            qty, cost = qty + d, cost + v
+        else:
+            sold = min(-d, qty)
+            proceeds = v * sold / -d if d < 0 else 0.0
+            if qty > 0:
+                realised_avg = proceeds - cost * sold / qty
+                cost *= 1 - sold / qty
+            qty -= sold
+            rest, sold_cost = sold, 0.0
+            while rest > 1e-12 and lots:
+                take = min(rest, lots[0][0])
+                lot_cost = lots[0][1] * take / lots[0][0]
+                lots[0][0] -= take
+                lots[0][1] -= lot_cost
+                sold_cost += lot_cost
+                rest -= take
+                if lots[0][0] <= 1e-12:
+                    lots.pop(0)
+            realised_fifo = proceeds - sold_cost
+        rows.append((qty, cost, sum(lot_cost for _, lot_cost in lots), realised_avg, realised_fifo))
+    return np.array(rows)
+
+
+def chained(delta, value, cuts):
+    """Mouvements appliqués par lots successifs, l'état étant reporté d'un lot à l'autre."""
+    state, rows = new_state(), []
+    for start, end in zip([0] + cuts, cuts + [len(delta)]):
+        legs = pd.DataFrame({'ts': pd.date_range('2024-01-01', periods=end - start, freq='min'),
+                             'quantite': delta[start:end], 'valeur': value[start:end]})
+        state, result = apply_legs(state, legs)
+        rows.append(result[COLUMNS].to_numpy())
+    return np.vstack(rows)
+
+
+@pytest.mark.parametrize("buy_only", [True, False])
+def test_batches_match_naive_loop(buy_only):
+    rng = np.random.default_rng(0)
+    for _ in range(500):
+        n = int(rng.integers(2, 40))
+        sign = 1.0 if buy_only else np.where(rng.random(n) < 0.6, 1.0, -1.0)
+        delta = rng.uniform(0.01, 5, n) * sign
+        value = np.abs(delta) * rng.uniform(10, 1000, n)
+        expected = naive(delta, value)
+        # Le découpage en lots ne doit pas changer le résultat
+        for cuts in ([], sorted(set(rng.integers(1, n, rng.integers(1, 5)).tolist()))):
+            np.testing.assert_allclose(chained(delta, value, cuts), expected, rtol=1e-7, atol=1e-6)
+
+
+def test_open_lots_survive_rounding():
+    # 0.1 + 0.2 - 0.3 ≠ 0 en flottants : aucun lot ne doit être perdu ni réduit à de la poussière
+    state, _ = apply_legs(new_state(), pd.DataFrame({'ts': pd.date_range('2024-01-01', periods=3, freq='min'),
+                                                     'quantite': [0.1, 0.2, 0.3], 'valeur': [10.0, 20.0, 30.0]}))
+    state, _ = apply_legs(state, pd.DataFrame({'ts': [pd.Timestamp('2024-01-02')], 'quantite': [0.7], 'valeur': [70.0]}))
+    np.testing.assert_allclose(state['lots'], [[0.1, 10.0], [0.2, 20.0], [0.3, 30.0], [0.7, 70.0]])
+
+
+def trades(rows):
+    from portfolio_tracker.transactions import to_frame
+    return to_frame([(ts, 'Binance', None, pair, trade_id, side, qty, price, qty * price, 0.0, 'USDT')
+                     for ts, pair, trade_id, side, qty, price in rows])
+
+
+def test_late_rows_are_applied(tmp_path, monkeypatch, capsys):
+    from datetime import date
+
+    from portfolio_tracker import asset_mapping
+    from portfolio_tracker.benchmarks import fixtures
+    from portfolio_tracker.benchmarks.replay import replay
+    from portfolio_tracker.pnl import TABLE, run_pnl
+    from portfolio_tracker.sinks import ParquetSink
+
+    monkeypatch.setenv("portfolio_cache_dir", str(tmp_path / "cache"))
+    monkeypatch.setattr(asset_mapping, "_index", None)
+    live, rebuilt = ParquetSink(str(tmp_path / "live")), ParquetSink(str(tmp_path / "rebuilt"))
+    first = trades([("2024-01-02 10:00", "ETHUSDT", "1", "BUY", 2.0, 2000.0),
+                    ("2024-01-03 10:00", "ETHUSDT", "2", "SELL", 1.0, 2500.0)])
+    # Paires nouvellement suivies relues depuis le début : des trades antérieurs au dernier déjà traité
+    late = trades([("2024-01-01 09:00", "ETHUSDC", "3", "BUY", 1.0, 1000.0),
+                   ("2024-01-01 12:00", "BTCUSDT", "4", "BUY", 0.1, 40000.0),
+                   ("2024-01-04 10:00", "ETHUSDT", "5", "SELL", 1.0, 3000.0)])
+    end = date(2024, 1, 5)
+    days = pd.date_range('2024-01-01', end).date
+    prices = pd.DataFrame({'date': list(days) * 3, 'symbol': ['ETH'] * 5 + ['BTC'] * 5 + ['USDT'] * 5,
+                           'prix': [2000.0] * 5 + [40000.0] * 5 + [1.0] * 5})
+    for sink in (live, rebuilt):
+        sink.write(prices, "crypto_price")
+    with replay(fixtures.coingecko_routes(asset_mapping.Liste)):
+        live.write(first, "binance_trades")
+        run_pnl(live, end=end)
+        live.write(late, "binance_trades")
+        run_pnl(live, end=end)
+        rebuilt.write(pd.concat([first, late], ignore_index=True), "binance_trades")
+        run_pnl(rebuilt, restart=True, end=end)
+
+    def table(sink):
+        return sink.read(TABLE).sort_values(['symbol', 'date']).reset_index(drop=True)
+    pd.testing.assert_frame_equal(table(live), table(rebuilt), check_like=True)
+    # Relance sans ligne nouvelle : rien n'est relu ni réappliqué
+    with replay(fixtures.coingecko_routes(asset_mapping.Liste)):
+        run_pnl(rebuilt, end=end)
+    assert "PnL : 0 nouveau(x) mouvement(s)" in capsys.readouterr().out
+    pd.testing.assert_frame_equal(table(live), table(rebuilt), check_like=True)
+    eth = table(live).query("symbol == 'ETH'").set_index('date')
+    assert eth.loc[date(2024, 1, 1), 'quantite'] == 1.0
+    # FIFO : la vente du 3 consomme le lot du 1er janvier (coût 1000), celle du 4 la moitié du lot du 2
+    assert eth.loc[date(2024, 1, 5), 'pnl_realise_fifo_cumule'] == pytest.approx(1500.0 + 1000.0)
+
+
+def test_trades_without_a_quote_price_are_skipped(capsys):
+    from datetime import date
+
+    from portfolio_tracker.asset_mapping import AssetIndex
+    from portfolio_tracker.pnl import trade_legs
+
+    index = AssetIndex.build({'bitcoin': 'btc', 'ethereum': 'eth', 'tether': 'usdt', 'solana': 'sol'})
+    df = trades([("2024-01-02 10:00", "ETHUSDT", "1", "BUY", 2.0, 2000.0),
+                 ("2024-01-02 11:00", "SOLBTC", "2", "BUY", 10.0, 0.002),
+                 ("2024-01-02 12:00", "ETHBTC", "3", "BUY", 1.0, 0.05)])
+    # Prix connu de ETH seulement : aucune contre-valeur pour les paires cotées en BTC
+    prices = pd.DataFrame({'date': pd.to_datetime([date(2024, 1, 1)]), 'symbol': ['ETH'], 'prix': [2000.0]})
+    legs = pd.concat(trade_legs(df, 'binance', index, ['USDT', 'BTC'], ['USDT'], prices), ignore_index=True)
+    assert set(legs['symbol']) == {'ETH', 'USDT'}
+    assert legs['valeur'].notna().all()
+    assert "2 trade(s) ignoré(s), sans prix pour BTC" in capsys.readouterr().out
@@ -0,0 +1,59 @@
+"""
+Prix en dollars tirés des tickers des échanges (``price_sources``).
+"""
+from datetime import date
+
+import pandas as pd
+import pytest
+import requests
+
+from portfolio_tracker.asset_mapping import AssetIndex
+from portfolio_tracker.benchmarks.replay import replay
+from portfolio_tracker.price_sources import exchange_prices, usd_prices
+
+STABLE, CROSS = ["USDT", "USDC"], ["BTC", "ETH"]
+
+
+def tickers(prices):
+    return pd.DataFrame({'pair': list(prices), 'price': list(prices.values())})
+
+
+def prices(df):
+    return df.set_index('base')['prix'].to_dict(), df.set_index('base')['quote'].to_dict()
+
+
+def test_cross_quotes_go_through_the_stable_price():
+    df = usd_prices(tickers({"BTCUSDT": 40000.0, "ETHUSDC": 2000.0, "SOLBTC": 0.0025, "ARBETH": 0.0005}),
+                    STABLE, CROSS)
+    prix, quote = prices(df)
+    assert prix["SOL"] == pytest.approx(100.0)
+    assert prix["ARB"] == pytest.approx(1.0)
+    assert quote["SOL"] == "BTC" and quote["ARB"] == "ETH"
+
+
+def test_stable_quote_preferred_over_cross_quote():
+    df = usd_prices(tickers({"SOLBTC": 0.003, "BTCUSDT": 40000.0, "SOLUSDC": 101.0, "SOLUSDT": 100.0}),
+                    STABLE, CROSS)
+    prix, quote = prices(df)
+    assert (prix["SOL"], quote["SOL"]) == (100.0, "USDT")
+
+
+def test_unknown_quotes_are_dropped():
+    # TRY n'est pas une devise de cotation ; ETH n'a ici aucun cours contre une stable
+    df = usd_prices(tickers({"BTCUSDT": 40000.0, "XYZTRY": 12.0, "ARBETH": 0.0005, "USDT": 1.0}),
+                    STABLE, CROSS)
+    assert list(df['base']) == ["BTC"]
+
+
+def test_exchange_prices_are_spot():
+    index = AssetIndex.build({'bitcoin': 'btc', 'solana': 'sol'},
+                             {"tickers": {"binance": {"BTC": "bitcoin", "SOL": "solana"}}})
+    routes = [("GET", r"api\.binance\.com/api/v3/ticker/price",
+               lambda match, query, body: (200, [{"symbol": "BTCUSDT", "price": "40000"},
+                                                 {"symbol": "SOLBTC", "price": "0.0025"},
+                                                 {"symbol": "DOGEUSDT", "price": "0.1"}]))]
+    with replay(routes):
+        df = exchange_prices("binance", requests.Session(), index, day=date(2024, 1, 1))
+    assert df.set_index('symbol')['prix'].to_dict() == pytest.approx({"BTC": 40000.0, "SOL": 100.0})
+    # Cours instantané : ligne provisoire, remplacée par le prix d'ouverture
+    assert set(df['source']) == {"binance:spot"}
@@ -0,0 +1,61 @@
+"""
+Cours provisoires de ``crypto_price`` : remplacés par le prix d'ouverture, jamais l'inverse.
+"""
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from portfolio_tracker import asset_mapping
+from portfolio_tracker.backfill import existing_dates
+from portfolio_tracker.benchmarks import fixtures
+from portfolio_tracker.benchmarks.replay import replay
+from portfolio_tracker.collectors.prices import TABLE, without_final
+from portfolio_tracker.sinks import ParquetSink
+
+DAY = date(2024, 1, 2)
+
+
+def prices(rows):
+    return pd.DataFrame(rows, columns=['date', 'symbol', 'prix', 'source']).assign(market_cap=None, total_volume=None)
+
+
+@pytest.fixture
+def sink(tmp_path, monkeypatch):
+    monkeypatch.setenv("portfolio_cache_dir", str(tmp_path / "cache"))
+    monkeypatch.setattr(asset_mapping, "_index", None)
+    sink = ParquetSink(str(tmp_path / "parquet"))
+    sink.write(prices([(DAY, 'BTC', 42000.0, 'coingecko'), (DAY, 'ETH', 2300.0, 'binance:spot')]), TABLE)
+    return sink
+
+
+def test_spot_prices_never_replace_an_open(sink):
+    spot = prices([(DAY, 'BTC', 43000.0, 'coingecko:spot'), (DAY, 'ETH', 2350.0, 'mexc:spot'),
+                   (DAY, 'SOL', 100.0, 'binance:spot')])
+    kept = without_final(sink, spot)
+    assert sorted(kept['symbol']) == ['ETH', 'SOL']
+
+
+def test_backfill_refetches_spot_days(sink):
+    assert existing_dates(sink, {'BTC', 'ETH'}, DAY, DAY) == {'BTC': {DAY}}
+
+
+def test_valuation_revalues_spot_days(sink):
+    from portfolio_tracker.valuation import TABLE as VALUATION, run_valuation
+    following = date(2024, 1, 3)
+
+    def value(day):
+        df = sink.read(VALUATION)
+        return df.loc[df['date'] == day, 'valeur'].tolist()
+
+    sink.write(pd.DataFrame({'date': [DAY, following], 'symbol': 'ETH', 'plateforme': 'Binance', 'montant': 2.0,
+                             'type_position': 'wallet', 'protocole': None, 'adresse': None}), "binance_soldewallet")
+    sink.write(prices([(following, 'ETH', 2400.0, 'coingecko')]), TABLE)
+    with replay(fixtures.coingecko_routes(asset_mapping.Liste)):
+        run_valuation(sink)
+        assert value(DAY) == [4600.0]
+        # Le prix d'ouverture remplace le cours provisoire : le jour est revalorisé, bien qu'antérieur au dernier valorisé
+        sink.write(prices([(DAY, 'ETH', 2200.0, 'coingecko')]), TABLE)
+        run_valuation(sink)
+        assert value(DAY) == [4400.0]
+        assert value(following) == [4800.0]
@@ -0,0 +1,68 @@
+"""
+Cache de requêtes : invalidé par les (table, jour) réécrits de sa plage, et borné par le TTL.
+"""
+from datetime import date
+
+import pytest
+
+from portfolio_tracker import query_cache
+from portfolio_tracker.query_cache import QueryCache, record_write
+
+TABLE = "portfolio_valuation_platform_daily"
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("portfolio_cache_dir", str(tmp_path))
+    return QueryCache(size=8, persist=False, ttl_hours=1)
+
+
+def counted(cache, start, end):
+    """Résultat de la requête et nombre de calculs effectués."""
+    calls = []
+
+    def get():
+        return cache.get("valeur", [str(start), str(end)], [TABLE], start, end, lambda: calls.append(1) or len(calls))
+    return get, calls
+
+
+def test_only_writes_inside_the_range_invalidate(cache):
+    get, calls = counted(cache, date(2024, 1, 1), date(2024, 1, 31))
+    get()
+    get()
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # Jour hors de la plage, ou autre table : le résultat reste valide
+    record_write(TABLE, [date(2024, 2, 1)])
+    record_write("crypto_price", [date(2024, 1, 15)])
+    get()
+    assert len(calls) == 1
+
+    record_write(TABLE, [date(2024, 1, 15)])
+    get()
+    get()
+    assert len(calls) == 2
+    assert (cache.hits, cache.misses) == (3, 2)
+
+
+def test_results_expire_after_the_ttl(cache, monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(query_cache.time, "time", lambda: now[0])
+    get, calls = counted(cache, date(2024, 1, 1), date(2024, 1, 31))
+    get()
+    now[0] += 3599
+    get()
+    assert len(calls) == 1
+    now[0] += 2
+    get()
+    assert len(calls) == 2
+
+
+def test_persisted_results_survive_the_process(cache):
+    record_write(TABLE, [date(2024, 1, 2)])
+    get, _ = counted(QueryCache(persist=True, ttl_hours=1), date(2024, 1, 1), date(2024, 1, 31))
+    get()
+    # Nouveau cache, mémoire vide : le résultat est relu sur disque sans être recalculé
+    get, calls = counted(QueryCache(persist=True, ttl_hours=1), date(2024, 1, 1), date(2024, 1, 31))
+    assert get() == 1
+    assert calls == []
@@ -0,0 +1,59 @@
+"""
+Destinations interchangeables : Parquet (DuckDB) et SQL se comportent de la même façon.
+"""
+from datetime import date
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+
+from portfolio_tracker.sinks import ParquetSink, SqlSink
+
+TABLE = "binance_soldewallet"
+DAYS = [date(2024, 1, 1), date(2024, 1, 2), date(2024, 1, 3)]
+
+
+@pytest.fixture(params=["parquet", "sqlite"])
+def sink(request, tmp_path, monkeypatch):
+    monkeypatch.setenv("portfolio_cache_dir", str(tmp_path / "cache"))
+    if request.param == "parquet":
+        sink = ParquetSink(str(tmp_path / "parquet"))
+    else:
+        sink = SqlSink(create_engine(f"sqlite:///{tmp_path / 'db.sqlite'}"))
+    yield sink
+    sink.close()
+
+
+def balances(rows):
+    return pd.DataFrame(rows, columns=['date', 'symbol', 'montant']).assign(
+        plateforme='Binance', type_position='wallet', protocole=None, adresse=None)
+
+
+def test_writes_are_idempotent_on_the_natural_key(sink):
+    # BTC apparaît deux fois dans le lot (BTC et LDBTC normalisés) : les montants sont additionnés
+    sink.write(balances([(day, symbol, 1.0) for day in DAYS for symbol in ('BTC', 'BTC', 'ETH')]), TABLE)
+    sink.write(balances([(DAYS[1], 'ETH', 5.0)]), TABLE)
+    df = sink.read(TABLE, ['date', 'symbol', 'montant']).sort_values(['date', 'symbol'])
+    assert df['montant'].tolist() == [2.0, 1.0, 2.0, 5.0, 2.0, 1.0]
+    assert sink.max_date(TABLE) == DAYS[2]
+    assert sink.tables("binance") == [TABLE]
+
+
+def test_reads_are_limited_to_dates_and_filters(sink):
+    sink.write(balances([(day, symbol, 1.0) for day in DAYS for symbol in ('BTC', 'ETH', 'SOL')]), TABLE)
+    df = sink.read(TABLE, ['date', 'symbol'], start=DAYS[1], end=DAYS[1], filters={'symbol': ['BTC', 'SOL']})
+    assert list(df.columns) == ['date', 'symbol']
+    assert sorted(df['symbol']) == ['BTC', 'SOL']
+    assert set(df['date']) == {DAYS[1]}
+
+    totals = sink.query(f"SELECT symbol, SUM(montant) AS total FROM {TABLE} WHERE date >= :start "
+                        "GROUP BY symbol ORDER BY symbol", {"start": DAYS[1]})
+    assert totals['total'].tolist() == [2.0, 2.0, 2.0]
+
+
+def test_drop_removes_the_table(sink):
+    sink.write(balances([(DAYS[0], 'BTC', 1.0)]), TABLE)
+    sink.drop(TABLE)
+    assert not sink.has_table(TABLE)
+    assert sink.max_date(TABLE) is None
+    assert sink.read(TABLE, ['date', 'symbol']).empty
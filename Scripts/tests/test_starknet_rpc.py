@@ -0,0 +1,48 @@
+"""
+Lecture des soldes Starknet par JSON-RPC, contre le nœud local ``StubStarknetRpc``.
+"""
+import requests
+
+from portfolio_tracker.fetch import TokenBucket
+from portfolio_tracker.starknet_rpc import fetch_balances
+from portfolio_tracker.stubs import StubStarknetRpc
+
+ETH = "0x049d36570d4e46f48e99674bd3fcc84644ddd6b96f7c741b1562b82f9e004dc7"
+USDC = "0x053c91253bc9682c04929ca02ed00b3e423f6710d2ee7e0d5ebb06f3ecf368a8"
+MISSING = "0x0123"
+
+TOKENS = [
+    {"symbol": "ETH", "address": ETH, "decimals": 18},
+    {"symbol": "USDC", "address": USDC, "decimals": 6},
+    {"symbol": "XXX", "address": MISSING, "decimals": 18},
+]
+
+ALICE = "0x0a11ce"
+BOB = "0x0b0b"
+
+
+def read(stub, **kwargs):
+    with stub as rpc_url:
+        return fetch_balances([ALICE, BOB], tokens=TOKENS, session=requests.Session(), rpc_url=rpc_url,
+                              limiter=TokenBucket(6000), **kwargs)
+
+
+def test_balances_are_decoded_and_zeros_skipped():
+    stub = StubStarknetRpc({(ETH, ALICE): 15 * 10 ** 17, (USDC, ALICE): 2_500_000, (USDC, BOB): 7 * 10 ** 6},
+                           missing_contracts=[MISSING])
+    rows = read(stub)
+    assert rows == [
+        {"symbol": "ETH", "montant": 1.5, "adresse": ALICE},
+        {"symbol": "USDC", "montant": 2.5, "adresse": ALICE},
+        {"symbol": "USDC", "montant": 7.0, "adresse": BOB},
+    ]
+    # Les 6 couples (jeton, adresse) tiennent dans un seul lot
+    assert stub.requests == 1
+
+
+def test_uint256_high_part_and_batching():
+    # Solde au-delà de 2**128 : la partie haute du u256 doit être reprise
+    stub = StubStarknetRpc({(ETH, BOB): 3 * 2 ** 128 + 5})
+    rows = read(stub, batch_size=2)
+    assert rows == [{"symbol": "ETH", "montant": (3 * 2 ** 128 + 5) / 10 ** 18, "adresse": BOB}]
+    assert stub.requests == 3
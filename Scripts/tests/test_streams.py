@@ -0,0 +1,116 @@
+"""
+Flux utilisateur des soldes (``streams``), contre le serveur local ``StubUserDataStream``.
+"""
+import asyncio
+
+import pytest
+
+from portfolio_tracker import asset_mapping
+from portfolio_tracker.benchmarks import fixtures
+from portfolio_tracker.benchmarks.replay import replay
+from portfolio_tracker.streams import BinanceStream, MexcStream, StreamExpired
+from portfolio_tracker.stubs import StubUserDataStream
+
+
+class RecordingSink:
+    def __init__(self):
+        self.writes = []
+
+    def write(self, df, table):
+        self.writes.append((table, df.copy()))
+        return len(df)
+
+
+def offline(cls):
+    """Flux dont le relevé REST et la ``listenKey`` sont fournis par le test."""
+    class Offline(cls):
+        def __init__(self, sink, balances, **kwargs):
+            super().__init__(sink, **kwargs)
+            self.rest = balances
+
+        def snapshot(self):
+            return self.rest
+
+        def open_listen_key(self):
+            return "cle"
+
+        def keepalive(self, listen_key):
+            pass
+    return Offline
+
+
+@pytest.fixture(autouse=True)
+def index(tmp_path, monkeypatch):
+    # Index des actifs construit hors réseau, poussière non filtrée
+    monkeypatch.setenv("portfolio_cache_dir", str(tmp_path))
+    monkeypatch.delenv("dust_min_usd", raising=False)
+    monkeypatch.setattr(asset_mapping, "_index", None)
+    with replay(fixtures.coingecko_routes(asset_mapping.Liste)):
+        asset_mapping.get_index()
+
+
+async def until(condition, timeout=5.0):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not condition():
+        assert loop.time() < deadline, "délai dépassé"
+        await asyncio.sleep(0.01)
+
+
+def amounts(df):
+    return dict(zip(df['symbol'], df['montant']))
+
+
+def test_mexc_writes_full_then_changed_balances(monkeypatch):
+    sink = RecordingSink()
+    stream = offline(MexcStream)(sink, [{"asset": "ETH", "free": "1.5", "locked": "0"},
+                                        {"asset": "BTC", "free": "0.2", "locked": "0"}], flush_interval=0.05)
+
+    async def scenario(stub):
+        stop = asyncio.Event()
+        task = asyncio.create_task(stream.session(stop))
+        await until(lambda: sink.writes)
+        stub.push({"c": MexcStream.channel, "d": {"a": "ETH", "f": "0", "l": "0"}})
+        await until(lambda: len(sink.writes) > 1)
+        await until(lambda: {"method": "PING"} in stub.received)
+        stop.set()
+        await task
+
+    stub = StubUserDataStream()
+    with stub as url:
+        monkeypatch.setenv("mexc_ws_url", url)
+        asyncio.run(scenario(stub))
+
+    assert stub.paths == ["/?listenKey=cle"]
+    assert stub.received[0] == {"method": "SUBSCRIPTION", "params": [MexcStream.channel]}
+    # Premier passage complet, puis le seul actif modifié, devenu nul donc écrit à 0
+    assert sink.writes[0][0] == "mexc_soldewallet"
+    assert amounts(sink.writes[0][1]) == {"ETH": 1.5, "BTC": 0.2}
+    assert amounts(sink.writes[1][1]) == {"ETH": 0.0}
+    assert len(sink.writes) == 2
+
+
+def test_binance_expiry_flushes_pending_changes(monkeypatch):
+    sink = RecordingSink()
+    # Aucune écriture périodique pendant le test : seule la fermeture du flux écrit la modification
+    stream = offline(BinanceStream)(sink, [{"asset": "BTC", "free": "1", "locked": "0"}], flush_interval=60)
+
+    async def scenario(stub):
+        task = asyncio.create_task(stream.session(asyncio.Event()))
+        await until(lambda: sink.writes)
+        stub.push({"e": "balanceUpdate", "a": "BTC", "d": "-0.5"})
+        stub.push({"e": "outboundAccountPosition", "B": [{"a": "BTC", "f": "0.5", "l": "0"},
+                                                         {"a": "LDETH", "f": "2", "l": "0"}]})
+        stub.push({"e": "listenKeyExpired"})
+        with pytest.raises(StreamExpired):
+            await task
+
+    stub = StubUserDataStream()
+    with stub as url:
+        monkeypatch.setenv("binance_ws_url", url)
+        asyncio.run(scenario(stub))
+
+    assert stub.paths == ["/cle"]
+    assert amounts(sink.writes[0][1]) == {"BTC": 1.0}
+    # balanceUpdate ignoré, LDETH écrit sous son symbole canonique
+    assert amounts(sink.writes[1][1]) == {"BTC": 0.5, "ETH": 2.0}
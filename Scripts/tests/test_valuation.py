@@ -0,0 +1,71 @@
+"""
+Valorisation incrémentale : passages successifs identiques à un calcul complet.
+"""
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from portfolio_tracker import asset_mapping
+from portfolio_tracker.benchmarks import fixtures
+from portfolio_tracker.benchmarks.replay import replay
+from portfolio_tracker.schema import natural_key
+from portfolio_tracker.sinks import ParquetSink
+from portfolio_tracker.valuation import TABLE, TABLE_PLATFORM, TABLE_SYMBOL, run_valuation
+
+DAYS = [date(2024, 1, 1), date(2024, 1, 2), date(2024, 1, 3)]
+
+
+@pytest.fixture(autouse=True)
+def index(tmp_path, monkeypatch):
+    monkeypatch.setenv("portfolio_cache_dir", str(tmp_path / "cache"))
+    monkeypatch.setattr(asset_mapping, "_index", None)
+    with replay(fixtures.coingecko_routes(asset_mapping.Liste)):
+        yield
+
+
+def collect(sink, day):
+    """Soldes et prix d'un jour ; LDBTC (Binance Earn) est valorisé comme BTC, XYZ n'a pas de prix."""
+    position = DAYS.index(day)
+    sink.write(pd.DataFrame({'date': day, 'symbol': ['BTC', 'LDBTC', 'XYZ'], 'plateforme': 'Binance',
+                             'montant': [0.5, 0.1 * (position + 1), 10.0], 'type_position': 'wallet',
+                             'protocole': None, 'adresse': None}), "binance_soldewallet")
+    sink.write(pd.DataFrame({'date': day, 'symbol': ['ETH'], 'plateforme': 'Arbitrum', 'montant': [2.0],
+                             'type_position': 'wallet', 'protocole': None, 'adresse': '0xabc'}), "evm_soldewallet")
+    sink.write(pd.DataFrame({'date': day, 'symbol': ['BTC', 'ETH'], 'prix': [40000.0 + 1000 * position, 2000.0],
+                             'source': 'coingecko', 'market_cap': None, 'total_volume': None}), "crypto_price")
+
+
+def tables(sink):
+    return {table: sink.read(table).sort_values(natural_key(table)).reset_index(drop=True)
+            for table in (TABLE, TABLE_PLATFORM, TABLE_SYMBOL)}
+
+
+def test_incremental_runs_match_a_full_run(tmp_path):
+    incremental, full = ParquetSink(str(tmp_path / "incremental")), ParquetSink(str(tmp_path / "full"))
+    for day in DAYS:
+        collect(incremental, day)
+        run_valuation(incremental)
+        collect(full, day)
+    run_valuation(full)
+
+    expected = tables(full)
+    for table, df in tables(incremental).items():
+        pd.testing.assert_frame_equal(df, expected[table], check_like=True)
+
+    by_platform = expected[TABLE_PLATFORM].set_index(['date', 'plateforme'])['valeur']
+    assert by_platform[(DAYS[2], 'Binance')] == pytest.approx((0.5 + 0.3) * 42000.0)
+    assert by_platform[(DAYS[2], 'Arbitrum')] == 4000.0
+
+
+def test_rerun_the_same_day_replaces_its_rows(tmp_path):
+    sink = ParquetSink(str(tmp_path / "parquet"))
+    collect(sink, DAYS[0])
+    run_valuation(sink)
+    # Relance des collecteurs le même jour : le dernier jour valorisé est repris
+    sink.write(pd.DataFrame({'date': DAYS[0], 'symbol': ['ETH'], 'plateforme': 'Arbitrum', 'montant': [3.0],
+                             'type_position': 'wallet', 'protocole': None, 'adresse': '0xabc'}), "evm_soldewallet")
+    run_valuation(sink)
+    df = sink.read(TABLE)
+    assert len(df) == 3
+    assert df.loc[df['symbol'] == 'ETH', 'valeur'].tolist() == [6000.0]